@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import threading
+import time
+
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# 設定値の型
+INT = (int,)
+NUMBER = (int, float)
+BOOL = (bool,)
+STR = (str,)
+LIST = (list,)
+OBJECT = (dict,)
+
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+def check_type(value, types) -> bool:
+    """
+    設定値の型を判定する（boolはintのサブクラスのため、BOOL以外ではboolを許可しない）。
+    """
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+
+class ConfigLoader(object):
+    """
+    設定ファイルの読み込み結果のキャッシュ
+    読み込み・検証済みの設定を保持し、ファイルの更新日時・iノード・サイズが変わった場合のみ再読み込みする。
+    ファイルの確認は最大でcheck_interval秒に1回とし、再読み込みで検証に失敗した場合は直前の設定を使用し続ける。
+    """
+
+    def __init__(self, path: str, schema: dict = None, check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 check_interval_key: str = None):
+        """
+        Args:
+            path str : 設定ファイルのパス
+            schema dict : 設定キー -> 許可する型のタプル（記載のないキーは検証しない）
+            check_interval float : ファイルの更新を確認する間隔（秒）
+            check_interval_key str : 確認間隔を設定ファイルで指定する場合の設定キー
+        """
+        self.path = path
+        self.schema = schema or {}
+        self.check_interval = check_interval
+        self.check_interval_key = check_interval_key
+        self._lock = threading.Lock()
+        self._config = None
+        self._signature = None
+        self._checked_at = 0.0
+
+        self._loaded_at = None
+        self._reloads = 0
+        self._failures = 0
+        self._last_error = None
+
+    def get(self) -> MappingProxyType:
+        """
+        設定を取得する。確認間隔を過ぎている場合はファイルの更新を確認する。
+        返却する設定は読み取り専用で、再読み込み時は新しい設定に置き換える（返却済みの設定は変わらない）。
+
+        :return: 設定
+        :raises Exception: 初回の読み込みまたは検証に失敗した場合
+        """
+        config = self._config
+        if config is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return config
+
+        with self._lock:
+            if self._config is None:
+                self._load(self._stat())
+            elif time.monotonic() - self._checked_at >= self.check_interval:
+                self._check()
+            return self._config
+
+    def _stat(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _check(self):
+        # ロック取得済みの状態で呼び出すこと
+        self._checked_at = time.monotonic()
+        try:
+            signature = self._stat()
+            if signature == self._signature:
+                return
+            self._load(signature)
+        except Exception as e:
+            self._failures += 1
+            self._last_error = str(e)
+            logger.exception("Failed to reload config file. Keeping the last loaded config. (path: %s)", self.path)
+
+    def _load(self, signature: tuple):
+        # ロック取得済みの状態で呼び出すこと
+        with open(self.path, "r") as config_file:
+            config = json.load(config_file)
+        self.validate(config)
+
+        self._config = MappingProxyType(config)
+        self._signature = signature
+        self._checked_at = time.monotonic()
+        self._loaded_at = time.time()
+        self._reloads += 1
+        if self.check_interval_key and check_type(config.get(self.check_interval_key), NUMBER):
+            self.check_interval = config[self.check_interval_key]
+        logger.info("Config file loaded. (path: %s)", self.path)
+        logger.debug("ConfigLoader: config" + str(config))
+
+    def validate(self, config):
+        """
+        設定を検証する。
+
+        :raises ValueError: 設定がオブジェクトでない場合、または設定値の型が不正な場合
+        """
+        if not isinstance(config, dict):
+            raise ValueError("Config must be an object.")
+        errors = [
+            key for key, types in self.schema.items()
+            if key in config and config[key] is not None and not check_type(config[key], types)
+        ]
+        if errors:
+            raise ValueError("Invalid config value type. (keys: %s)" % ", ".join(errors))
+
+    def stats(self) -> dict:
+        """
+        設定ファイルの読み込みの統計情報
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "path": self.path,
+                "loaded_at": self._loaded_at,
+                "reloads": self._reloads,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "check_interval": self.check_interval
+            }
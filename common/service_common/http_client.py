@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRY_TOTAL = 2
+DEFAULT_RETRY_BACKOFF = 0.2
+DEFAULT_RETRY_STATUS = (502, 503, 504)
+# 応答ステータスによる再試行の対象メソッド（接続エラーは送信前のため全メソッドで再試行する）
+# POSTは冪等でなく、502/503/504でも送信先で処理済みの場合に通知が重複するため、retry_postの指定時のみ対象とする。
+DEFAULT_RETRY_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+
+def build_retry(total: int, backoff: float, status_forcelist, methods) -> Retry:
+    """
+    再試行ポリシーを作成する。
+    送信後の読み取りエラーはサーバー側で処理済みの可能性があるため再試行しない。
+    読み取りエラーはMaxRetryErrorで包まずに送出し、呼び出し元でTimeoutとして判定できるようにする。
+    """
+    kwargs = {
+        "total": total,
+        "connect": total,
+        "read": False,
+        "status": total,
+        "backoff_factor": backoff,
+        "status_forcelist": tuple(status_forcelist),
+        "raise_on_status": False,
+    }
+    try:
+        return Retry(allowed_methods=frozenset(methods), **kwargs)
+    except TypeError:
+        # urllib3 1.26より前
+        return Retry(method_whitelist=frozenset(methods), **kwargs)
+
+
+class HttpClient(object):
+    """
+    接続を再利用するHTTPクライアント
+    接続プール(HTTPAdapter)はプロセス内で共有し、requests.Sessionはスレッドごとに作成する。
+    全てのリクエストに接続・読み取りのタイムアウトを設定し、送信先ホストごとの接続再利用の統計情報を提供する。
+    """
+
+    def __init__(
+            self,
+            pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            retry_total: int = DEFAULT_RETRY_TOTAL,
+            retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+            retry_status=DEFAULT_RETRY_STATUS,
+            retry_methods=DEFAULT_RETRY_METHODS,
+            retry_post: bool = False):
+        """
+        Args:
+            pool_connections int : 接続プールを保持するホスト数
+            pool_maxsize int : ホストごとに保持する接続数
+            connect_timeout float : 接続タイムアウト（秒）
+            read_timeout float : 読み取りタイムアウト（秒）
+            retry_total int : 再試行回数
+            retry_backoff float : 再試行の待機秒数の係数
+            retry_status list : 再試行する応答ステータス
+            retry_methods list : 応答ステータスで再試行するメソッド
+            retry_post bool : POSTも応答ステータスで再試行するかどうか（送信先が重複を許容する場合のみ指定する）
+        """
+        if retry_post:
+            retry_methods = tuple(retry_methods) + ("POST",)
+        self.timeout = (connect_timeout, read_timeout)
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=build_retry(retry_total, retry_backoff, retry_status, retry_methods))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # ホスト -> {"requests", "errors", "time"}
+        self._hosts = {}
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        リクエストを送信する。タイムアウト未指定の場合は既定のタイムアウトを設定する。
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlparse(url).netloc
+        started = time.monotonic()
+        error = False
+        try:
+            return self._session().request(method, url, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                stats = self._hosts.setdefault(host, {"requests": 0, "errors": 0, "time": 0.0})
+                stats["requests"] += 1
+                stats["time"] += elapsed
+                if error:
+                    stats["errors"] += 1
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> dict:
+        """
+        送信先ホストごとの統計情報
+        connectionsは新規に確立した接続数で、requestsとの差が接続を再利用したリクエスト数となる。
+
+        :rtype: dict
+        """
+        # urllib3の接続プールから新規接続数を取得する
+        connections = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else pool.host + ":" + str(pool.port)
+            connections[host] = connections.get(host, 0) + pool.num_connections
+
+        with self._lock:
+            hosts = {}
+            for host, stats in self._hosts.items():
+                created = connections.get(host, 0)
+                hosts[host] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "connections": created,
+                    "reused": max(stats["requests"] - created, 0),
+                    "time_avg": stats["time"] / stats["requests"] if stats["requests"] else 0.0
+                }
+        return {
+            "connect_timeout": self.timeout[0],
+            "read_timeout": self.timeout[1],
+            "hosts": hosts
+        }
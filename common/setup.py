@@ -0,0 +1,25 @@
+# coding: utf-8
+
+from setuptools import setup, find_packages
+
+NAME = "service_common"
+VERSION = "1.0.0"
+# 状態管理機能(manage)・状態通知機能(notify)の共通モジュール
+# 各サービスのディレクトリで以下を実行してインストールする
+#
+# pip3 install ../common
+
+REQUIRES = [
+    "requests"
+]
+
+setup(
+    name=NAME,
+    version=VERSION,
+    description="状態管理機能・状態通知機能の共通モジュール（設定ファイルの読み込み、HTTPクライアント）",
+    author_email="",
+    url="",
+    install_requires=REQUIRES,
+    python_requires=">=3.6",
+    packages=find_packages(exclude=["tests", "tests.*"]),
+)
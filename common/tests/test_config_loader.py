@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+from service_common import config_loader
+from service_common.config_loader import ConfigLoader
+
+
+def write_config(path, config):
+    with open(path, "w") as config_file:
+        json.dump(config, config_file)
+    # 同じ秒内の書き換えでも更新を検知できるよう更新日時をずらす
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = str(tmp_path / "config.json")
+    write_config(path, {"port": 8080, "name": "manage"})
+    return path
+
+
+def test_config_is_cached_until_check_interval(config_path):
+    loader = ConfigLoader(config_path, check_interval=60)
+    config = loader.get()
+    write_config(config_path, {"port": 9090})
+
+    assert loader.get() is config
+    assert loader.stats()["reloads"] == 1
+
+
+def test_modified_file_is_reloaded(config_path):
+    loader = ConfigLoader(config_path, check_interval=0)
+    config = loader.get()
+    write_config(config_path, {"port": 9090})
+
+    assert loader.get()["port"] == 9090
+    # 返却済みの設定は変わらない
+    assert config["port"] == 8080
+    assert loader.stats()["reloads"] == 2
+
+
+def test_unmodified_file_is_not_reloaded(config_path):
+    loader = ConfigLoader(config_path, check_interval=0)
+    config = loader.get()
+    assert loader.get() is config
+    assert loader.stats()["reloads"] == 1
+
+
+def test_config_is_read_only(config_path):
+    config = ConfigLoader(config_path).get()
+    with pytest.raises(TypeError):
+        config["port"] = 9090
+
+
+def test_invalid_reload_keeps_last_config(config_path):
+    loader = ConfigLoader(config_path, schema={"port": config_loader.INT}, check_interval=0)
+    loader.get()
+
+    write_config(config_path, {"port": "9090"})
+    assert loader.get()["port"] == 8080
+
+    with open(config_path, "w") as config_file:
+        config_file.write("{")
+    assert loader.get()["port"] == 8080
+    assert loader.stats()["failures"] == 2
+
+
+def test_invalid_initial_config_raises(config_path):
+    write_config(config_path, {"port": True})
+    loader = ConfigLoader(config_path, schema={"port": config_loader.INT})
+    with pytest.raises(ValueError):
+        loader.get()
+
+
+def test_check_interval_from_config(config_path):
+    write_config(config_path, {"port": 8080, "config_check_interval": 5})
+    loader = ConfigLoader(config_path, check_interval=0, check_interval_key="config_check_interval")
+    loader.get()
+    assert loader.check_interval == 5
+
+
+def test_check_type():
+    assert config_loader.check_type(1, config_loader.NUMBER)
+    assert config_loader.check_type(1.5, config_loader.NUMBER)
+    assert not config_loader.check_type(True, config_loader.INT)
+    assert config_loader.check_type(False, config_loader.BOOL)
+    assert not config_loader.check_type("1", config_loader.INT)
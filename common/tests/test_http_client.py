@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from service_common.http_client import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    503を指定回数返した後に200を返す送信先
+    """
+
+    def _respond(self):
+        server = self.server
+        server.requests.append(self.command)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.path == "/slow":
+            time.sleep(0.3)
+        status = 503 if len(server.requests) <= server.failures else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path="/"):
+    return "http://127.0.0.1:%d%s" % (server.server_address[1], path)
+
+
+def test_get_is_retried_on_unavailable(server):
+    server.failures = 1
+    response = HttpClient(retry_backoff=0).get(url(server))
+    assert response.status_code == 200
+    assert server.requests == ["GET", "GET"]
+
+
+def test_post_is_not_retried_by_default(server):
+    server.failures = 1
+    response = HttpClient(retry_backoff=0).post(url(server), json={})
+    # 送信先で処理済みの可能性があるため再送しない
+    assert response.status_code == 503
+    assert server.requests == ["POST"]
+
+
+def test_post_is_retried_when_enabled(server):
+    server.failures = 1
+    response = HttpClient(retry_backoff=0, retry_post=True).post(url(server), json={})
+    assert response.status_code == 200
+    assert server.requests == ["POST", "POST"]
+
+
+def test_read_timeout_is_not_retried(server):
+    client = HttpClient(read_timeout=0.1, retry_backoff=0)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get(url(server, "/slow"))
+    assert server.requests == ["GET"]
+    assert client.stats()["hosts"]["127.0.0.1:%d" % server.server_address[1]]["errors"] == 1
+
+
+def test_default_timeout_and_connection_reuse(server):
+    client = HttpClient(connect_timeout=1, read_timeout=2)
+    for _ in range(3):
+        client.get(url(server))
+
+    stats = client.stats()
+    assert (stats["connect_timeout"], stats["read_timeout"]) == (1, 2)
+    host = stats["hosts"]["127.0.0.1:%d" % server.server_address[1]]
+    assert host["requests"] == 3
+    assert host["connections"] + host["reused"] == 3
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+立入り状態取得APIのレスポンス作成に要するCPU時間のベンチマーク
+
+従来方式（行を取得 → psycopg2でjson_aggをデコード → dictを作成 → jsonifyで再エンコード）と、
+PostgreSQLでレスポンス全体のJSON文字列を組み立ててそのまま返却する方式を比較する。
+
+  # DB不要。psycopg2が返却する形の行データを生成し、Python側の処理のみ計測する
+  python3 benchmark/bench_status_get.py --count 1000 --events 5
+
+  # 実際のDBに対して両方式のクエリを実行し、プロセスのCPU時間を計測する（manageコンテナ内で実行）
+  POSTGRES_HOST=... python3 benchmark/bench_status_get.py --db --port Port1 --count 1000
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _default(o):
+    # connexionのFlaskJSONEncoderと同じ日時の表現
+    if isinstance(o, datetime.datetime):
+        if o.tzinfo:
+            return o.isoformat()
+        return o.isoformat() + "Z"
+    raise TypeError(repr(o))
+
+
+def make_rows(count, events):
+    """
+    従来方式でDBから返却される行と、同じ内容をPostgreSQLで組み立てたJSON文字列を作成する。
+    """
+    tz = datetime.timezone(datetime.timedelta(hours=9))
+    base = datetime.datetime(2024, 11, 22, 13, 50, 40, tzinfo=tz)
+    rows = []
+    documents = []
+    for i in range(count):
+        event_list = [
+            {"id": "car-%d" % j, "type": "car", "detect": True, "location": "30.123456789012, 130.123456789012"}
+            for j in range(events)
+        ]
+        dt = base - datetime.timedelta(seconds=i)
+        # psycopg2はjson型の列をテキストで受信してjson.loadsでデコードする
+        rows.append(("Port1", dt, True, json.dumps(event_list), "https://xxxxx/report/%d" % i, i))
+        documents.append({
+            "datetime": dt, "detect": True, "events": event_list,
+            "port": "Port1", "report_endpoint": "https://xxxxx/report/%d" % i
+        })
+    return rows, json.dumps(documents, default=_default, sort_keys=True)
+
+
+def legacy_path(rows):
+    data = []
+    for row in rows:
+        events = json.loads(row[3]) if row[3] else []
+        data.append({
+            "port": row[0],
+            "datetime": row[1],
+            "detect": row[2],
+            "report_endpoint": row[4],
+            "events": events
+        })
+    # jsonifyはキーをソートしてエンコードする
+    return (json.dumps(data, default=_default, sort_keys=True) + "\n").encode("utf-8")
+
+
+def fast_path(document):
+    # PostgreSQLが返却したJSON文字列をレスポンスのバイト列にするのみ
+    return document.encode("utf-8")
+
+
+def measure(func, arg, repeat):
+    func(arg)
+    started = time.process_time()
+    for _ in range(repeat):
+        func(arg)
+    return (time.process_time() - started) / repeat
+
+
+def run_synthetic(args):
+    rows, document = make_rows(args.count, args.events)
+    legacy = measure(legacy_path, rows, args.repeat)
+    fast = measure(fast_path, document, args.repeat)
+    report(args, legacy, fast)
+
+
+def run_db(args):
+    from swagger_server.service import service
+
+    def legacy_db(_):
+        data, _cursor = service.status_get_data(args.port, None, None, args.count)
+        return (json.dumps(data, default=_default, sort_keys=True) + "\n").encode("utf-8")
+
+    def fast_db(_):
+        body, _cursor = service.status_get_json(args.port, None, None, args.count)
+        return body.encode("utf-8")
+
+    # キャッシュを無効にして毎回DBから取得する
+    service._status_cache = False
+    legacy = measure(legacy_db, None, args.repeat)
+    fast = measure(fast_db, None, args.repeat)
+    report(args, legacy, fast)
+
+
+def report(args, legacy, fast):
+    print("rows=%d events/row=%d repeat=%d" % (args.count, args.events, args.repeat))
+    print("legacy (decode + dict + jsonify) : %8.3f ms CPU/request" % (legacy * 1000))
+    print("fast   (PostgreSQL JSON text)    : %8.3f ms CPU/request" % (fast * 1000))
+    if fast > 0:
+        print("saved                            : %8.3f ms CPU/request (x%.1f)" % ((legacy - fast) * 1000, legacy / fast))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="1リクエストで返却する立入り状態の件数")
+    parser.add_argument("--events", type=int, default=5, help="立入り状態ごとのイベント数（合成データのみ）")
+    parser.add_argument("--repeat", type=int, default=50, help="計測回数")
+    parser.add_argument("--db", action="store_true", help="環境変数のDBに対して計測する")
+    parser.add_argument("--port", default=None, help="DB計測時のドローンポートID")
+    args = parser.parse_args()
+
+    if args.db:
+        run_db(args)
+    else:
+        run_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+立入り状態取得SQLのベンチマーク（イベント集約とLIMITの順序）
+
+従来のSQL（全イベントをLEFT JOINしてjson_agg → GROUP BY → ORDER BY/LIMIT）と、
+先に対象の立入り状態をインデックスで絞り込み、その行のみLATERALでイベントを集約するSQLを比較する。
+
+計測用のスキーマ(既定: bench)に立入り状態・イベント・レポートを生成し、search_pathを切り替えて実行するため、
+本番のテーブルには影響しない。マイグレーションと同じインデックスを作成する。
+
+  # 1,000万件の立入り状態を生成して計測する（manageコンテナ内で実行）
+  POSTGRES_HOST=... python3 benchmark/bench_status_query.py --setup --rows 10000000
+
+  # 生成済みのデータで再計測する
+  POSTGRES_HOST=... python3 benchmark/bench_status_query.py --port Port1 --limit 10
+
+  # 計測後にスキーマを削除する
+  POSTGRES_HOST=... python3 benchmark/bench_status_query.py --drop
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 変更前の立入り状態取得SQL
+LEGACY_QUERY = """
+    SELECT
+        ES.port,
+        ES.datetime,
+        ES.detect,
+        json_agg(json_build_object(
+            'id', EV.object_id,
+            'type', EV.object_type,
+            'detect', EV.detect,
+            'location', EV.location
+        )) as event,
+        R.endpoint,
+        ES.id
+    FROM ENTRY_STATUS_INFORMATION ES
+    LEFT OUTER JOIN EVENT_INFORMATION EV
+        ON ES.ID = EV.ent_stat_id
+    LEFT OUTER JOIN REPORT R
+        ON ES.report_id = R.report_id
+    WHERE ES.port = %s::varchar
+    GROUP BY ES.ID, EV.ent_stat_id, R.endpoint
+    ORDER BY ES.datetime DESC, ES.id DESC LIMIT %s::integer
+"""
+
+SETUP_STATEMENTS = [
+    "CREATE TABLE report (report_id UUID PRIMARY KEY, endpoint VARCHAR(256))",
+    """
+    CREATE TABLE entry_status_information (
+        id SERIAL PRIMARY KEY,
+        port VARCHAR(16) NULL,
+        datetime TIMESTAMP WITH TIME ZONE NULL,
+        detect BOOLEAN NULL,
+        report_id UUID NULL REFERENCES report (report_id)
+    )
+    """,
+    """
+    CREATE TABLE event_information (
+        id SERIAL PRIMARY KEY,
+        ent_stat_id INTEGER NOT NULL REFERENCES entry_status_information (id),
+        object_id VARCHAR(64) NULL,
+        object_type VARCHAR(16) NULL,
+        detect BOOLEAN NULL,
+        location VARCHAR(256) NULL,
+        datetime TIMESTAMP WITH TIME ZONE NULL
+    )
+    """,
+]
+
+INDEX_STATEMENTS = [
+    "CREATE INDEX ON entry_status_information (port, datetime, id)",
+    "CREATE INDEX ON event_information (ent_stat_id)",
+    "ANALYZE report",
+    "ANALYZE entry_status_information",
+    "ANALYZE event_information",
+]
+
+
+def setup(conn, args):
+    """
+    計測用スキーマにデータを生成する。
+    立入り状態はports個のポートに均等に割り当て、events_every件に1件をイベント無しとする。
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("DROP SCHEMA IF EXISTS " + args.schema + " CASCADE")
+        cursor.execute("CREATE SCHEMA " + args.schema)
+        cursor.execute("SET search_path TO " + args.schema)
+        for statement in SETUP_STATEMENTS:
+            cursor.execute(statement)
+        conn.commit()
+
+        cursor.execute("""
+            INSERT INTO report (report_id, endpoint)
+            SELECT md5(g::text)::uuid, 'https://xxxxx/report/' || g
+            FROM generate_series(1, %s) g
+        """, (args.reports,))
+        conn.commit()
+
+        started = time.monotonic()
+        chunk = 1000000
+        for offset in range(0, args.rows, chunk):
+            count = min(chunk, args.rows - offset)
+            cursor.execute("""
+                INSERT INTO entry_status_information (port, datetime, detect, report_id)
+                SELECT
+                    'Port' || (g %% %s + 1),
+                    TIMESTAMPTZ '2024-01-01 00:00:00+09' + g * INTERVAL '1 second',
+                    g %% 2 = 0,
+                    md5((g %% %s + 1)::text)::uuid
+                FROM generate_series(%s, %s) g
+            """, (args.ports, args.reports, offset + 1, offset + count))
+            cursor.execute("""
+                INSERT INTO event_information (ent_stat_id, object_id, object_type, detect, location, datetime)
+                SELECT ES.id, 'car-' || e, 'car', TRUE, '30.123456789012, 130.123456789012', ES.datetime
+                FROM entry_status_information ES
+                CROSS JOIN generate_series(1, %s) e
+                WHERE ES.id BETWEEN %s AND %s
+                  AND ES.id %% %s <> 0
+            """, (args.events, offset + 1, offset + count, args.events_every))
+            conn.commit()
+            print("  inserted %d / %d statuses (%.0fs)" % (offset + count, args.rows, time.monotonic() - started))
+
+        for statement in INDEX_STATEMENTS:
+            cursor.execute(statement)
+        conn.commit()
+    print("setup done. (%.0fs)" % (time.monotonic() - started))
+
+
+def measure(conn, query, params, repeat):
+    """
+    クエリを実行し、1回あたりの経過時間の中央値と実行計画を返す。
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        cursor.fetchall()
+        elapsed = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            cursor.fetchall()
+            elapsed.append(time.perf_counter() - started)
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    conn.rollback()
+    elapsed.sort()
+    return elapsed[len(elapsed) // 2], plan
+
+
+def run(conn, args):
+    from swagger_server.service import service
+
+    with conn.cursor() as cursor:
+        cursor.execute("SET search_path TO " + args.schema)
+        cursor.execute("SELECT count(*) FROM entry_status_information WHERE port = %s", (args.port,))
+        port_rows = cursor.fetchone()[0]
+    conn.commit()
+
+    query, params, _name = service.build_status_query(args.port, None, None, args.limit)
+    legacy, legacy_plan = measure(conn, LEGACY_QUERY, (args.port, args.limit + 1), args.repeat)
+    lateral, lateral_plan = measure(conn, query, params, args.repeat)
+
+    if args.verbose:
+        print("---- legacy plan ----")
+        print(legacy_plan)
+        print("---- lateral plan ----")
+        print(lateral_plan)
+
+    print("port=%s statuses(port)=%d limit=%d repeat=%d" % (args.port, port_rows, args.limit, args.repeat))
+    print("legacy  (aggregate all, then LIMIT) : %10.3f ms/query (median)" % (legacy * 1000))
+    print("lateral (LIMIT, then aggregate)     : %10.3f ms/query (median)" % (lateral * 1000))
+    if lateral > 0:
+        print("speedup                             : x%.1f" % (legacy / lateral))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schema", default="bench", help="計測用のスキーマ名")
+    parser.add_argument("--setup", action="store_true", help="計測用スキーマを作り直してデータを生成する")
+    parser.add_argument("--drop", action="store_true", help="計測用スキーマを削除する")
+    parser.add_argument("--rows", type=int, default=10000000, help="生成する立入り状態の件数")
+    parser.add_argument("--ports", type=int, default=10, help="生成するドローンポートの数")
+    parser.add_argument("--events", type=int, default=3, help="立入り状態ごとのイベント数")
+    parser.add_argument("--events-every", type=int, default=5, help="N件に1件をイベント無しの立入り状態とする")
+    parser.add_argument("--reports", type=int, default=1000, help="生成するレポートの件数")
+    parser.add_argument("--port", default="Port1", help="計測するドローンポートID")
+    parser.add_argument("--limit", type=int, default=10, help="取得件数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    parser.add_argument("--verbose", action="store_true", help="実行計画を表示する")
+    args = parser.parse_args()
+
+    from swagger_server.service import service
+
+    conn = service.get_db_connection()
+    try:
+        if args.drop:
+            with conn.cursor() as cursor:
+                cursor.execute("DROP SCHEMA IF EXISTS " + args.schema + " CASCADE")
+            conn.commit()
+            return
+        if args.setup:
+            setup(conn, args)
+        run(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
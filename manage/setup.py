@@ -26,7 +26,7 @@ setup(
     keywords=["Swagger", "動的状態管理アプリAPI"],
     install_requires=REQUIRES,
     packages=find_packages(),
-    package_data={'': ['swagger/swagger.yaml']},
+    package_data={'': ['swagger/swagger.yaml', 'migrations/*.sql']},
     include_package_data=True,
     entry_points={
         'console_scripts': ['swagger_server=swagger_server.__main__:main']},
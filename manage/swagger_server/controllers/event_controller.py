@@ -0,0 +1,58 @@
+import logging
+from swagger_server import util
+from flask import jsonify, make_response # type: ignore
+from swagger_server.utilities.manage_exception import ManageException
+from swagger_server.service import service
+
+logger = logging.getLogger(__name__)
+
+# 範囲内のイベント取得
+def events_get(bbox, since=None, port=None, limit=None):  # noqa: E501
+    """イベント範囲検索API
+
+    指定した範囲内で検知したイベント（障害物の検知情報）を新しい順に取得するためのAPI # noqa: E501
+
+    :param bbox: 範囲指定。"南端の緯度,西端の経度,北端の緯度,東端の経度"の形式。
+    :type bbox: str
+    :param since: 検知日時。指定した日時以降のイベントを返す。
+    :type since: str
+    :param port: ドローンポートのID。指定したドローンポートのイベントを返却する。
+    :type port: str
+    :param limit: 取得件数。省略時は設定ファイルのmax_count件。
+    :type limit: int
+
+    :rtype: List[EventResponse]
+    """
+    logger.info("Get Events API start.")
+
+    logger.debug("events_get(): bbox : " + str(bbox))
+    logger.debug("events_get(): since : " + str(since))
+    logger.debug("events_get(): port : " + str(port))
+    logger.debug("events_get(): limit : " + str(limit))
+
+    if since:
+        try:
+            since = util.deserialize_datetime(since)
+        except ValueError as e:
+            logger.exception("Invalid since format.")
+            raise ManageException("Invalid since format.", 400)
+
+    events = service.events_get_data(bbox, since, port, limit)
+
+    response = make_response(jsonify(events))
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    if 'Transfer-Encoding' in response.headers:
+        del response.headers['Transfer-Encoding']
+
+    logger.debug("events_get(): response status code : " + str(response.status_code))
+    logger.debug("events_get(): response headers : " + str(response.headers))
+    logger.debug("events_get(): response data : " + str(response.data))
+
+    logger.info("Get Events API end.")
+    return response
@@ -0,0 +1,45 @@
+import logging
+from flask import jsonify, make_response # type: ignore
+from swagger_server.service import service
+
+logger = logging.getLogger(__name__)
+
+# 統計情報取得
+def metrics_get():  # noqa: E501
+    """統計情報取得API
+
+    DBコネクションプール、立入り状態取得キャッシュ、読み取り用レプリカ、書き込みキュー、通知のアウトボックス、HTTP接続、状態変化の判定、設定ファイルの読み込み、S3クライアント、既存データの補完等の統計情報を取得するためのAPI # noqa: E501
+
+    :rtype: object
+    """
+    logger.info("Get Metrics API start.")
+
+    metrics = {
+        "db_pool": service.get_db_pool_stats(),
+        "status_cache": service.get_status_cache_stats(),
+        "db_replicas": service.get_replica_stats(),
+        "ingest_queue": service.get_ingest_queue_stats(),
+        "outbox": service.get_outbox_stats(),
+        "http": service.get_http_stats(),
+        "state_tracker": service.get_state_tracker_stats(),
+        "config": service.get_config_stats(),
+        "s3": service.get_s3_stats(),
+        "backfill": service.get_backfill_stats()
+    }
+
+    response = make_response(jsonify(metrics))
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    if 'Transfer-Encoding' in response.headers:
+        del response.headers['Transfer-Encoding']
+
+    logger.debug("metrics_get(): response status code : " + str(response.status_code))
+    logger.debug("metrics_get(): response data : " + str(response.data))
+
+    logger.info("Get Metrics API end.")
+    return response
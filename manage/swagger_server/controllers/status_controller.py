@@ -1,22 +1,29 @@
 import logging
 from swagger_server import util
-from flask import jsonify, make_response # type: ignore
+from flask import Response, jsonify, make_response # type: ignore
 from swagger_server.utilities.manage_exception import ManageException
 from swagger_server.service import service
 from connexion import request
 
 logger = logging.getLogger(__name__)
 
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
 # 立入り状態取得
-def status_get(port=None, _datetime=None):  # noqa: E501
+def status_get(port=None, _datetime=None, cursor=None, limit=None):  # noqa: E501
     """立入り状態取得API
 
-    立入り状態の情報（テキストデータ）を取得するためのAPI。立ち入り状態を最大10件返却する。 # noqa: E501
+    立入り状態の情報（テキストデータ）を取得するためのAPI。立ち入り状態を新しい順に返却する。 # noqa: E501
+    続きがある場合はX-Next-Cursorヘッダーに次ページのカーソルを返却する。
 
     :param port: ドローンポートのID。指定したドローンポートの立ち入り状態を返却する。
     :type port: str
     :param _datetime: 立ち入り検知の日時。指定した日時より新しいデータを返す。
     :type _datetime: str
+    :param cursor: 前ページのX-Next-Cursorヘッダーの値。指定した場合は続きのデータを返す。
+    :type cursor: str
+    :param limit: 取得件数。省略時は設定ファイルのmax_count件。
+    :type limit: int
 
     :rtype: List[StatusResponse]
     """
@@ -27,6 +34,8 @@ def status_get(port=None, _datetime=None):  # noqa: E501
 
     logger.debug("status_get(): port : " + str(port))
     logger.debug("status_get(): _datetime : " + str(_datetime))
+    logger.debug("status_get(): cursor : " + str(cursor))
+    logger.debug("status_get(): limit : " + str(limit))
 
     if _datetime:
         try:
@@ -35,9 +44,17 @@ def status_get(port=None, _datetime=None):  # noqa: E501
             logger.exception("Invalid datetime format.")
             raise ManageException("Invalid datetime format.", 400)
     
-    status = service.status_get_data(port, _datetime)
-    
-    response = make_response(jsonify(status))
+    if service.status_json_fast_path_enabled():
+        # PostgreSQLで組み立てたJSON文字列をそのままレスポンスとする
+        body, next_cursor = service.status_get_json(port, _datetime, cursor, limit)
+        response = make_response(body)
+        response.headers['Content-Type'] = 'application/json'
+    else:
+        status, next_cursor = service.status_get_data(port, _datetime, cursor, limit)
+        response = make_response(jsonify(status))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     if 'Server' in response.headers:
         del response.headers['Server']
@@ -56,10 +73,145 @@ def status_get(port=None, _datetime=None):  # noqa: E501
     return response
 
 
+
+# 最新の立入り状態取得
+def status_latest_get():  # noqa: E501
+    """最新立入り状態取得API
+
+    全ドローンポートの最新の立入り状態を取得するためのAPI # noqa: E501
+
+    :rtype: List[StatusResponse]
+    """
+    logger.info("Get Latest Status API start.")
+
+    status = service.status_latest_get_data()
+
+    response = make_response(jsonify(status))
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    if 'Transfer-Encoding' in response.headers:
+        del response.headers['Transfer-Encoding']
+
+    logger.debug("status_latest_get(): response status code : " + str(response.status_code))
+    logger.debug("status_latest_get(): response headers : " + str(response.headers))
+    logger.debug("status_latest_get(): response data : " + str(response.data))
+
+    logger.info("Get Latest Status API end.")
+    return response
+
+
+# 立入り状態の集計取得
+def status_stats_get(port=None, bucket=None, _from=None, to=None):  # noqa: E501
+    """立入り状態集計取得API
+
+    ドローンポートごとの立入り状態・イベントの件数を分・時・日単位で取得するためのAPI # noqa: E501
+
+    :param port: ドローンポートのID。指定したドローンポートの集計を返却する。
+    :type port: str
+    :param bucket: 集計単位(minute/hour/day)。省略時はhour。
+    :type bucket: str
+    :param _from: 開始日時。省略時は終了日時の24単位前。
+    :type _from: str
+    :param to: 終了日時。省略時は現在日時。
+    :type to: str
+
+    :rtype: List[StatusStatsResponse]
+    """
+    logger.info("Get Status Stats API start.")
+
+    # クエリパラメタの fromは予約語であるため_fromに設定する
+    _from = request.args.get('from', None)
+
+    logger.debug("status_stats_get(): port : " + str(port))
+    logger.debug("status_stats_get(): bucket : " + str(bucket))
+    logger.debug("status_stats_get(): _from : " + str(_from))
+    logger.debug("status_stats_get(): to : " + str(to))
+
+    try:
+        if _from:
+            _from = util.deserialize_datetime(_from)
+        if to:
+            to = util.deserialize_datetime(to)
+    except ValueError as e:
+        logger.exception("Invalid datetime format.")
+        raise ManageException("Invalid datetime format.", 400)
+
+    stats = service.status_stats_get_data(port, bucket, _from or None, to or None)
+
+    response = make_response(jsonify(stats))
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    if 'Transfer-Encoding' in response.headers:
+        del response.headers['Transfer-Encoding']
+
+    logger.debug("status_stats_get(): response status code : " + str(response.status_code))
+    logger.debug("status_stats_get(): response headers : " + str(response.headers))
+    logger.debug("status_stats_get(): response data : " + str(response.data))
+
+    logger.info("Get Status Stats API end.")
+    return response
+
+
+# 立入り状態エクスポート
+def status_export_get(port=None, _datetime=None):  # noqa: E501
+    """立入り状態エクスポートAPI
+
+    立入り状態の履歴を件数の上限なくNDJSON形式で取得するためのAPI # noqa: E501
+
+    :param port: ドローンポートのID。指定したドローンポートの立ち入り状態を返却する。
+    :type port: str
+    :param _datetime: 立ち入り検知の日時。指定した日時以降のデータを返す。
+    :type _datetime: str
+
+    :rtype: str
+    """
+    logger.info("Export Status API start.")
+
+    # クエリパラメタの datetimeは予約語であるため_datetimeに設定する
+    _datetime = request.args.get('datetime', None)
+
+    logger.debug("status_export_get(): port : " + str(port))
+    logger.debug("status_export_get(): _datetime : " + str(_datetime))
+
+    if _datetime:
+        try:
+            _datetime = util.deserialize_datetime(_datetime)
+        except ValueError as e:
+            logger.exception("Invalid datetime format.")
+            raise ManageException("Invalid datetime format.", 400)
+
+    lines = service.status_export_data(port, _datetime)
+
+    response = Response(lines, mimetype='application/x-ndjson')
+    # nginxでバッファリングせずにそのまま転送させる
+    response.headers['X-Accel-Buffering'] = 'no'
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    logger.debug("status_export_get(): response headers : " + str(response.headers))
+
+    logger.info("Export Status API end.")
+    return response
+
 def status_post(body):  # noqa: E501
     """立入り状態通知API
 
     立入り状態の情報（テキストデータ）を通知するためのAPI # noqa: E501
+    書き込みキューが有効な場合は、キューへの追加後に202を返却する。
 
     :param body: 通知データ
     :type body: dict | bytes
@@ -83,9 +235,13 @@ def status_post(body):  # noqa: E501
         logger.exception("Invalid datetime format.")
         raise ManageException("Invalid datetime format.", 400)
     
-    service.status_post_data(port, _datetime, detect, events, report_id)
-
-    response = make_response('', 204)
+    if service.ingest_queue_enabled():
+        # 書き込みキューに追加した時点で受付済みとし、DBへの登録は書き込みスレッドで行う
+        service.status_enqueue(port, _datetime, detect, events, report_id)
+        response = make_response('', 202)
+    else:
+        service.status_post_data(port, _datetime, detect, events, report_id)
+        response = make_response('', 204)
     
     if 'Server' in response.headers:
         del response.headers['Server']
@@ -102,3 +258,52 @@ def status_post(body):  # noqa: E501
     logger.info("Post Status API end.")
     return response
 
+
+def status_batch_post(body):  # noqa: E501
+    """立入り状態一括通知API
+
+    複数の立入り状態の情報（テキストデータ）をまとめて通知するためのAPI # noqa: E501
+
+    :param body: 通知データのリスト
+    :type body: list | bytes
+
+    :rtype: List[StatusBatchResult]
+    """
+    logger.info("Post Status Batch API start.")
+
+    logger.debug("status_batch_post(): count : " + str(len(body)))
+
+    # リクエストデータ処理
+    statuses = []
+    for item in body:
+        status = {
+            'port': item.get('port'),
+            'detect': item.get('detect'),
+            'event': item.get('event'),
+            'report_id': item.get('report_id')
+        }
+        try:
+            status['datetime'] = util.deserialize_datetime(item.get('datetime'))
+        except (ValueError, TypeError) as e:
+            logger.warning("Invalid datetime format. (datetime: " + str(item.get('datetime')) + ")")
+            status['error'] = ("Invalid datetime format.", 400)
+        statuses.append(status)
+
+    results = service.status_post_batch_data(statuses)
+
+    response = make_response(jsonify(results), 200)
+
+    if 'Server' in response.headers:
+        del response.headers['Server']
+
+    if 'Date' in response.headers:
+        del response.headers['Date']
+
+    if 'Transfer-Encoding' in response.headers:
+        del response.headers['Transfer-Encoding']
+
+    logger.debug("status_batch_post(): response status code : " + str(response.status_code))
+    logger.debug("status_batch_post(): response headers : " + str(response.headers))
+
+    logger.info("Post Status Batch API end.")
+    return response
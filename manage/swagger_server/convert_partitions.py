@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+立入り状態テーブル・イベントテーブルの日時でのレンジパーティションテーブルへの変換
+
+両テーブルを排他ロックし、全件を1トランザクションでコピーするため、manageを停止した状態で実行する。
+変換後にpartition_enabledを有効にしてmanageを起動すると、パーティションの事前作成・保持期間切れの削除を
+バックグラウンドで行う（保持期間を過ぎた既存データは起動後のメンテナンスで削除・デタッチされる）。
+
+変換による主な変更:
+  - 主キーは(id, datetime)となる（idの一意性は採番用シーケンスで保つ）
+  - イベントの立入り状態への外部キーは(ent_stat_id, datetime)となる（イベントの日時は立入り状態の日時に揃える）
+  - datetimeは必須となる（日時が未設定の立入り状態がある場合は変換しない）
+
+  # manageを停止して変換する
+  docker compose stop manage
+  docker compose run --rm manage -m swagger_server.convert_partitions
+  docker compose start manage
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+__LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s :%(message)s'
+logging.basicConfig(format=__LOG_FORMAT, level=logging.INFO)
+
+
+def main():
+    from swagger_server.service import service
+    from swagger_server.utilities import partition
+
+    config = service.load_config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--interval", choices=(partition.INTERVAL_DAILY, partition.INTERVAL_MONTHLY),
+        default=config.get(service.CONFIG_KEY_PARTITION_INTERVAL, service.DEFAULT_PARTITION_INTERVAL),
+        help="パーティション期間（既定: 設定ファイルのpartition_interval）")
+    parser.add_argument(
+        "--premake", type=int,
+        default=config.get(service.CONFIG_KEY_PARTITION_PREMAKE, service.DEFAULT_PARTITION_PREMAKE),
+        help="事前に作成する将来のパーティション数（既定: 設定ファイルのpartition_premake）")
+    args = parser.parse_args()
+
+    conn = service.get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (partition.ADVISORY_LOCK_KEY,))
+            locked = cursor.fetchone()[0]
+        conn.commit()
+        if not locked:
+            print("Another process is maintaining partitions. Stop manage and retry.")
+            sys.exit(1)
+        try:
+            if partition.convert_to_partitioned(conn, args.interval, args.premake):
+                print("Status tables converted to partitioned tables.")
+            else:
+                print("Status tables are already partitioned.")
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+-- migrate:no-transaction
+--立入り状態のポート・日時検索用インデックス
+--既存環境でもテーブルをロックしないようCONCURRENTLYで作成する。
+--作成途中で失敗した場合に残る無効なインデックスは再適用時に削除して作り直す。
+DROP INDEX CONCURRENTLY IF EXISTS entry_status_information_port_datetime_idx;
+CREATE INDEX CONCURRENTLY entry_status_information_port_datetime_idx
+	ON "entry_status_information" (port, datetime DESC);
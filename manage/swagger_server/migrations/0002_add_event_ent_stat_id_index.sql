@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+--イベントの立入り状態ID結合用インデックス
+DROP INDEX CONCURRENTLY IF EXISTS event_information_ent_stat_id_idx;
+CREATE INDEX CONCURRENTLY event_information_ent_stat_id_idx
+	ON "event_information" (ent_stat_id);
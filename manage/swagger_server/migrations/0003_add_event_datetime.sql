@@ -0,0 +1,3 @@
+--イベントに立入り状態の日時を保持する（日時でのパーティショニング用）
+--既存行はNULLのまま（パーティション変換時に立入り状態の日時を設定する）
+ALTER TABLE "event_information" ADD COLUMN IF NOT EXISTS datetime TIMESTAMP WITH TIME ZONE NULL;
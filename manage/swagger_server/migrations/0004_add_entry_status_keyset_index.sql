@@ -0,0 +1,8 @@
+-- migrate:no-transaction
+--キーセットページング用インデックス
+--ORDER BY datetime DESC, id DESC と (datetime, id) < (x, y) の条件を後方スキャンで処理する。
+--(port, datetime DESC)インデックスは本インデックスで代替できるため削除する。
+DROP INDEX CONCURRENTLY IF EXISTS entry_status_information_port_datetime_id_idx;
+CREATE INDEX CONCURRENTLY entry_status_information_port_datetime_id_idx
+	ON "entry_status_information" (port, datetime, id);
+DROP INDEX CONCURRENTLY IF EXISTS entry_status_information_port_datetime_idx;
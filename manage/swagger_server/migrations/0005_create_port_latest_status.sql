@@ -0,0 +1,15 @@
+--ドローンポートごとの最新の立入り状態
+--立入り状態の登録と同一トランザクションで更新する。
+CREATE TABLE IF NOT EXISTS "port_latest_status" (
+	port VARCHAR(16) NOT NULL,
+	entry_status_id INTEGER NOT NULL,
+	datetime TIMESTAMP WITH TIME ZONE NULL,
+	detect BOOLEAN NULL,
+	events JSONB NOT NULL DEFAULT '[]'::jsonb,
+	report_endpoint VARCHAR(256) NULL,
+	updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+	CONSTRAINT port_latest_status_pkey PRIMARY KEY (port)
+);
+
+--既存の立入り状態からの初期データは、起動後にバックグラウンドで作成する（BackfillRunnerのport_latest_status）。
+--作成の完了までは、最新の立入り状態を立入り状態の履歴から取得する。
@@ -0,0 +1,5 @@
+--イベントの位置情報を数値の緯度・経度で保持する（範囲検索用）
+--列の追加のみ行い、既存行の緯度・経度・日時の設定は起動後にバックグラウンドで少しずつ行う（utilities/backfill.py）。
+--NULL許容・デフォルト無しの列追加のため、テーブルの書き換えは発生しない。
+ALTER TABLE "event_information" ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION NULL;
+ALTER TABLE "event_information" ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION NULL;
@@ -0,0 +1,11 @@
+-- migrate:no-transaction
+--イベントの範囲検索用インデックス
+--point(経度, 緯度) <@ box(...) の条件をGiSTインデックスで処理する。
+DROP INDEX CONCURRENTLY IF EXISTS event_information_location_idx;
+CREATE INDEX CONCURRENTLY event_information_location_idx
+	ON "event_information" USING gist (point(longitude, latitude))
+	WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+--日時での絞り込み・並び替え用インデックス
+DROP INDEX CONCURRENTLY IF EXISTS event_information_datetime_idx;
+CREATE INDEX CONCURRENTLY event_information_datetime_idx
+	ON "event_information" (datetime);
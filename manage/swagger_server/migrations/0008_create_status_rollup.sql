@@ -0,0 +1,19 @@
+--ドローンポートごとの立入り状態・イベントの集計（分・時・日単位）
+--立入り状態の登録と同一トランザクションで加算する。
+--object_typeが空文字の行は立入り状態の件数、それ以外はイベント（障害物の種別）の件数とする。
+--集計単位の開始日時はUTCで切り捨てる。
+CREATE TABLE IF NOT EXISTS "status_rollup" (
+	port VARCHAR(16) NOT NULL,
+	bucket VARCHAR(8) NOT NULL,
+	bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+	object_type VARCHAR(16) NOT NULL DEFAULT '',
+	detect BOOLEAN NOT NULL,
+	count BIGINT NOT NULL DEFAULT 0,
+	CONSTRAINT status_rollup_pkey PRIMARY KEY (port, bucket, bucket_start, object_type, detect)
+);
+--ポート未指定での期間指定取得用
+CREATE INDEX IF NOT EXISTS status_rollup_bucket_start_idx
+	ON "status_rollup" (bucket, bucket_start);
+
+--既存の立入り状態・イベントの集計は、起動後にバックグラウンドで加算する（BackfillRunnerのstatus_rollup）。
+--起動時に全履歴を集計すると、履歴の件数に比例して起動が遅れるため、ここではテーブルのみ作成する。
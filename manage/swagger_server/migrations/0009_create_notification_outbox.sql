@@ -0,0 +1,21 @@
+--状態通知機能への通知のアウトボックス
+--立入り状態の登録と同一トランザクションで追加し、バックグラウンドの送信スレッドが送信済みにする。
+CREATE TABLE IF NOT EXISTS "notification_outbox" (
+	id BIGSERIAL NOT NULL,
+	port VARCHAR(16) NULL,
+	payload JSONB NOT NULL,
+	created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+	attempts INTEGER NOT NULL DEFAULT 0,
+	next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+	delivered_at TIMESTAMP WITH TIME ZONE NULL,
+	last_error TEXT NULL,
+	CONSTRAINT notification_outbox_pkey PRIMARY KEY (id)
+);
+--未送信の通知の取り出し用インデックス
+CREATE INDEX IF NOT EXISTS notification_outbox_pending_idx
+	ON "notification_outbox" (next_attempt_at, id)
+	WHERE delivered_at IS NULL;
+--送信済みの通知の削除用インデックス
+CREATE INDEX IF NOT EXISTS notification_outbox_delivered_idx
+	ON "notification_outbox" (delivered_at)
+	WHERE delivered_at IS NOT NULL;
@@ -0,0 +1,7 @@
+-- migrate:no-transaction
+--ドローンポートごとの未送信の通知の取り出し用インデックス
+--DISTINCT ON (port) ... ORDER BY port, id で各ポートの先頭の通知を取得する。
+DROP INDEX CONCURRENTLY IF EXISTS notification_outbox_port_pending_idx;
+CREATE INDEX CONCURRENTLY notification_outbox_port_pending_idx
+	ON "notification_outbox" ((COALESCE(port, '')), id)
+	WHERE delivered_at IS NULL;
@@ -0,0 +1,7 @@
+--既存データの補完（バックフィル）の完了記録
+--起動後にバックグラウンドで実行し、完了したものは次回起動時に実行しない。
+CREATE TABLE IF NOT EXISTS "data_backfill" (
+	name VARCHAR(64) NOT NULL,
+	completed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+	CONSTRAINT data_backfill_pkey PRIMARY KEY (name)
+);
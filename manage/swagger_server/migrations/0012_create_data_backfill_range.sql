@@ -0,0 +1,18 @@
+--再開可能な既存データの補完の対象範囲と補完済みの位置
+--集計は登録時に加算するため、このマイグレーション時点の最大idまでを補完対象とし、
+--補完済みの位置を範囲ごとの加算と同じトランザクションで記録して、再開時に重複して加算しない。
+CREATE TABLE IF NOT EXISTS "data_backfill_range" (
+	name VARCHAR(64) NOT NULL,
+	max_id INTEGER NULL,
+	position INTEGER NULL,
+	CONSTRAINT data_backfill_range_pkey PRIMARY KEY (name)
+);
+
+INSERT INTO "data_backfill_range" (name, max_id)
+SELECT 'status_rollup', max(id) FROM "entry_status_information"
+ON CONFLICT (name) DO NOTHING;
+
+--以前のマイグレーションで初期データを作成済み、または登録時の加算が始まっている場合は補完しない
+INSERT INTO "data_backfill" (name)
+SELECT 'status_rollup' WHERE EXISTS (SELECT 1 FROM "status_rollup")
+ON CONFLICT (name) DO NOTHING;
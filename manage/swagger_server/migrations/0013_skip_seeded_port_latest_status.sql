@@ -0,0 +1,5 @@
+--以前のマイグレーションで初期データを作成済み、または登録時の更新が始まっている場合は
+--最新の立入り状態の初期データを補完しない
+INSERT INTO "data_backfill" (name)
+SELECT 'port_latest_status' WHERE EXISTS (SELECT 1 FROM "port_latest_status")
+ON CONFLICT (name) DO NOTHING;
@@ -1,12 +1,31 @@
 import logging
 import os
+import threading
+import uuid
+import base64
+import datetime as dt
 import psycopg2
 import json
-import boto3
-import requests
 
+from contextlib import contextmanager
+from functools import partial
+from psycopg2.extensions import parse_dsn
+from psycopg2.extras import execute_values, Json
 from swagger_server import util
 from swagger_server.utilities.manage_exception import ManageException
+from swagger_server.utilities.db_pool import ConnectionPool, CursorStream
+from swagger_server.utilities.db_router import Replica, ReplicaRouter
+from swagger_server.utilities import migration
+from swagger_server.utilities import partition
+from swagger_server.utilities.backfill import BackfillRunner, BACKFILL_PORT_LATEST_STATUS
+from swagger_server.utilities.result_cache import ResultCache
+from swagger_server.utilities.ingest_queue import IngestQueue, IngestWriter
+from swagger_server.utilities import outbox
+from swagger_server.utilities import s3_client
+from swagger_server.utilities import state_tracker
+from swagger_server.utilities.prepared import PreparingConnection, registry as prepared_statements
+from service_common import config_loader, http_client
+from service_common.config_loader import ConfigLoader
 from requests.exceptions import Timeout
 from urllib.parse import urlparse
 
@@ -14,8 +33,133 @@ logger = logging.getLogger(__name__)
 
 CONFIG_PATH = "/usr/src/app/swagger_server/configs/config.json"
 CONFIG_KEY_MAX_COUNT = "max_count"
+CONFIG_KEY_MAX_LIMIT = "max_limit"
+CONFIG_KEY_STATUS_CACHE_ENABLED = "status_cache_enabled"
+CONFIG_KEY_STATUS_CACHE_SIZE = "status_cache_size"
+CONFIG_KEY_STATUS_CACHE_TTL = "status_cache_ttl"
+CONFIG_KEY_STATUS_CACHE_REPLICA_TTL = "status_cache_replica_ttl"
+CONFIG_KEY_STATUS_JSON_FAST_PATH = "status_json_fast_path"
+CONFIG_KEY_EXPORT_FETCH_SIZE = "export_fetch_size"
+CONFIG_KEY_STATS_MAX_POINTS = "stats_max_points"
 CONFIG_KEY_BUCKET_NAME = "bucket_name"
 CONFIG_KEY_ENDPOINT_URL = "endpoint_url"
+CONFIG_KEY_DB_POOL_MIN_SIZE = "db_pool_min_size"
+CONFIG_KEY_DB_POOL_MAX_SIZE = "db_pool_max_size"
+CONFIG_KEY_DB_POOL_IDLE_TIMEOUT = "db_pool_idle_timeout"
+CONFIG_KEY_DB_POOL_WAIT_TIMEOUT = "db_pool_wait_timeout"
+CONFIG_KEY_DB_POOL_CHECK_INTERVAL = "db_pool_check_interval"
+CONFIG_KEY_DB_READ_REPLICAS = "db_read_replicas"
+CONFIG_KEY_DB_REPLICA_MAX_LAG = "db_replica_max_lag"
+CONFIG_KEY_DB_REPLICA_CHECK_INTERVAL = "db_replica_check_interval"
+CONFIG_KEY_DB_REPLICA_CONNECT_TIMEOUT = "db_replica_connect_timeout"
+CONFIG_KEY_BATCH_MAX_COUNT = "batch_max_count"
+CONFIG_KEY_MIGRATE_ON_STARTUP = "migrate_on_startup"
+CONFIG_KEY_PARTITION_ENABLED = "partition_enabled"
+CONFIG_KEY_PARTITION_INTERVAL = "partition_interval"
+CONFIG_KEY_PARTITION_PREMAKE = "partition_premake"
+CONFIG_KEY_PARTITION_RETENTION_DAYS = "partition_retention_days"
+CONFIG_KEY_PARTITION_RETENTION_ACTION = "partition_retention_action"
+CONFIG_KEY_PARTITION_CHECK_INTERVAL = "partition_check_interval"
+CONFIG_KEY_BACKFILL_BATCH_SIZE = "backfill_batch_size"
+CONFIG_KEY_BACKFILL_PAUSE = "backfill_pause"
+CONFIG_KEY_INGEST_QUEUE_ENABLED = "ingest_queue_enabled"
+CONFIG_KEY_INGEST_QUEUE_PATH = "ingest_queue_path"
+CONFIG_KEY_INGEST_WRITER_COUNT = "ingest_writer_count"
+CONFIG_KEY_INGEST_BATCH_SIZE = "ingest_batch_size"
+CONFIG_KEY_INGEST_FLUSH_INTERVAL = "ingest_flush_interval"
+CONFIG_KEY_INGEST_MAX_ATTEMPTS = "ingest_max_attempts"
+CONFIG_KEY_INGEST_LEASE_TIMEOUT = "ingest_lease_timeout"
+CONFIG_KEY_OUTBOX_DISPATCHER_COUNT = "outbox_dispatcher_count"
+CONFIG_KEY_OUTBOX_BATCH_SIZE = "outbox_batch_size"
+CONFIG_KEY_OUTBOX_POLL_INTERVAL = "outbox_poll_interval"
+CONFIG_KEY_OUTBOX_RETRY_BASE = "outbox_retry_base"
+CONFIG_KEY_OUTBOX_MAX_BACKOFF = "outbox_max_backoff"
+CONFIG_KEY_OUTBOX_RETENTION_HOURS = "outbox_retention_hours"
+CONFIG_KEY_HTTP_POOL_CONNECTIONS = "http_pool_connections"
+CONFIG_KEY_HTTP_POOL_MAXSIZE = "http_pool_maxsize"
+CONFIG_KEY_HTTP_CONNECT_TIMEOUT = "http_connect_timeout"
+CONFIG_KEY_HTTP_READ_TIMEOUT = "http_read_timeout"
+CONFIG_KEY_HTTP_RETRY_TOTAL = "http_retry_total"
+CONFIG_KEY_HTTP_RETRY_BACKOFF = "http_retry_backoff"
+CONFIG_KEY_HTTP_RETRY_STATUS = "http_retry_status"
+CONFIG_KEY_HTTP_RETRY_POST = "http_retry_post"
+CONFIG_KEY_STATE_SUPPRESSION_ENABLED = "state_suppression_enabled"
+CONFIG_KEY_STATE_SUPPRESSION_STORE_UNCHANGED = "state_suppression_store_unchanged"
+CONFIG_KEY_CONFIG_CHECK_INTERVAL = "config_check_interval"
+CONFIG_KEY_S3_ENDPOINT_URL = "s3_endpoint_url"
+CONFIG_KEY_S3_REGION_NAME = "s3_region_name"
+CONFIG_KEY_S3_MAX_POOL_CONNECTIONS = "s3_max_pool_connections"
+CONFIG_KEY_S3_CONNECT_TIMEOUT = "s3_connect_timeout"
+CONFIG_KEY_S3_READ_TIMEOUT = "s3_read_timeout"
+CONFIG_KEY_S3_RETRY_MODE = "s3_retry_mode"
+CONFIG_KEY_S3_MAX_ATTEMPTS = "s3_max_attempts"
+CONFIG_KEY_S3_ADDRESSING_STYLE = "s3_addressing_style"
+
+# 設定値の型（読み込み時に検証し、不正な場合は直前の設定を使用する）
+CONFIG_SCHEMA = {
+    CONFIG_KEY_MAX_COUNT: config_loader.INT,
+    CONFIG_KEY_MAX_LIMIT: config_loader.INT,
+    CONFIG_KEY_STATUS_CACHE_ENABLED: config_loader.BOOL,
+    CONFIG_KEY_STATUS_CACHE_SIZE: config_loader.INT,
+    CONFIG_KEY_STATUS_CACHE_TTL: config_loader.NUMBER,
+    CONFIG_KEY_STATUS_CACHE_REPLICA_TTL: config_loader.NUMBER,
+    CONFIG_KEY_STATUS_JSON_FAST_PATH: config_loader.BOOL,
+    CONFIG_KEY_EXPORT_FETCH_SIZE: config_loader.INT,
+    CONFIG_KEY_STATS_MAX_POINTS: config_loader.INT,
+    CONFIG_KEY_BUCKET_NAME: config_loader.STR,
+    CONFIG_KEY_ENDPOINT_URL: config_loader.STR,
+    CONFIG_KEY_DB_POOL_MIN_SIZE: config_loader.INT,
+    CONFIG_KEY_DB_POOL_MAX_SIZE: config_loader.INT,
+    CONFIG_KEY_DB_POOL_IDLE_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_DB_POOL_WAIT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_DB_POOL_CHECK_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_DB_READ_REPLICAS: config_loader.LIST,
+    CONFIG_KEY_DB_REPLICA_MAX_LAG: config_loader.NUMBER,
+    CONFIG_KEY_DB_REPLICA_CHECK_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_DB_REPLICA_CONNECT_TIMEOUT: config_loader.INT,
+    CONFIG_KEY_BATCH_MAX_COUNT: config_loader.INT,
+    CONFIG_KEY_MIGRATE_ON_STARTUP: config_loader.BOOL,
+    CONFIG_KEY_PARTITION_ENABLED: config_loader.BOOL,
+    CONFIG_KEY_PARTITION_INTERVAL: config_loader.STR,
+    CONFIG_KEY_PARTITION_PREMAKE: config_loader.INT,
+    CONFIG_KEY_PARTITION_RETENTION_DAYS: config_loader.INT,
+    CONFIG_KEY_PARTITION_RETENTION_ACTION: config_loader.STR,
+    CONFIG_KEY_PARTITION_CHECK_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_BACKFILL_BATCH_SIZE: config_loader.INT,
+    CONFIG_KEY_BACKFILL_PAUSE: config_loader.NUMBER,
+    CONFIG_KEY_INGEST_QUEUE_ENABLED: config_loader.BOOL,
+    CONFIG_KEY_INGEST_QUEUE_PATH: config_loader.STR,
+    CONFIG_KEY_INGEST_WRITER_COUNT: config_loader.INT,
+    CONFIG_KEY_INGEST_BATCH_SIZE: config_loader.INT,
+    CONFIG_KEY_INGEST_FLUSH_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_INGEST_MAX_ATTEMPTS: config_loader.INT,
+    CONFIG_KEY_INGEST_LEASE_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_OUTBOX_DISPATCHER_COUNT: config_loader.INT,
+    CONFIG_KEY_OUTBOX_BATCH_SIZE: config_loader.INT,
+    CONFIG_KEY_OUTBOX_POLL_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_OUTBOX_RETRY_BASE: config_loader.NUMBER,
+    CONFIG_KEY_OUTBOX_MAX_BACKOFF: config_loader.NUMBER,
+    CONFIG_KEY_OUTBOX_RETENTION_HOURS: config_loader.NUMBER,
+    CONFIG_KEY_HTTP_POOL_CONNECTIONS: config_loader.INT,
+    CONFIG_KEY_HTTP_POOL_MAXSIZE: config_loader.INT,
+    CONFIG_KEY_HTTP_CONNECT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_HTTP_READ_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_HTTP_RETRY_TOTAL: config_loader.INT,
+    CONFIG_KEY_HTTP_RETRY_BACKOFF: config_loader.NUMBER,
+    CONFIG_KEY_HTTP_RETRY_STATUS: config_loader.LIST,
+    CONFIG_KEY_HTTP_RETRY_POST: config_loader.BOOL,
+    CONFIG_KEY_STATE_SUPPRESSION_ENABLED: config_loader.BOOL,
+    CONFIG_KEY_STATE_SUPPRESSION_STORE_UNCHANGED: config_loader.BOOL,
+    CONFIG_KEY_CONFIG_CHECK_INTERVAL: config_loader.NUMBER,
+    CONFIG_KEY_S3_ENDPOINT_URL: config_loader.STR,
+    CONFIG_KEY_S3_REGION_NAME: config_loader.STR,
+    CONFIG_KEY_S3_MAX_POOL_CONNECTIONS: config_loader.INT,
+    CONFIG_KEY_S3_CONNECT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_S3_READ_TIMEOUT: config_loader.NUMBER,
+    CONFIG_KEY_S3_RETRY_MODE: config_loader.STR,
+    CONFIG_KEY_S3_MAX_ATTEMPTS: config_loader.INT,
+    CONFIG_KEY_S3_ADDRESSING_STYLE: config_loader.STR,
+}
 
 ENV_KEY_DB_HOST = "POSTGRES_HOST"
 ENV_KEY_DB_PORT = "POSTGRES_PORT"
@@ -26,25 +170,193 @@ ENV_KEY_DB_PASS = "POSTGRES_PASSWORD"
 API_PREFIX = "/api/v1"
 REPORT_API_PATH = API_PREFIX + '/report'
 DEFAULT_MAX_COUNT = 10
+DEFAULT_MAX_LIMIT = 1000
+DEFAULT_STATUS_CACHE_SIZE = 1024
+DEFAULT_STATUS_CACHE_TTL = 1.0
+DEFAULT_STATUS_CACHE_REPLICA_TTL = 0.5
+DEFAULT_EXPORT_FETCH_SIZE = 1000
+DEFAULT_STATS_MAX_POINTS = 10000
+DEFAULT_DB_POOL_MIN_SIZE = 1
+DEFAULT_DB_POOL_MAX_SIZE = 10
+DEFAULT_DB_POOL_IDLE_TIMEOUT = 300
+DEFAULT_DB_POOL_WAIT_TIMEOUT = 30
+DEFAULT_DB_POOL_CHECK_INTERVAL = 30
+DEFAULT_DB_REPLICA_MAX_LAG = 5
+DEFAULT_DB_REPLICA_CHECK_INTERVAL = 5
+DEFAULT_DB_REPLICA_CONNECT_TIMEOUT = 3
+DEFAULT_BATCH_MAX_COUNT = 10000
+DEFAULT_PARTITION_INTERVAL = partition.INTERVAL_DAILY
+DEFAULT_PARTITION_PREMAKE = 3
+DEFAULT_PARTITION_RETENTION_DAYS = 0
+DEFAULT_PARTITION_RETENTION_ACTION = partition.RETENTION_ACTION_DROP
+DEFAULT_PARTITION_CHECK_INTERVAL = 3600
+DEFAULT_BACKFILL_BATCH_SIZE = 1000
+DEFAULT_BACKFILL_PAUSE = 0.1
+DEFAULT_INGEST_QUEUE_PATH = "/usr/src/app/data/ingest_queue.db"
+DEFAULT_INGEST_WRITER_COUNT = 2
+DEFAULT_INGEST_BATCH_SIZE = 500
+DEFAULT_INGEST_FLUSH_INTERVAL = 0.2
+DEFAULT_INGEST_MAX_ATTEMPTS = 10
+DEFAULT_INGEST_LEASE_TIMEOUT = 60
+DEFAULT_OUTBOX_DISPATCHER_COUNT = 2
+DEFAULT_OUTBOX_BATCH_SIZE = 100
+DEFAULT_OUTBOX_POLL_INTERVAL = 0.5
+DEFAULT_OUTBOX_RETRY_BASE = 1.0
+DEFAULT_OUTBOX_MAX_BACKOFF = 300
+DEFAULT_OUTBOX_RETENTION_HOURS = 24
+# 複数行INSERTで1文にまとめる最大行数
+INSERT_PAGE_SIZE = 1000
 
 NOTIFY_API_URL = 'http://notify:8080' + API_PREFIX + '/status'
+NOTIFY_BATCH_API_URL = NOTIFY_API_URL + '/batch'
+
+# 立入り状態の登録で使用するプリペアドステートメント
+# イベント等の複数行はunnestで配列を展開し、件数によらず同一のステートメントで登録する
+STMT_REPORT_ENDPOINT_GET_MANY = "report_endpoint_get_many"
+STMT_STATUS_INSERT = "status_insert"
+STMT_STATUS_INSERT_MANY = "status_insert_many"
+STMT_STATUS_ID_RESERVE = "status_id_reserve"
+STMT_EVENT_INSERT = "event_insert"
+STMT_ROLLUP_UPDATE = "rollup_update"
+STMT_OUTBOX_INSERT = "outbox_insert"
+
+SQL_REPORT_ENDPOINT_GET_MANY = """
+    SELECT report_id::text, endpoint FROM REPORT WHERE report_id = ANY(%s::uuid[])
+"""
+prepared_statements.register(STMT_REPORT_ENDPOINT_GET_MANY, SQL_REPORT_ENDPOINT_GET_MANY)
+prepared_statements.register(STMT_STATUS_INSERT, """
+    INSERT INTO ENTRY_STATUS_INFORMATION (port, datetime, detect, report_id)
+    VALUES (%s::varchar, %s::timestamptz, %s::boolean, %s::uuid)
+    RETURNING id
+""")
+prepared_statements.register(STMT_STATUS_INSERT_MANY, """
+    INSERT INTO ENTRY_STATUS_INFORMATION (id, port, datetime, detect, report_id)
+    SELECT * FROM unnest(%s::integer[], %s::varchar[], %s::timestamptz[], %s::boolean[], %s::uuid[])
+""")
+prepared_statements.register(STMT_STATUS_ID_RESERVE, """
+    SELECT nextval(pg_get_serial_sequence('entry_status_information', 'id'))
+    FROM generate_series(1, %s::integer)
+""")
+prepared_statements.register(STMT_EVENT_INSERT, """
+    INSERT INTO EVENT_INFORMATION (ent_stat_id, datetime, object_id, object_type, detect, location, latitude, longitude)
+    SELECT * FROM unnest(%s::integer[], %s::timestamptz[], %s::varchar[], %s::varchar[], %s::boolean[], %s::varchar[],
+                         %s::float8[], %s::float8[])
+""")
+# 集計単位ごとに件数をまとめて加算する（行ロックの順序を揃えるため主キー順に登録）
+prepared_statements.register(STMT_ROLLUP_UPDATE, """
+    INSERT INTO STATUS_ROLLUP AS SR (port, bucket, bucket_start, object_type, detect, count)
+    SELECT T.port, B.bucket, date_trunc(B.bucket, T.datetime AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           T.object_type, T.detect, count(*)
+    FROM unnest(%s::varchar[], %s::timestamptz[], %s::varchar[], %s::boolean[]) AS T(port, datetime, object_type, detect)
+    CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS B(bucket)
+    WHERE T.port IS NOT NULL AND T.datetime IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ORDER BY 1, 2, 3, 4, 5
+    ON CONFLICT (port, bucket, bucket_start, object_type, detect) DO UPDATE SET count = SR.count + EXCLUDED.count
+""")
+
+prepared_statements.register(STMT_OUTBOX_INSERT, """
+    INSERT INTO NOTIFICATION_OUTBOX (port, payload)
+    SELECT * FROM unnest(%s::varchar[], %s::jsonb[])
+""")
+
+# ドローンポートごとの最新の立入り状態を立入り状態の履歴から取得する
+# PORT_LATEST_STATUSの初期データの補完が完了するまで使用する（{condition}にポートの絞り込み条件を指定する）
+SQL_LATEST_STATUS_FROM_HISTORY = """
+    SELECT ES.port, ES.datetime, ES.detect,
+        COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', EV.object_id,
+                'type', EV.object_type,
+                'detect', EV.detect,
+                'location', EV.location
+            ) ORDER BY EV.id)
+            FROM EVENT_INFORMATION EV
+            WHERE EV.ent_stat_id = ES.id
+        ), '[]'::jsonb),
+        R.endpoint
+    FROM (
+        SELECT DISTINCT ON (port) id, port, datetime, detect, report_id
+        FROM ENTRY_STATUS_INFORMATION
+        WHERE port IS NOT NULL {condition}
+        ORDER BY port, datetime DESC NULLS LAST, id DESC
+    ) ES
+    LEFT OUTER JOIN REPORT R
+        ON ES.report_id = R.report_id
+    ORDER BY ES.port
+"""
+
+# 集計の単位と1単位の秒数
+STATS_BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+DEFAULT_STATS_BUCKET = "hour"
+
+# プロセス内で共有するDBコネクションプール
+_db_pool = None
+_db_pool_lock = threading.Lock()
+# 読み取り用レプリカのルーター（レプリカ未設定の場合はFalse）
+_replica_router = None
+# 立入り状態取得結果のキャッシュ（無効の場合はFalse）
+_status_cache = None
+_status_cache_lock = threading.Lock()
+# パーティションメンテナンス用スレッド
+_partition_maintainer = None
+# 既存データの補完用スレッド
+_backfill_runner = None
+# 最新の立入り状態の初期データの補完が完了したかどうか（完了を確認した後は再確認しない）
+_latest_status_seeded = False
+# 立入り状態の書き込みキュー（無効の場合はFalse）と書き込みスレッド
+_ingest_queue = None
+_ingest_queue_lock = threading.Lock()
+_ingest_writers = []
+# 通知のアウトボックスの送信スレッドと共有の統計情報
+_outbox_dispatchers = []
+_outbox_wakeup = threading.Event()
+_outbox_stats = {}
+_outbox_stats_lock = threading.Lock()
+# 状態通知機能への送信で共有するHTTPクライアント
+_http_client = None
+_http_client_lock = threading.Lock()
+# ドローンポートごとの最後の状態（状態変化の判定が無効の場合はFalse）
+_state_tracker = None
+_state_tracker_lock = threading.Lock()
+# レポートの取得・アップロードで共有するS3クライアント
+_s3_client = None
+_s3_client_lock = threading.Lock()
+# 設定ファイルの読み込み結果（更新時のみ再読み込みする）
+_config_loader = ConfigLoader(CONFIG_PATH, CONFIG_SCHEMA, check_interval_key=CONFIG_KEY_CONFIG_CHECK_INTERVAL)
 
 
 # DB接続
-def get_db_connection():
+def get_db_connection(dsn=None, connect_timeout=None):
     """
      データベース接続関数
      環境変数を利用してPostgreSQLに接続する
+     DSNを指定した場合はDSNの値を優先し、DSNに無い項目は環境変数の値を使用する（読み取り用レプリカ）。
     
+    :param dsn: 接続先のDSN
+    :type dsn: str
+    :param connect_timeout: 接続タイムアウト（秒）。DSNに指定がある場合はDSNの値を優先する
+    :type connect_timeout: int
     :return: DBコネクション
     
     """
     
-    host = os.getenv(ENV_KEY_DB_HOST)
-    port = os.getenv(ENV_KEY_DB_PORT)
-    dbname = os.getenv(ENV_KEY_DB_NAME)
-    user = os.getenv(ENV_KEY_DB_USER)
-    password = os.getenv(ENV_KEY_DB_PASS)
+    params = {
+        "host": os.getenv(ENV_KEY_DB_HOST),
+        "port": os.getenv(ENV_KEY_DB_PORT),
+        "dbname": os.getenv(ENV_KEY_DB_NAME),
+        "user": os.getenv(ENV_KEY_DB_USER),
+        "password": os.getenv(ENV_KEY_DB_PASS)
+    }
+    if connect_timeout:
+        params["connect_timeout"] = connect_timeout
+    if dsn:
+        params.update(parse_dsn(dsn))
+
+    host = params["host"]
+    port = params["port"]
+    dbname = params["dbname"]
+    user = params["user"]
     
     logger.debug("get_db_connection(): host : " + str(host))
     logger.debug("get_db_connection(): port : " + str(port))
@@ -52,85 +364,677 @@ def get_db_connection():
     logger.debug("get_db_connection(): user : " + str(user))
     
     try:
-        conn = psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password)
+        conn = psycopg2.connect(connection_factory=PreparingConnection, **params)
     except Exception as e:
         logger.exception("Dadtabase connection failed.")
         raise ManageException("Database connection error.", 500)
         
     return conn
 
+# DBコネクションプール取得
+def get_db_pool() -> ConnectionPool:
+    """
+     DBコネクションプール取得
+     初回呼び出し時に設定ファイルのプール設定でプールを生成し、以降はプロセス内で共有する。
+
+    :return: DBコネクションプール
+    :rtype: ConnectionPool
+
+    """
+    global _db_pool
+
+    if _db_pool is not None:
+        return _db_pool
+
+    with _db_pool_lock:
+        if _db_pool is None:
+            config = load_config()
+            min_size = config.get(CONFIG_KEY_DB_POOL_MIN_SIZE, DEFAULT_DB_POOL_MIN_SIZE)
+            max_size = config.get(CONFIG_KEY_DB_POOL_MAX_SIZE, DEFAULT_DB_POOL_MAX_SIZE)
+            idle_timeout = config.get(CONFIG_KEY_DB_POOL_IDLE_TIMEOUT, DEFAULT_DB_POOL_IDLE_TIMEOUT)
+            wait_timeout = config.get(CONFIG_KEY_DB_POOL_WAIT_TIMEOUT, DEFAULT_DB_POOL_WAIT_TIMEOUT)
+            check_interval = config.get(CONFIG_KEY_DB_POOL_CHECK_INTERVAL, DEFAULT_DB_POOL_CHECK_INTERVAL)
+
+            try:
+                _db_pool = ConnectionPool(
+                    get_db_connection,
+                    min_size=min_size,
+                    max_size=max_size,
+                    idle_timeout=idle_timeout,
+                    wait_timeout=wait_timeout,
+                    check_interval=check_interval)
+            except (ValueError, TypeError) as e:
+                logger.error("Invalid configuration.(db_pool: " + str(e) + ")")
+                raise ManageException("Invalid configuration.(db_pool)", 500)
+
+            logger.info("get_db_pool(): pool created. " + str(_db_pool.stats()))
+
+    return _db_pool
+
+# 読み取り用レプリカのルーター取得
+def get_replica_router():
+    """
+     読み取り用レプリカのルーター取得
+     設定ファイルのdb_read_replicas（DSNのリスト）ごとにコネクションプールを生成し、以降はプロセス内で共有する。
+
+    :return: ルーター（レプリカ未設定の場合はNone）
+    :rtype: ReplicaRouter
+
+    """
+    global _replica_router
+
+    if _replica_router is None:
+        with _db_pool_lock:
+            if _replica_router is None:
+                config = load_config()
+                dsns = config.get(CONFIG_KEY_DB_READ_REPLICAS) or []
+                if not isinstance(dsns, list):
+                    logger.error("Invalid configuration.(db_read_replicas: " + str(dsns) + ")")
+                    raise ManageException("Invalid configuration.(db_read_replicas)", 500)
+
+                connect_timeout = config.get(CONFIG_KEY_DB_REPLICA_CONNECT_TIMEOUT, DEFAULT_DB_REPLICA_CONNECT_TIMEOUT)
+                replicas = []
+                try:
+                    for dsn in dsns:
+                        name = parse_dsn(dsn).get("host", dsn)
+                        # レプリカ停止中でも起動できるよう接続は必要になるまで行わない
+                        # 応答しないレプリカへの接続で読み取りが長時間止まらないよう接続タイムアウトを設定する
+                        pool = ConnectionPool(
+                            partial(get_db_connection, dsn, connect_timeout),
+                            min_size=0,
+                            max_size=config.get(CONFIG_KEY_DB_POOL_MAX_SIZE, DEFAULT_DB_POOL_MAX_SIZE),
+                            idle_timeout=config.get(CONFIG_KEY_DB_POOL_IDLE_TIMEOUT, DEFAULT_DB_POOL_IDLE_TIMEOUT),
+                            wait_timeout=config.get(CONFIG_KEY_DB_POOL_WAIT_TIMEOUT, DEFAULT_DB_POOL_WAIT_TIMEOUT),
+                            check_interval=config.get(CONFIG_KEY_DB_POOL_CHECK_INTERVAL, DEFAULT_DB_POOL_CHECK_INTERVAL))
+                        replicas.append(Replica(name, pool))
+                except Exception as e:
+                    logger.error("Invalid configuration.(db_read_replicas: " + str(e) + ")")
+                    raise ManageException("Invalid configuration.(db_read_replicas)", 500)
+
+                if replicas:
+                    router = ReplicaRouter(
+                        replicas,
+                        max_lag=config.get(CONFIG_KEY_DB_REPLICA_MAX_LAG, DEFAULT_DB_REPLICA_MAX_LAG),
+                        check_interval=config.get(CONFIG_KEY_DB_REPLICA_CHECK_INTERVAL, DEFAULT_DB_REPLICA_CHECK_INTERVAL))
+                    router.start()
+                    _replica_router = router
+                    logger.info("get_replica_router(): replicas: " + str([r.name for r in replicas]))
+                else:
+                    _replica_router = False
+
+    return _replica_router or None
+
+# 読み取り用レプリカの統計情報取得
+def get_replica_stats() -> dict:
+    """
+     読み取り用レプリカの統計情報取得
+     レプリカ未設定の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    if not _replica_router:
+        return {}
+    return _replica_router.stats()
+
+# DBコネクションプールの統計情報取得
+def get_db_pool_stats() -> dict:
+    """
+     DBコネクションプールの統計情報取得
+     プール未生成の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    if _db_pool is None:
+        return {}
+    return _db_pool.stats()
+
+# DBマイグレーション
+def run_migrations():
+    """
+     DBマイグレーション
+     起動時に未適用のマイグレーションを適用する。
+     CREATE INDEX CONCURRENTLY等をautocommitで実行するため、プールとは別のコネクションを使用する。
+
+    """
+    config = load_config()
+    if not config.get(CONFIG_KEY_MIGRATE_ON_STARTUP, True):
+        logger.info("run_migrations(): skipped.")
+        return
+
+    conn = get_db_connection()
+    try:
+        migration.migrate(conn)
+    except Exception as e:
+        logger.exception("Database migration failed.")
+        raise ManageException("Database migration failed.", 500)
+    finally:
+        conn.close()
+
+# パーティションメンテナンス開始
+def start_partition_maintainer():
+    """
+     パーティションメンテナンス開始
+     設定ファイルでパーティショニングが有効な場合、将来分のパーティション作成と保持期間切れパーティションの削除を
+     バックグラウンドで定期実行する。
+     テーブルの変換は起動時には行わないため、事前にサービスを停止してconvert_partitionsで変換すること。
+
+    """
+    global _partition_maintainer
+
+    config = load_config()
+    if not config.get(CONFIG_KEY_PARTITION_ENABLED, False):
+        logger.info("start_partition_maintainer(): partitioning is disabled.")
+        return
+
+    interval = config.get(CONFIG_KEY_PARTITION_INTERVAL, DEFAULT_PARTITION_INTERVAL)
+    premake = config.get(CONFIG_KEY_PARTITION_PREMAKE, DEFAULT_PARTITION_PREMAKE)
+    retention_days = config.get(CONFIG_KEY_PARTITION_RETENTION_DAYS, DEFAULT_PARTITION_RETENTION_DAYS)
+    retention_action = config.get(CONFIG_KEY_PARTITION_RETENTION_ACTION, DEFAULT_PARTITION_RETENTION_ACTION)
+    check_interval = config.get(CONFIG_KEY_PARTITION_CHECK_INTERVAL, DEFAULT_PARTITION_CHECK_INTERVAL)
+
+    if interval not in (partition.INTERVAL_DAILY, partition.INTERVAL_MONTHLY):
+        logger.error("Invalid configuration.(partition_interval: " + str(interval) + ")")
+        raise ManageException("Invalid configuration.(partition_interval)", 500)
+    if retention_action not in (partition.RETENTION_ACTION_DROP, partition.RETENTION_ACTION_DETACH):
+        logger.error("Invalid configuration.(partition_retention_action: " + str(retention_action) + ")")
+        raise ManageException("Invalid configuration.(partition_retention_action)", 500)
+    if not isinstance(premake, int) or premake < 0:
+        logger.error("Invalid configuration.(partition_premake: " + str(premake) + ")")
+        raise ManageException("Invalid configuration.(partition_premake)", 500)
+    if not isinstance(retention_days, int) or retention_days < 0:
+        logger.error("Invalid configuration.(partition_retention_days: " + str(retention_days) + ")")
+        raise ManageException("Invalid configuration.(partition_retention_days)", 500)
+
+    _partition_maintainer = partition.PartitionMaintainer(
+        get_db_pool(), interval, premake, retention_days, retention_action, check_interval)
+    _partition_maintainer.start()
+
+# 既存データの補完開始
+def start_backfill():
+    """
+     既存データの補完開始
+     マイグレーションで追加した列の既存行への値の設定（イベントの緯度・経度・日時）と既存の立入り状態の集計を、
+     idの範囲ごとに分けてバックグラウンドで実行する。完了済みの補完は実行しない。
+
+    """
+    global _backfill_runner
+
+    config = load_config()
+    batch_size = config.get(CONFIG_KEY_BACKFILL_BATCH_SIZE, DEFAULT_BACKFILL_BATCH_SIZE)
+    pause = config.get(CONFIG_KEY_BACKFILL_PAUSE, DEFAULT_BACKFILL_PAUSE)
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        logger.error("Invalid configuration.(backfill_batch_size: " + str(batch_size) + ")")
+        raise ManageException("Invalid configuration.(backfill_batch_size)", 500)
+
+    _backfill_runner = BackfillRunner(get_db_pool(), batch_size=batch_size, pause=pause)
+    _backfill_runner.start()
+
+# 既存データの補完の進捗取得
+def get_backfill_stats() -> dict:
+    """
+     既存データの補完の進捗取得
+
+    :return: 補完名ごとの進捗
+    :rtype: dict
+
+    """
+    if _backfill_runner is None:
+        return {}
+    return _backfill_runner.stats()
+
+# 立入り状態の書き込みキュー取得
+def get_ingest_queue():
+    """
+     立入り状態の書き込みキュー取得
+     設定ファイルでingest_queue_enabledが有効な場合、初回呼び出し時にキューを開き、以降はプロセス内で共有する。
+
+    :return: キュー（無効の場合はNone）
+    :rtype: IngestQueue
+
+    """
+    global _ingest_queue
+
+    if _ingest_queue is None:
+        with _ingest_queue_lock:
+            if _ingest_queue is None:
+                config = load_config()
+                if not config.get(CONFIG_KEY_INGEST_QUEUE_ENABLED, False):
+                    _ingest_queue = False
+                else:
+                    try:
+                        _ingest_queue = IngestQueue(
+                            config.get(CONFIG_KEY_INGEST_QUEUE_PATH, DEFAULT_INGEST_QUEUE_PATH),
+                            lease_timeout=config.get(CONFIG_KEY_INGEST_LEASE_TIMEOUT, DEFAULT_INGEST_LEASE_TIMEOUT))
+                    except Exception as e:
+                        logger.exception("Failed to open ingest queue.")
+                        raise ManageException("Failed to open ingest queue.", 500)
+
+    return _ingest_queue or None
+
+# 書き込みキューの有効判定
+def ingest_queue_enabled() -> bool:
+    """
+    立入り状態通知を書き込みキュー経由で登録するかどうかを返す。
+
+    :rtype: bool
+    """
+    return get_ingest_queue() is not None
+
+# 書き込みスレッド開始
+def start_ingest_writers():
+    """
+     書き込みスレッド開始
+     書き込みキューが有効な場合、キューの立入り状態をまとめてDBに登録するスレッドを開始する。
+     前回の停止時に未登録だった立入り状態も、起動後に登録する。
+
+    """
+    queue = get_ingest_queue()
+    if queue is None:
+        logger.info("start_ingest_writers(): ingest queue is disabled.")
+        return
+
+    config = load_config()
+    writer_count = config.get(CONFIG_KEY_INGEST_WRITER_COUNT, DEFAULT_INGEST_WRITER_COUNT)
+    batch_size = config.get(CONFIG_KEY_INGEST_BATCH_SIZE, DEFAULT_INGEST_BATCH_SIZE)
+    batch_max_count = config.get(CONFIG_KEY_BATCH_MAX_COUNT, DEFAULT_BATCH_MAX_COUNT)
+    if not isinstance(writer_count, int) or writer_count <= 0:
+        logger.error("Invalid configuration.(ingest_writer_count: " + str(writer_count) + ")")
+        raise ManageException("Invalid configuration.(ingest_writer_count)", 500)
+    if not isinstance(batch_size, int) or batch_size <= 0 or batch_size > batch_max_count:
+        logger.error("Invalid configuration.(ingest_batch_size: " + str(batch_size) + ")")
+        raise ManageException("Invalid configuration.(ingest_batch_size)", 500)
+
+    for i in range(writer_count):
+        writer = IngestWriter(
+            queue, store_queued_statuses,
+            batch_size=batch_size,
+            flush_interval=config.get(CONFIG_KEY_INGEST_FLUSH_INTERVAL, DEFAULT_INGEST_FLUSH_INTERVAL),
+            max_attempts=config.get(CONFIG_KEY_INGEST_MAX_ATTEMPTS, DEFAULT_INGEST_MAX_ATTEMPTS),
+            is_transient=is_transient_db_error,
+            name="IngestWriter-" + str(i))
+        writer.start()
+        _ingest_writers.append(writer)
+
+# 一時的なDBエラーの判定
+def is_transient_db_error(error) -> bool:
+    """
+     DB接続断・接続不可・タイムアウト・デッドロック・プールの払い出し待ち超過等、
+     登録内容によらない一時的なエラーかどうかを返す。
+     ManageExceptionに変換済みの例外は、変換元の例外（__cause__/__context__）をたどって判定する。
+
+    :param error: 例外
+    :rtype: bool
+
+    """
+    while error is not None:
+        if isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            return True
+        if isinstance(error, ManageException) and error.http_status_code == 503:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+# 書き込みキューの統計情報取得
+def get_ingest_queue_stats() -> dict:
+    """
+     書き込みキューの統計情報取得
+     キューが無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    queue = get_ingest_queue()
+    if queue is None:
+        return {}
+    stats = queue.stats()
+    stats["writers"] = len(_ingest_writers)
+    return stats
+
+# 通知の送信スレッド開始
+def start_outbox_dispatchers():
+    """
+     通知の送信スレッド開始
+     アウトボックスの未送信の通知を状態通知機能へ送信するスレッドを開始する。
+     前回の停止時に未送信だった通知も、起動後に送信する。
+
+    """
+    config = load_config()
+    dispatcher_count = config.get(CONFIG_KEY_OUTBOX_DISPATCHER_COUNT, DEFAULT_OUTBOX_DISPATCHER_COUNT)
+    batch_size = config.get(CONFIG_KEY_OUTBOX_BATCH_SIZE, DEFAULT_OUTBOX_BATCH_SIZE)
+    if not isinstance(dispatcher_count, int) or dispatcher_count <= 0:
+        logger.error("Invalid configuration.(outbox_dispatcher_count: " + str(dispatcher_count) + ")")
+        raise ManageException("Invalid configuration.(outbox_dispatcher_count)", 500)
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        logger.error("Invalid configuration.(outbox_batch_size: " + str(batch_size) + ")")
+        raise ManageException("Invalid configuration.(outbox_batch_size)", 500)
+
+    for i in range(dispatcher_count):
+        dispatcher = outbox.OutboxDispatcher(
+            get_db_pool(), deliver_notifications,
+            batch_size=batch_size,
+            poll_interval=config.get(CONFIG_KEY_OUTBOX_POLL_INTERVAL, DEFAULT_OUTBOX_POLL_INTERVAL),
+            retry_base=config.get(CONFIG_KEY_OUTBOX_RETRY_BASE, DEFAULT_OUTBOX_RETRY_BASE),
+            max_backoff=config.get(CONFIG_KEY_OUTBOX_MAX_BACKOFF, DEFAULT_OUTBOX_MAX_BACKOFF),
+            retention=config.get(CONFIG_KEY_OUTBOX_RETENTION_HOURS, DEFAULT_OUTBOX_RETENTION_HOURS) * 3600,
+            wakeup=_outbox_wakeup,
+            stats=_outbox_stats,
+            stats_lock=_outbox_stats_lock,
+            name="OutboxDispatcher-" + str(i))
+        dispatcher.start()
+        _outbox_dispatchers.append(dispatcher)
+
+# 通知の送信スレッドの起床
+def wake_outbox_dispatchers():
+    """
+     アウトボックスへの通知の追加をコミットした後に、待機中の送信スレッドを起こす。
+
+    """
+    _outbox_wakeup.set()
+
+# 通知のアウトボックスの統計情報取得
+def get_outbox_stats() -> dict:
+    """
+     通知のアウトボックスの統計情報取得
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    try:
+        results = execute_query(outbox.SQL_OUTBOX_PENDING, ())
+        pending, oldest_age = results[0]
+    except ManageException:
+        pending, oldest_age = None, None
+
+    with _outbox_stats_lock:
+        stats = dict(_outbox_stats)
+    deliveries = stats.get("deliveries", 0)
+    return {
+        "pending": pending,
+        "oldest_age": float(oldest_age) if oldest_age is not None else 0.0,
+        "delivered": stats.get("delivered", 0),
+        "failed_attempts": stats.get("failed_attempts", 0),
+        "purged": stats.get("purged", 0),
+        "deliveries": deliveries,
+        "delivery_time_avg": stats.get("delivery_time", 0.0) / deliveries if deliveries else 0.0,
+        "dispatchers": len(_outbox_dispatchers)
+    }
+
 # SQL実行
-def execute_query(query, params) -> list:
+def execute_query(query, params, name=None, read_only=False) -> list:
     """
      データベースクエリ実行
     指定されたSQLクエリとパラメータを使用してPostgreSQLで実行しリスト形式で返す。
+    コネクションはプールから払い出し、実行後にプールへ返却する。
+    ステートメント名を指定した場合はプリペアドステートメントとして登録し、名前で実行する。
+    読み取り専用の場合は読み取り用レプリカで実行し、使用できるレプリカが無い・失敗した場合はプライマリで実行する。
     
     :param query: 実行するSQLクエリ
     :type query: str
     :param params: パラメータ
     :type params: list or tuple
+    :param name: プリペアドステートメント名
+    :type name: str
+    :param read_only: 読み取り専用のクエリかどうか
+    :type read_only: bool
 
     :return: クエリの実行結果
     :rtype: list
     
     """
+    if read_only:
+        return execute_read_query(query, params, name)[0]
+
     results = []
-    conn = get_db_connection()
     
     logger.debug("execute_query(): query : " + str(query))
     logger.debug("execute_query(): params: " + str(params))
     
     try:
-        with conn.cursor() as cursor:
-            cursor.execute(query, params) 
-            results = cursor.fetchall()
-            conn.commit()
+        results = _execute_on(get_db_pool(), query, params, name)
+    except ManageException:
+        raise
     except Exception as e:
-        conn.close()
         logger.exception("Database query execution failed.")
         raise ManageException("Database query execution failed.", 500)
-        
-    conn.close()
     
     logger.debug("execute_query(): results : " + str(results))
     
     return results
+
+# 読み取り用SQL実行
+def execute_read_query(query, params, name=None) -> tuple:
+    """
+     読み取り専用のクエリを読み取り用レプリカで実行し、使用できるレプリカが無い・失敗した場合はプライマリで実行する。
+     レプリカの結果は書き込みの反映が遅れている場合があるため、結果をキャッシュする場合は実行先を確認すること。
+
+    :param query: 実行するSQLクエリ
+    :type query: str
+    :param params: パラメータ
+    :type params: list or tuple
+    :param name: プリペアドステートメント名
+    :type name: str
+
+    :return: (クエリの実行結果, レプリカで実行したかどうか)
+    :rtype: tuple
+
+    """
+    router = get_replica_router()
+    replica = router.choose() if router is not None else None
+    if replica is not None:
+        logger.debug("execute_read_query(): query : " + str(query))
+        logger.debug("execute_read_query(): params: " + str(params))
+        try:
+            results = _execute_on(replica.pool, query, params, name)
+            logger.debug("execute_read_query(): replica : " + replica.name)
+            logger.debug("execute_read_query(): results : " + str(results))
+            return results, True
+        except Exception as e:
+            logger.warning("Replica query execution failed. Retrying on primary. (" + replica.name + ")", exc_info=True)
+            router.mark_failed(replica)
+            router.record_fallback()
+
+    return execute_query(query, params, name), False
+
+def _execute_on(pool, query, params, name):
+    """
+     指定したプールのコネクションでクエリを実行する。
+    """
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            if name:
+                if not prepared_statements.is_registered(name):
+                    prepared_statements.register(name, query)
+                prepared_statements.execute(cursor, name, params)
+            else:
+                cursor.execute(query, params) 
+            results = cursor.fetchall()
+        conn.commit()
+    return results
         
 
+# トランザクション実行
+@contextmanager
+def db_transaction():
+    """
+     トランザクション実行
+    プールから払い出したコネクションのカーソルを返し、with文を抜けた時点でコミットする。
+    例外発生時はロールバックし、ManageException以外の例外はManageException(500)に変換する。
+
+    :return: カーソル
+
+    """
+    with get_db_pool().connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                yield cursor
+            conn.commit()
+        except ManageException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            logger.exception("Database transaction failed.")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise ManageException("Database query execution failed.", 500)
+
+
 #設定ファイルの読み込み
 def load_config():
     """
      CONFIG_PATHに設定された設定ファイルの読み込み
+     読み込み・検証済みの設定を返し、ファイルが更新された場合のみ再読み込みする。
+     コネクションプール等の初回呼び出し時に生成するオブジェクトには、再読み込みした設定は反映されない。
     
-    :return: コンフィグ
+    :return: コンフィグ（読み取り専用）
     
     """
     try:
-        with open(CONFIG_PATH, "r") as config_file:
-            config = json.load(config_file)
+        return _config_loader.get()
     except Exception as e:
         logger.exception("Failed to load config file.")
         raise ManageException("Failed to load config file.", 500)
 
-    logger.debug("load_config(): config" + str(config))
-    return config
+#設定ファイルの読み込みの統計情報取得
+def get_config_stats() -> dict:
+    """
+     設定ファイルの読み込みの統計情報取得
+
+    :return: 統計情報
+    :rtype: dict
 
-#立ち入り状態取得
-def status_get_data(port, _datetime) -> list:
     """
-    立入り状態の情報（テキストデータ）を取得する。
+    return _config_loader.stats()
 
-    :param port: ドローンポートのID
-    :type port: str
-    :param _datetime: 立入り検知の日時
-    :type _datetime: str
+# 立入り状態取得結果のキャッシュ取得
+def get_status_cache():
+    """
+     立入り状態取得結果のキャッシュ取得
+     初回呼び出し時に設定ファイルのキャッシュ設定で生成し、以降はプロセス内で共有する。
+
+    :return: キャッシュ（無効の場合はNone）
+    :rtype: ResultCache
+
+    """
+    global _status_cache
+
+    if _status_cache is None:
+        with _status_cache_lock:
+            if _status_cache is None:
+                config = load_config()
+                if not config.get(CONFIG_KEY_STATUS_CACHE_ENABLED, True):
+                    _status_cache = False
+                else:
+                    try:
+                        _status_cache = ResultCache(
+                            max_size=config.get(CONFIG_KEY_STATUS_CACHE_SIZE, DEFAULT_STATUS_CACHE_SIZE),
+                            ttl=config.get(CONFIG_KEY_STATUS_CACHE_TTL, DEFAULT_STATUS_CACHE_TTL))
+                    except (ValueError, TypeError) as e:
+                        logger.error("Invalid configuration.(status_cache: " + str(e) + ")")
+                        raise ManageException("Invalid configuration.(status_cache)", 500)
+
+    return _status_cache or None
+
+# レプリカの取得結果のキャッシュ有効秒数
+def status_cache_replica_ttl(cache) -> float:
+    """
+     レプリカの取得結果のキャッシュ有効秒数
+     レプリカの結果はコミット・キャッシュ無効化の後でも反映前の内容の場合があるため、
+     status_cache_replica_ttlをキャッシュの有効秒数・レプリカの遅延の上限で制限した短い期限とする。
+     キャッシュから反映前の結果を返し得る期間は、レプリカの遅延の上限とこの秒数の合計までとなる。
+
+    :param cache: キャッシュ
+    :rtype: float
 
-    :rtype: list
     """
-    logger.debug("status_get_data(): port:" + str(port))
-    logger.debug("status_get_data(): _datetime:" + str(_datetime))
-    
     config = load_config()
+    ttl = min(config.get(CONFIG_KEY_STATUS_CACHE_REPLICA_TTL, DEFAULT_STATUS_CACHE_REPLICA_TTL), cache.ttl)
+    router = get_replica_router()
+    if router is not None:
+        ttl = min(ttl, router.max_lag)
+    return ttl
+
+# 立入り状態取得結果のキャッシュ無効化
+def invalidate_status_cache(ports):
+    """
+     立入り状態取得結果のキャッシュ無効化
+     立入り状態のコミット後に、登録したポートのキャッシュを無効化する。
+
+    :param ports: ドローンポートのIDのリスト
+    :type ports: list
+
+    """
+    cache = get_status_cache()
+    if cache is None:
+        return
+    for port in set(ports):
+        cache.invalidate(port)
+
+# 立入り状態取得結果のキャッシュ統計情報取得
+def get_status_cache_stats() -> dict:
+    """
+     立入り状態取得結果のキャッシュ統計情報取得
+     キャッシュ未生成または無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    if not _status_cache:
+        return {}
+    return _status_cache.stats()
+
+# ページングカーソル作成
+def encode_cursor(_datetime, entry_status_id) -> str:
+    """
+    ページングカーソル作成
+    最終行の(datetime, id)を不透明な文字列にエンコードする。
+
+    :param _datetime: 最終行の立入り検知の日時
+    :param entry_status_id: 最終行の立入り状態ID
+    :rtype: str
+    """
+    raw = json.dumps([_datetime.isoformat(), entry_status_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+# ページングカーソル解析
+def decode_cursor(cursor) -> tuple:
+    """
+    ページングカーソル解析
+
+    :param cursor: encode_cursorで作成したカーソル
+    :type cursor: str
+    :return: (datetime, id)
+    :rtype: tuple
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        _datetime, entry_status_id = json.loads(raw)
+        _datetime = util.deserialize_datetime(_datetime)
+        if not isinstance(entry_status_id, int):
+            raise ValueError("id is not integer.")
+    except Exception as e:
+        logger.error("Invalid cursor. (cursor: " + str(cursor) + ")")
+        raise ManageException("Invalid cursor.", 400)
+    return _datetime, entry_status_id
+
+# 立入り状態取得件数の決定
+def resolve_status_limit(config, limit) -> tuple:
+    """
+    設定ファイルのmax_count、max_limitから立入り状態の取得件数を決定する。
+
+    :param config: コンフィグ
+    :param limit: リクエストで指定された取得件数
+    :return: (max_count, 取得件数)
+    :rtype: tuple
+    """
     max_count = DEFAULT_MAX_COUNT
     if CONFIG_KEY_MAX_COUNT in config:
         max_count = config[CONFIG_KEY_MAX_COUNT]
@@ -139,49 +1043,133 @@ def status_get_data(port, _datetime) -> list:
         if not isinstance(max_count, int) or max_count <= 0:
             logger.error("Invalid configuration.(max_count: " + str(max_count) + ")")
             raise ManageException("Invalid configuration.(max_count)", 400)
-        
-    # DBから立入り状態を取得し、レスポンスデータ作成
-    query_status = """
-            SELECT 
-                ES.port, 
-                ES.datetime, 
-                ES.detect, 
-                json_agg(json_build_object(
-                    'id', EV.object_id,
-                    'type', EV.object_type,
-                    'detect', EV.detect,
-                    'location', EV.location
-                )) as event, 
-                R.endpoint
-            FROM ENTRY_STATUS_INFORMATION ES
-            LEFT OUTER JOIN EVENT_INFORMATION EV 
-                ON ES.ID = EV.ent_stat_id
-            LEFT OUTER JOIN REPORT R
-                ON ES.report_id = R.report_id
+
+    max_limit = config.get(CONFIG_KEY_MAX_LIMIT, DEFAULT_MAX_LIMIT)
+    if limit is None:
+        limit = max_count
+    elif limit <= 0 or limit > max_limit:
+        logger.error("Invalid limit. (limit: " + str(limit) + ")")
+        raise ManageException("Invalid limit. (1 - " + str(max_limit) + ")", 400)
+
+    return max_count, limit
+
+# 立入り状態取得SQL作成
+def build_status_query(port, _datetime, cursor, limit) -> tuple:
+    """
+    立入り状態取得SQL作成
+    (datetime, id)の降順で、次ページの有無を判定するため取得件数より1件多く取得するSQLを作成する。
+    先にインデックスで対象の立入り状態を絞り込み、イベントはその行に限ってLATERALで集約する。
+    イベントが無い立入り状態のeventはNULLとする。
+    列はport, datetime, detect, event, endpoint, idの順。
+    条件の組み合わせごとにプリペアドステートメント名を決める。
+
+    :return: (SQL, パラメータ, ステートメント名)
+    :rtype: tuple
+    """
+    query_target = """
+                SELECT ES.id, ES.port, ES.datetime, ES.detect, ES.report_id
+                FROM ENTRY_STATUS_INFORMATION ES
         """
     conditions = []
     params = []
 
     #port指定の場合
     if port:
-        conditions.append("ES.port = %s ")
+        conditions.append("ES.port = %s::varchar ")
         params.append(port)
 
     #datetime指定の場合
     if _datetime:
-        conditions.append("ES.datetime >= %s ")
+        conditions.append("ES.datetime >= %s::timestamptz ")
         params.append(_datetime)
+
+    #カーソル指定の場合は前ページ最終行より後の行
+    if cursor:
+        cursor_datetime, cursor_id = decode_cursor(cursor)
+        conditions.append("(ES.datetime, ES.id) < (%s::timestamptz, %s::integer) ")
+        params.extend([cursor_datetime, cursor_id])
     
     if conditions:
-        query_status += " WHERE " + " AND ".join(conditions)
+        query_target += " WHERE " + " AND ".join(conditions)
+
+    #並び替えと最大件数（次ページの有無を判定するため1件多く取得する）
+    query_target += " ORDER BY ES.datetime DESC, ES.id DESC LIMIT %s::integer"
+    params.append(limit + 1)
+
+    #絞り込んだ立入り状態ごとにイベントを集約する
+    query_status = """
+            SELECT 
+                ES.port, 
+                ES.datetime, 
+                ES.detect, 
+                EV.event, 
+                R.endpoint,
+                ES.id
+            FROM (""" + query_target + """
+            ) ES
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object(
+                    'detect', EV.detect,
+                    'id', EV.object_id,
+                    'location', EV.location,
+                    'type', EV.object_type
+                ) ORDER BY EV.id) AS event
+                FROM EVENT_INFORMATION EV
+                WHERE EV.ent_stat_id = ES.id
+            ) EV ON TRUE
+            LEFT OUTER JOIN REPORT R
+                ON ES.report_id = R.report_id
+            ORDER BY ES.datetime DESC, ES.id DESC
+        """
+
+    name = "status_get_" + "".join("1" if c else "0" for c in (port, _datetime, cursor))
+
+    return query_status, params, name
+
+#立ち入り状態取得
+def status_get_data(port, _datetime, cursor=None, limit=None) -> tuple:
+    """
+    立入り状態の情報（テキストデータ）を取得する。
+    (datetime, id)の降順でキーセットページングを行い、続きがある場合は次ページのカーソルを返す。
+
+    :param port: ドローンポートのID
+    :type port: str
+    :param _datetime: 立入り検知の日時
+    :type _datetime: str
+    :param cursor: 前ページのレスポンスで返却したカーソル
+    :type cursor: str
+    :param limit: 取得件数（省略時はmax_count）
+    :type limit: int
+
+    :return: (立入り状態のリスト, 次ページのカーソル)
+    :rtype: tuple
+    """
+    logger.debug("status_get_data(): port:" + str(port))
+    logger.debug("status_get_data(): _datetime:" + str(_datetime))
+    logger.debug("status_get_data(): cursor:" + str(cursor))
+    logger.debug("status_get_data(): limit:" + str(limit))
+    
+    config = load_config()
+    max_count, limit = resolve_status_limit(config, limit)
 
-    #GROUP句を設定    
-    query_status += "GROUP BY ES.ID, EV.ent_stat_id, R.endpoint"
-    #並び替えと最大件数
-    query_status += " ORDER BY ES.datetime DESC LIMIT %s"
-    params.append(max_count)
+    # 同一条件の取得結果がキャッシュにあれば返却する
+    cache = get_status_cache()
+    cache_key = (port or None, _datetime.isoformat() if _datetime else None, cursor or None, limit, max_count, "data")
+    if cache is not None:
+        hit, value, generation = cache.get(cache_key)
+        if hit:
+            logger.debug("status_get_data(): cache hit.")
+            return value
+        
+    # DBから立入り状態を取得し、レスポンスデータ作成
+    query_status, params, name = build_status_query(port, _datetime, cursor, limit)
+    results, from_replica = execute_read_query(query_status, params, name)
 
-    results = execute_query(query_status, params)
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = encode_cursor(last[1], last[5])
     
     data = []
     for row in results:
@@ -197,17 +1185,227 @@ def status_get_data(port, _datetime) -> list:
         })
 
     logger.debug("status_get_data(): data:" + str(data))
-    return data
+    logger.debug("status_get_data(): next_cursor:" + str(next_cursor))
 
-#立入り状態通知
-def status_post_data(port, datetime, detect, events, report_id):
+    # レプリカの結果は無効化後の書き込みを含まない場合があるため、短い有効期限でキャッシュする
+    if cache is not None:
+        cache.put(cache_key, (data, next_cursor), generation,
+                  ttl=status_cache_replica_ttl(cache) if from_replica else None)
+
+    return data, next_cursor
+
+# 日時のJSON文字列表現（SQL式）
+def sql_isoformat(column) -> str:
     """
-    立入り状態通知
+    timestamptzの列をdatetime.isoformat()と同じ形式の文字列にするSQL式を返す。
+    PostgreSQLのto_json(timestamptz)は小数秒の桁数が異なるため、jsonifyで返却する場合と形式を揃える。
+    例: 2024-11-22T13:50:40+09:00 / 2024-11-22T13:50:40.123400+09:00（小数秒が0の場合は省略し、それ以外は6桁）
 
-    :param port: ドローンポートのID
-    :type port: str
-    :param datetime: 立入り検知の日時
-    :type datetime: str
+    :param column: 列の式
+    :rtype: str
+    """
+    return (
+        "(to_char(" + column + ", 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+        " || CASE WHEN to_char(" + column + ", 'US') = '000000' THEN ''"
+        " ELSE to_char(" + column + ", '.US') END"
+        " || to_char(" + column + ", 'TZH:TZM'))")
+
+# JSON文字列での立入り状態取得の有効判定
+def status_json_fast_path_enabled() -> bool:
+    """
+    立入り状態取得APIのレスポンスをPostgreSQLで組み立てるかどうかを返す。
+
+    :rtype: bool
+    """
+    config = load_config()
+    return bool(config.get(CONFIG_KEY_STATUS_JSON_FAST_PATH, True))
+
+#立ち入り状態取得（JSON文字列）
+def status_get_json(port, _datetime, cursor=None, limit=None) -> tuple:
+    """
+    立入り状態の情報（テキストデータ）をレスポンスのJSON文字列として取得する。
+    レスポンス全体をPostgreSQLのjson_agg/json_build_objectで組み立て、Python側でのデコード・再エンコードを行わない。
+    キーの並びはjsonify(キーをソート)と同じ順とする。
+
+    :param port: ドローンポートのID
+    :type port: str
+    :param _datetime: 立入り検知の日時
+    :type _datetime: str
+    :param cursor: 前ページのレスポンスで返却したカーソル
+    :type cursor: str
+    :param limit: 取得件数（省略時はmax_count）
+    :type limit: int
+
+    :return: (立入り状態のリストのJSON文字列, 次ページのカーソル)
+    :rtype: tuple
+    """
+    logger.debug("status_get_json(): port:" + str(port))
+    logger.debug("status_get_json(): _datetime:" + str(_datetime))
+    logger.debug("status_get_json(): cursor:" + str(cursor))
+    logger.debug("status_get_json(): limit:" + str(limit))
+
+    config = load_config()
+    max_count, limit = resolve_status_limit(config, limit)
+
+    # 同一条件の取得結果がキャッシュにあれば返却する
+    cache = get_status_cache()
+    cache_key = (port or None, _datetime.isoformat() if _datetime else None, cursor or None, limit, max_count, "json")
+    if cache is not None:
+        hit, value, generation = cache.get(cache_key)
+        if hit:
+            logger.debug("status_get_json(): cache hit.")
+            return value
+
+    query_rows, params, name = build_status_query(port, _datetime, cursor, limit)
+    query_status = """
+        SELECT
+            COALESCE(json_agg(json_build_object(
+                'datetime', """ + sql_isoformat("S.datetime") + """,
+                'detect', S.detect,
+                'events', COALESCE(S.event, '[]'::json),
+                'port', S.port,
+                'report_endpoint', S.endpoint
+            ) ORDER BY S.rn) FILTER (WHERE S.rn <= %s::integer), '[]'::json)::text,
+            count(*) > %s::integer,
+            max(S.datetime) FILTER (WHERE S.rn = %s::integer),
+            max(S.id) FILTER (WHERE S.rn = %s::integer)
+        FROM (
+            SELECT R.*, row_number() OVER (ORDER BY R.datetime DESC, R.id DESC) AS rn
+            FROM (""" + query_rows + """) R
+        ) S
+    """
+    results, from_replica = execute_read_query(query_status, [limit, limit, limit, limit] + params, name.replace("status_get_", "status_get_json_"))
+    body, has_next, last_datetime, last_id = results[0]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(last_datetime, last_id)
+
+    logger.debug("status_get_json(): next_cursor:" + str(next_cursor))
+
+    # レプリカの結果は無効化後の書き込みを含まない場合があるため、短い有効期限でキャッシュする
+    if cache is not None:
+        cache.put(cache_key, (body, next_cursor), generation,
+                  ttl=status_cache_replica_ttl(cache) if from_replica else None)
+
+    return body, next_cursor
+
+#立入り状態エクスポート
+def status_export_data(port, _datetime):
+    """
+    立入り状態の履歴をNDJSON(1行1件のJSON)でエクスポートする。
+    サーバーサイドカーソルでexport_fetch_size件ずつ取得するため、件数によらずメモリ使用量は一定となる。
+    各行のJSONはPostgreSQLで組み立て、キーの並びは立入り状態取得APIと同じとする。
+    コネクションは最後まで読み出すか、クローズ（クライアントの切断を含む）するまでプールから払い出したままとする。
+
+    :param port: ドローンポートのID
+    :type port: str
+    :param _datetime: 立入り検知の日時。指定した日時以降のデータを返す。
+    :type _datetime: str
+
+    :return: NDJSONの行を返すイテラブル（CursorStream）
+    """
+    logger.debug("status_export_data(): port:" + str(port))
+    logger.debug("status_export_data(): _datetime:" + str(_datetime))
+
+    config = load_config()
+    fetch_size = config.get(CONFIG_KEY_EXPORT_FETCH_SIZE, DEFAULT_EXPORT_FETCH_SIZE)
+    if not isinstance(fetch_size, int) or fetch_size <= 0:
+        logger.error("Invalid configuration.(export_fetch_size: " + str(fetch_size) + ")")
+        raise ManageException("Invalid configuration.(export_fetch_size)", 500)
+
+    query_export = """
+        SELECT json_build_object(
+            'datetime', """ + sql_isoformat("ES.datetime") + """,
+            'detect', ES.detect,
+            'events', COALESCE((
+                SELECT json_agg(json_build_object(
+                    'detect', EV.detect,
+                    'id', EV.object_id,
+                    'location', EV.location,
+                    'type', EV.object_type
+                ) ORDER BY EV.id)
+                FROM EVENT_INFORMATION EV
+                WHERE EV.ent_stat_id = ES.id
+            ), '[]'::json),
+            'port', ES.port,
+            'report_endpoint', R.endpoint
+        )::text
+        FROM ENTRY_STATUS_INFORMATION ES
+        LEFT OUTER JOIN REPORT R
+            ON ES.report_id = R.report_id
+    """
+    conditions = []
+    params = []
+    if port:
+        conditions.append("ES.port = %s ")
+        params.append(port)
+    if _datetime:
+        conditions.append("ES.datetime >= %s ")
+        params.append(_datetime)
+    if conditions:
+        query_export += " WHERE " + " AND ".join(conditions)
+    query_export += " ORDER BY ES.datetime, ES.id"
+
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        # 名前付きカーソル（サーバーサイドカーソル）はトランザクション内でのみ有効
+        cursor = conn.cursor(name="status_export_" + uuid.uuid4().hex)
+        cursor.itersize = fetch_size
+        cursor.execute(query_export, params)
+    except Exception as e:
+        pool.putconn(conn, discard=bool(conn.closed))
+        logger.exception("Database query execution failed.")
+        raise ManageException("Database query execution failed.", 500)
+
+    # クライアントが読み出しの開始前に切断した場合もclose()でコネクションを返却する
+    return CursorStream(pool, conn, cursor, fetch_size, lambda rows: "".join(row[0] + "\n" for row in rows))
+
+# レポートIDの正規化
+def normalize_report_id(report_id):
+    """
+    レポートIDをUUIDの正規表記（小文字、ハイフン区切り）にする。UUIDとして不正な場合はNoneを返す。
+
+    :param report_id: レポートファイルの識別子
+    :rtype: str
+    """
+    try:
+        return str(uuid.UUID(report_id))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+# レポートエンドポイントの解決
+def resolve_report_endpoints(report_ids) -> dict:
+    """
+    レポートIDとレポートエンドポイントの紐づけを1回の検索でまとめて解決する。
+    読み取り用レプリカで検索し、レプリカの遅延で見つからなかったレポートIDはプライマリで再検索する。
+
+    :param report_ids: 正規化済みのレポートIDのリスト
+    :type report_ids: list
+    :return: レポートIDとレポートエンドポイントの辞書
+    :rtype: dict
+    """
+    if not report_ids:
+        return {}
+
+    endpoints = dict(execute_query(SQL_REPORT_ENDPOINT_GET_MANY, (list(report_ids),), STMT_REPORT_ENDPOINT_GET_MANY, read_only=True))
+
+    missing = [r for r in report_ids if r not in endpoints]
+    if missing and get_replica_router() is not None:
+        endpoints.update(execute_query(SQL_REPORT_ENDPOINT_GET_MANY, (missing,), STMT_REPORT_ENDPOINT_GET_MANY))
+
+    return endpoints
+
+#立入り状態通知
+def status_post_data(port, datetime, detect, events, report_id):
+    """
+    立入り状態通知
+
+    :param port: ドローンポートのID
+    :type port: str
+    :param datetime: 立入り検知の日時
+    :type datetime: str
     :param detect: 立入り状態の代表値
     :type datect: boolean
     :param events: 立入り検知の情報
@@ -223,80 +1421,683 @@ def status_post_data(port, datetime, detect, events, report_id):
     logger.debug("status_post_data(): report_id:" + str(report_id))
 
 
+    # レポートIDが空文字の場合は、SQLエラーとなるためNoneとする
+    if not report_id:
+        report_id = None
+
+    # 位置情報を数値の緯度・経度に変換
+    parse_event_locations(events)
+
     report_endpoint = ""
     if report_id :
     # レポートIDとレポートエンドポイントの紐づけを解決
-        query_report = """
-            SELECT endpoint FROM REPORT WHERE report_id = %s
-        """
-        results = execute_query(query_report, (report_id,))
+        normalized_report_id = normalize_report_id(report_id)
+        endpoints = resolve_report_endpoints([normalized_report_id] if normalized_report_id else [])
 
-        if not results :
+        if normalized_report_id not in endpoints :
             logger.error("Not found report file. (Report ID: %s)", report_id)
             raise ManageException("Not found report file.", 404)
         else:
-            report_row = results[0]
-            report_endpoint = report_row[0]
-    
-    
-    # レポートIDが空文字の場合は、SQLエラーとなるためNoneとする
-    if not report_id:
-        report_id = None
-    
-    # 立入り状態のDB登録
-    query_status = """
-        INSERT INTO ENTRY_STATUS_INFORMATION (port, datetime, detect, report_id)
-        VALUES (%s, %s, %s, %s)
-        RETURNING id
-    """
-    results = execute_query(query_status, (port, datetime, detect, report_id))
-    result_row = results[0]
-    entry_status_id = result_row[0]
-    
-    # 立入り状態（障害物の検知情報）のDB登録
-    query_event = """
-        INSERT INTO EVENT_INFORMATION (ent_stat_id, object_id, object_type, detect, location)
-        VALUES (%s, %s, %s, %s, %s)
-        RETURNING id
-    """
-    for event in events:
-        event_id = event.get('id')
-        event_type = event.get('type')
-        event_detect = event.get('detect')
-        event_location = event.get('location', None)
-        execute_query(query_event, (entry_status_id, event_id, event_type, event_detect, event_location))
+            report_id = normalized_report_id
+            report_endpoint = endpoints[report_id]
 
-    
-    # 状態通知機能への通知
-    notify(port, datetime, detect, events, report_endpoint)
+    # 直前の状態から変化がない場合は通知しない（設定により登録もしない）
+    decision = observe_states([(port, datetime, detect, events)])[0]
+    if decision == state_tracker.UNCHANGED and not store_unchanged_states():
+        logger.debug("status_post_data(): unchanged status skipped.")
+        return
+
+    # 立入り状態と障害物の検知情報を1トランザクションで登録する
+    with state_guard([port]), db_transaction() as cursor:
+        # 立入り状態のDB登録
+        prepared_statements.execute(cursor, STMT_STATUS_INSERT, (port, datetime, detect, report_id))
+        entry_status_id = cursor.fetchone()[0]
+
+        # 立入り状態（障害物の検知情報）のDB登録
+        # 全イベントを1文で登録する
+        if events:
+            event_rows = [event_row(entry_status_id, datetime, event) for event in events]
+            insert_events(cursor, event_rows)
+
+        # 集計の加算
+        update_rollups(cursor, rollup_rows(port, datetime, detect, events))
+
+        # ドローンポートごとの最新の立入り状態を更新
+        upsert_latest_status(cursor, [(port, entry_status_id, datetime, detect, events, report_endpoint)])
+
+        # 状態通知機能への通知をアウトボックスに追加（状態の変化を含む場合のみ）
+        if decision == state_tracker.TRANSITION:
+            enqueue_notifications(cursor, [build_notification(port, datetime, detect, events, report_endpoint)])
+
+    logger.debug("status_post_data(): entry_status_id:" + str(entry_status_id))
+
+    # コミット済みのポートの取得結果キャッシュを無効化
+    invalidate_status_cache([port])
+
+    # 通知の送信スレッドを起こす
+    if decision == state_tracker.TRANSITION:
+        wake_outbox_dispatchers()
     
     return 
  
-# 状態通知機能のAPI実行  
-def notify(port, datetime, detect, events, report_endpoint):
+#立入り状態一括通知
+def status_post_batch_data(statuses) -> list:
+    """
+    立入り状態一括通知
+    レポートIDを1回の検索でまとめて解決し、立入り状態と障害物の検知情報を
+    1トランザクション内の複数行INSERTで登録する。通知はアウトボックスからまとめて送信する。
+
+    :param statuses: 立入り状態のリスト。各要素はport, datetime, detect, event, report_idを持つ辞書。
+                     datetimeの変換に失敗した要素は"error"に(メッセージ, ステータスコード)を持つ。
+    :type statuses: list
+
+    :return: 要素ごとの登録結果
+    :rtype: list
+    """
+    logger.debug("status_post_batch_data(): count:" + str(len(statuses)))
+
+    config = load_config()
+    batch_max_count = config.get(CONFIG_KEY_BATCH_MAX_COUNT, DEFAULT_BATCH_MAX_COUNT)
+    if len(statuses) > batch_max_count:
+        logger.error("Too many statuses. (count: " + str(len(statuses)) + ")")
+        raise ManageException("Too many statuses. (max: " + str(batch_max_count) + ")", 400)
+
+    results, notifications = store_status_batch(statuses)
+
+    logger.debug("status_post_batch_data(): notified:" + str(len(notifications)))
+    return results
+
+# 立入り状態の一括登録
+def store_status_batch(statuses) -> tuple:
+    """
+    立入り状態と状態通知機能への通知を1トランザクションで一括登録し、登録したポートの取得結果キャッシュを無効化する。
+
+    :param statuses: 立入り状態のリスト（status_post_batch_dataと同じ形式）
+    :type statuses: list
+
+    :return: (要素ごとの登録結果, 通知データのリスト)
+    :rtype: tuple
+    """
+    results = [{"index": i, "status_code": 204} for i in range(len(statuses))]
+
+    # 事前チェックでエラーとなった要素を除外
+    targets = []
+    report_ids = set()
+    for i, status in enumerate(statuses):
+        if status.get('error'):
+            message, status_code = status['error']
+            results[i] = {"index": i, "status_code": status_code, "message": message}
+            continue
+
+        report_id = status.get('report_id')
+        if report_id:
+            report_id = normalize_report_id(report_id)
+            if not report_id:
+                logger.error("Not found report file. (Report ID: %s)", status.get('report_id'))
+                results[i] = {"index": i, "status_code": 404, "message": "Not found report file."}
+                continue
+            report_ids.add(report_id)
+        else:
+            # レポートIDが空文字の場合は、SQLエラーとなるためNoneとする
+            report_id = None
+        targets.append((i, status, report_id))
+
+    # レポートIDとレポートエンドポイントの紐づけを1回で解決
+    endpoints = resolve_report_endpoints(list(report_ids))
+
+    notifications = []
+    rows = []
+    for i, status, report_id in targets:
+        if report_id and report_id not in endpoints:
+            logger.error("Not found report file. (Report ID: %s)", report_id)
+            results[i] = {"index": i, "status_code": 404, "message": "Not found report file."}
+            continue
+        rows.append((i, status, report_id))
+    observed_ports = [status.get('port') for _, status, _ in rows]
+
+    # 直前の状態から変化がない立入り状態は通知しない（設定により登録もしない）
+    # 判定時の状態の復元でコネクションを払い出すため、トランザクションの開始前に判定する
+    decisions = observe_states([
+        (status.get('port'), status.get('datetime'), status.get('detect'), status.get('event'))
+        for _, status, _ in rows])
+    if not store_unchanged_states():
+        kept = [(row, decision) for row, decision in zip(rows, decisions) if decision != state_tracker.UNCHANGED]
+        rows = [row for row, _ in kept]
+        decisions = [decision for _, decision in kept]
+
+    with state_guard(observed_ports), db_transaction() as cursor:
+        if rows:
+            # 立入り状態のIDを一括で採番し、イベントの登録に利用する
+            prepared_statements.execute(cursor, STMT_STATUS_ID_RESERVE, (len(rows),))
+            ids = [r[0] for r in cursor.fetchall()]
+
+            status_rows = []
+            event_rows = []
+            latest_rows = []
+            counted_rows = []
+            for entry_status_id, (i, status, report_id), decision in zip(ids, rows, decisions):
+                status_rows.append((entry_status_id, status.get('port'), status.get('datetime'), status.get('detect'), report_id))
+                latest_rows.append((status.get('port'), entry_status_id, status.get('datetime'), status.get('detect'),
+                                    status.get('event') or [], endpoints.get(report_id, "")))
+                parse_event_locations(status.get('event'))
+                for event in status.get('event') or []:
+                    event_rows.append(event_row(entry_status_id, status.get('datetime'), event))
+                counted_rows.extend(rollup_rows(status.get('port'), status.get('datetime'), status.get('detect'), status.get('event')))
+
+                if decision == state_tracker.TRANSITION:
+                    notifications.append(build_notification(
+                        status.get('port'), status.get('datetime'), status.get('detect'),
+                        status.get('event') or [], endpoints.get(report_id, "")))
+
+            # 立入り状態のDB登録
+            prepared_statements.execute(cursor, STMT_STATUS_INSERT_MANY, columns_of(status_rows, 5))
+
+            # 立入り状態（障害物の検知情報）のDB登録
+            if event_rows:
+                insert_events(cursor, event_rows)
+
+            # 集計の加算
+            update_rollups(cursor, counted_rows)
+
+            # ドローンポートごとの最新の立入り状態を更新
+            upsert_latest_status(cursor, latest_rows)
+
+            # 状態通知機能への通知をアウトボックスに追加
+            enqueue_notifications(cursor, notifications)
+
+    # コミット済みのポートの取得結果キャッシュを無効化
+    invalidate_status_cache([status.get('port') for _, status, _ in rows])
+
+    # 通知の送信スレッドを起こす
+    if notifications:
+        wake_outbox_dispatchers()
+
+    return results, notifications
+
+# 立入り状態の書き込みキューへの追加
+def status_enqueue(port, datetime, detect, events, report_id):
     """
-    状態通知機能のAPIを実行
+    立入り状態を書き込みキューに追加する。DBへの登録（通知のアウトボックスへの追加を含む）は書き込みスレッドで行う。
+    レポートIDの存在確認は追加前に行い、存在しない場合はキューに追加せずにエラーとする。
+    キューへの追加はディスクへの書き出し完了後に戻るため、戻った立入り状態は再起動後も失われない。
 
     :param port: ドローンポートのID
     :type port: str
     :param datetime: 立入り検知の日時
-    :type datetime: str
+    :type datetime: datetime
     :param detect: 立入り状態の代表値
-    :type datect: boolean
+    :type detect: boolean
     :param events: 立入り検知の情報
     :type events: array
-    :param report_endpoint: レポートファイルのエンドポイント
-    :type events: str
-    
+    :param report_id: レポートファイルの識別子
+    :type report_id: str
+
     """
-    
-    logger.debug("notify(): port:" + port)
-    logger.debug("notify(): datetime:" + str(datetime))
-    logger.debug("notify(): detect:" + str(detect))
-    logger.debug("notify(): events:" + str(events))
-    logger.debug("notify(): report_endpoint:" + report_endpoint)
+    logger.debug("status_enqueue(): port:" + str(port))
+    logger.debug("status_enqueue(): datetime:" + str(datetime))
+
+    if report_id:
+        normalized_report_id = normalize_report_id(report_id)
+        endpoints = resolve_report_endpoints([normalized_report_id] if normalized_report_id else [])
+        if normalized_report_id not in endpoints:
+            logger.error("Not found report file. (Report ID: %s)", report_id)
+            raise ManageException("Not found report file.", 404)
+
+    queue = get_ingest_queue()
+    try:
+        queue.put({
+            "port": port,
+            "datetime": datetime.isoformat(),
+            "detect": detect,
+            "event": events,
+            "report_id": report_id
+        }, port)
+    except Exception as e:
+        logger.exception("Failed to enqueue status.")
+        raise ManageException("Failed to enqueue status.", 500)
+
+# 書き込みキューの立入り状態の登録
+def store_queued_statuses(items) -> tuple:
+    """
+    書き込みキューから取り出した立入り状態を一括登録する（書き込みスレッドから呼び出す）。
+
+    :param items: status_enqueueで追加した立入り状態のリスト
+    :type items: list
+
+    :return: (要素ごとの登録結果, 通知データのリスト)
+    :rtype: tuple
+    """
+    statuses = []
+    for item in items:
+        status = dict(item)
+        try:
+            status['datetime'] = util.deserialize_datetime(item.get('datetime'))
+        except ValueError:
+            status['error'] = ("Invalid datetime format.", 400)
+        statuses.append(status)
+    return store_status_batch(statuses)
+
+# 行のリストを列のリストに変換
+def columns_of(rows, width) -> list:
+    """
+    行のリストを列ごとのリストに変換する（unnestで展開する配列パラメータ用）。
+
+    :param rows: 行のリスト
+    :param width: 列数
+    :rtype: list
+    """
+    if not rows:
+        return [[] for _ in range(width)]
+    return [list(column) for column in zip(*rows)]
+
+# 位置情報の解析
+def parse_location(location) -> tuple:
+    """
+    位置情報の文字列("緯度, 経度")を数値の緯度・経度に変換する。
+    形式または範囲が不正な場合は(None, None)を返す。
+
+    :param location: 位置情報
+    :type location: str
+    :return: (緯度, 経度)
+    :rtype: tuple
+    """
+    if not isinstance(location, str):
+        return None, None
+
+    values = location.split(",")
+    if len(values) != 2:
+        return None, None
+    try:
+        latitude = float(values[0])
+        longitude = float(values[1])
+    except ValueError:
+        return None, None
+
+    # NaN・無限大も範囲外とする
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, None
+    return latitude, longitude
+
+# イベントの位置情報の解析
+def parse_event_locations(events):
+    """
+    イベントの位置情報を解析し、数値の緯度・経度をlatitude/longitudeとしてイベントに設定する。
+    登録時に1度だけ解析し、DB登録と状態通知機能への通知で同じ値を使用する。
+
+    :param events: 立入り検知の情報
+    :type events: list
+    """
+    for event in events or []:
+        if 'location' not in event:
+            continue
+        latitude, longitude = parse_location(event.get('location'))
+        if latitude is None:
+            logger.warning("location value is not valid format. (location: %s)", event.get('location'))
+            continue
+        event['latitude'] = latitude
+        event['longitude'] = longitude
+
+# イベントの登録行作成
+def event_row(entry_status_id, _datetime, event) -> tuple:
+    """
+    イベントの登録行を作成する。位置情報はparse_event_locationsで解析済みであること。
+
+    :rtype: tuple
+    """
+    return (entry_status_id, _datetime, event.get('id'), event.get('type'), event.get('detect'),
+            event.get('location', None), event.get('latitude'), event.get('longitude'))
+
+# イベントの登録
+def insert_events(cursor, event_rows):
+    """
+    障害物の検知情報を1文で登録する。
+
+    :param cursor: カーソル
+    :param event_rows: (ent_stat_id, datetime, object_id, object_type, detect, location, latitude, longitude)のリスト
+    :type event_rows: list
+
+    """
+    prepared_statements.execute(cursor, STMT_EVENT_INSERT, columns_of(event_rows, 8))
+
+# 集計の加算行作成
+def rollup_rows(port, _datetime, detect, events) -> list:
+    """
+    立入り状態1件分の集計の加算行を作成する。
+    立入り状態自体は種別を空文字とし、イベントは障害物の種別ごとに数える。
+
+    :return: (port, datetime, object_type, detect)のリスト
+    :rtype: list
+    """
+    rows = [(port, _datetime, '', bool(detect))]
+    for event in events or []:
+        rows.append((port, _datetime, event.get('type') or '', bool(event.get('detect'))))
+    return rows
+
+# 集計の加算
+def update_rollups(cursor, rows):
+    """
+    ドローンポートごとの分・時・日単位の集計を加算する。
+    立入り状態の登録と同一トランザクション内で呼び出すこと。
+
+    :param cursor: カーソル
+    :param rows: rollup_rowsで作成した(port, datetime, object_type, detect)のリスト
+    :type rows: list
+
+    """
+    if not rows:
+        return
+    prepared_statements.execute(cursor, STMT_ROLLUP_UPDATE, columns_of(rows, 4))
+
+# 最新の立入り状態の更新
+def upsert_latest_status(cursor, rows):
+    """
+    ドローンポートごとの最新の立入り状態を更新する。
+    立入り状態の登録と同一トランザクション内で呼び出すこと。
+    既に登録済みの状態より古い日時の立入り状態では更新しない。
+
+    :param cursor: カーソル
+    :param rows: (port, entry_status_id, datetime, detect, events, report_endpoint)のリスト
+    :type rows: list
+
+    """
+    # 同一ポートを1文で複数回更新できないため、ポートごとに最新の1件に絞る
+    latest = {}
+    for row in rows:
+        port = row[0]
+        if port is None:
+            continue
+        current = latest.get(port)
+        try:
+            newer = current is None or (row[2], row[1]) >= (current[2], current[1])
+        except TypeError:
+            # タイムゾーン有無が混在する日時は比較できないため登録順とする
+            newer = True
+        if newer:
+            latest[port] = row
+
+    if not latest:
+        return
+
+    values = []
+    for port, entry_status_id, _datetime, detect, events, report_endpoint in latest.values():
+        event_list = [
+            {
+                "id": event.get('id'),
+                "type": event.get('type'),
+                "detect": event.get('detect'),
+                "location": event.get('location', None)
+            }
+            for event in events or []
+        ]
+        values.append((port, entry_status_id, _datetime, detect, Json(event_list), report_endpoint))
+
+    query_latest = """
+        INSERT INTO PORT_LATEST_STATUS AS LS (port, entry_status_id, datetime, detect, events, report_endpoint)
+        VALUES %s
+        ON CONFLICT (port) DO UPDATE SET
+            entry_status_id = EXCLUDED.entry_status_id,
+            datetime = EXCLUDED.datetime,
+            detect = EXCLUDED.detect,
+            events = EXCLUDED.events,
+            report_endpoint = EXCLUDED.report_endpoint,
+            updated_at = now()
+        WHERE LS.datetime IS NULL OR LS.datetime <= EXCLUDED.datetime
+    """
+    execute_values(cursor, query_latest, values, page_size=INSERT_PAGE_SIZE)
+
+# 最新の立入り状態の初期データの補完完了確認
+def latest_status_seeded() -> bool:
+    """
+    最新の立入り状態(PORT_LATEST_STATUS)の初期データの補完が完了したかどうかを返す。
+    補完は他のプロセスで行われる場合があるため、完了を確認するまでは呼び出しごとにDBで確認する。
+
+    :rtype: bool
+    """
+    global _latest_status_seeded
+
+    if not _latest_status_seeded:
+        query_seeded = "SELECT 1 FROM DATA_BACKFILL WHERE name = %s"
+        _latest_status_seeded = bool(execute_query(query_seeded, (BACKFILL_PORT_LATEST_STATUS.name,)))
+    return _latest_status_seeded
+
+#最新の立入り状態取得
+def status_latest_get_data() -> list:
+    """
+    全ドローンポートの最新の立入り状態を取得する。
+    初期データの補完の完了までは、PORT_LATEST_STATUSに無いポートがあるため立入り状態の履歴から取得する。
+
+    :rtype: list
+    """
+    if latest_status_seeded():
+        query_latest = """
+            SELECT port, datetime, detect, events, report_endpoint
+            FROM PORT_LATEST_STATUS
+            ORDER BY port
+        """
+    else:
+        query_latest = SQL_LATEST_STATUS_FROM_HISTORY.format(condition="")
+    results = execute_query(query_latest, (), read_only=True)
+
+    data = []
+    for row in results:
+        data.append({
+            "port": row[0],
+            "datetime": row[1],
+            "detect": row[2],
+            "report_endpoint": row[4],
+            "events": row[3] or []
+        })
+
+    logger.debug("status_latest_get_data(): data:" + str(data))
+    return data
+
+#立入り状態の集計取得
+def status_stats_get_data(port=None, bucket=None, _from=None, to=None) -> list:
+    """
+    ドローンポートごとの立入り状態・イベントの件数を集計単位ごとに取得する。
+    登録時に加算した集計のみを参照するため、履歴の件数によらず一定の時間で返却する。
+    集計の追加前の立入り状態は起動後にバックグラウンドで加算するため、加算の完了までは件数に含まれない。
+    集計単位の開始日時が[_from, to)の範囲の集計を返す。日時にタイムゾーンが無い場合はUTCとする。
+
+    :param port: ドローンポートのID
+    :type port: str
+    :param bucket: 集計単位(minute/hour/day)。省略時はhour。
+    :type bucket: str
+    :param _from: 開始日時。省略時は終了日時の24単位前。
+    :type _from: datetime
+    :param to: 終了日時。省略時は現在日時。
+    :type to: datetime
+
+    :rtype: list
+    """
+    logger.debug("status_stats_get_data(): port:" + str(port))
+    logger.debug("status_stats_get_data(): bucket:" + str(bucket))
+    logger.debug("status_stats_get_data(): _from:" + str(_from))
+    logger.debug("status_stats_get_data(): to:" + str(to))
 
-    notification_data = {
+    bucket = bucket or DEFAULT_STATS_BUCKET
+    if bucket not in STATS_BUCKETS:
+        logger.error("Invalid bucket. (bucket: " + str(bucket) + ")")
+        raise ManageException("Invalid bucket. (" + "/".join(STATS_BUCKETS) + ")", 400)
+    seconds = STATS_BUCKETS[bucket]
+
+    if to is None:
+        to = dt.datetime.now(dt.timezone.utc)
+    elif to.tzinfo is None:
+        to = to.replace(tzinfo=dt.timezone.utc)
+    if _from is None:
+        _from = to - dt.timedelta(seconds=seconds * 24)
+    elif _from.tzinfo is None:
+        _from = _from.replace(tzinfo=dt.timezone.utc)
+
+    if _from >= to:
+        logger.error("Invalid range. (from: " + str(_from) + ", to: " + str(to) + ")")
+        raise ManageException("Invalid range. (from must be earlier than to)", 400)
+
+    config = load_config()
+    max_points = config.get(CONFIG_KEY_STATS_MAX_POINTS, DEFAULT_STATS_MAX_POINTS)
+    if (to - _from).total_seconds() / seconds > max_points:
+        logger.error("Too many buckets. (from: " + str(_from) + ", to: " + str(to) + ", bucket: " + bucket + ")")
+        raise ManageException("Too many buckets. (max: " + str(max_points) + ")", 400)
+
+    query_stats = """
+        SELECT port, bucket_start, object_type, detect, count
+        FROM STATUS_ROLLUP
+        WHERE bucket = %s::varchar
+          AND bucket_start >= %s::timestamptz
+          AND bucket_start < %s::timestamptz
+    """
+    params = [bucket, _from, to]
+
+    #port指定の場合
+    if port:
+        query_stats += " AND port = %s::varchar "
+        params.append(port)
+
+    query_stats += " ORDER BY bucket_start, port"
+
+    name = "status_stats_get_" + ("1" if port else "0")
+    results = execute_query(query_stats, params, name, read_only=True)
+
+    # (ポート, 集計単位の開始日時)ごとにまとめる
+    data = []
+    series = {}
+    for row_port, bucket_start, object_type, detect, count in results:
+        key = (row_port, bucket_start)
+        item = series.get(key)
+        if item is None:
+            item = {
+                "port": row_port,
+                "datetime": bucket_start,
+                "statuses": {"detect": 0, "undetect": 0},
+                "events": {}
+            }
+            series[key] = item
+            data.append(item)
+        if object_type:
+            counts = item["events"].setdefault(object_type, {"detect": 0, "undetect": 0})
+        else:
+            counts = item["statuses"]
+        counts["detect" if detect else "undetect"] += count
+
+    logger.debug("status_stats_get_data(): points:" + str(len(data)))
+    return data
+
+# 範囲指定の解析
+def parse_bbox(bbox) -> tuple:
+    """
+    範囲指定の文字列("南端の緯度,西端の経度,北端の緯度,東端の経度")を数値に変換する。
+
+    :param bbox: 範囲指定
+    :type bbox: str
+    :return: (南端の緯度, 西端の経度, 北端の緯度, 東端の経度)
+    :rtype: tuple
+    """
+    values = str(bbox).split(",")
+    try:
+        if len(values) != 4:
+            raise ValueError(bbox)
+        south, west, north, east = [float(v) for v in values]
+    except ValueError:
+        logger.error("Invalid bbox format. (bbox: " + str(bbox) + ")")
+        raise ManageException("Invalid bbox format.", 400)
+
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        logger.error("Invalid bbox range. (bbox: " + str(bbox) + ")")
+        raise ManageException("Invalid bbox range.", 400)
+    return south, west, north, east
+
+#範囲内のイベント取得
+def events_get_data(bbox, since=None, port=None, limit=None) -> list:
+    """
+    指定した範囲内で検知したイベント（障害物の検知情報）を新しい順に取得する。
+    緯度・経度のGiSTインデックスで範囲内のイベントを絞り込む。
+
+    :param bbox: 範囲指定("南端の緯度,西端の経度,北端の緯度,東端の経度")
+    :type bbox: str
+    :param since: 検知日時。指定した日時以降のイベントを返す。
+    :type since: datetime
+    :param port: ドローンポートのID
+    :type port: str
+    :param limit: 取得件数（省略時はmax_count）
+    :type limit: int
+
+    :rtype: list
+    """
+    logger.debug("events_get_data(): bbox:" + str(bbox))
+    logger.debug("events_get_data(): since:" + str(since))
+    logger.debug("events_get_data(): port:" + str(port))
+    logger.debug("events_get_data(): limit:" + str(limit))
+
+    south, west, north, east = parse_bbox(bbox)
+
+    config = load_config()
+    _max_count, limit = resolve_status_limit(config, limit)
+
+    query_events = """
+        SELECT
+            ES.port,
+            EV.datetime,
+            EV.object_id,
+            EV.object_type,
+            EV.detect,
+            EV.location,
+            EV.latitude,
+            EV.longitude
+        FROM EVENT_INFORMATION EV
+        JOIN ENTRY_STATUS_INFORMATION ES
+            ON ES.id = EV.ent_stat_id
+        WHERE EV.latitude IS NOT NULL AND EV.longitude IS NOT NULL
+          AND point(EV.longitude, EV.latitude) <@ box(point(%s::float8, %s::float8), point(%s::float8, %s::float8))
+    """
+    params = [west, south, east, north]
+
+    #since指定の場合
+    if since:
+        query_events += " AND EV.datetime >= %s::timestamptz "
+        params.append(since)
+
+    #port指定の場合
+    if port:
+        query_events += " AND ES.port = %s::varchar "
+        params.append(port)
+
+    query_events += " ORDER BY EV.datetime DESC, EV.id DESC LIMIT %s::integer"
+    params.append(limit)
+
+    name = "events_get_" + "".join("1" if c else "0" for c in (since, port))
+    results = execute_query(query_events, params, name, read_only=True)
+
+    data = []
+    for row in results:
+        data.append({
+            "port": row[0],
+            "datetime": row[1],
+            "id": row[2],
+            "type": row[3],
+            "detect": row[4],
+            "location": row[5],
+            "latitude": row[6],
+            "longitude": row[7]
+        })
+
+    logger.debug("events_get_data(): count:" + str(len(data)))
+    return data
+
+# 状態通知機能への通知データ作成
+def build_notification(port, datetime, detect, events, report_endpoint) -> dict:
+    """
+    状態通知機能へ送信する通知データを作成
+
+    :param port: ドローンポートのID
+    :param datetime: 立入り検知の日時
+    :param detect: 立入り状態の代表値
+    :param events: 立入り検知の情報
+    :param report_endpoint: レポートファイルのエンドポイント
+
+    :rtype: dict
+    """
+    return {
         "port": port,
         "datetime": str(datetime),
         "detect": detect,
@@ -304,11 +2105,252 @@ def notify(port, datetime, detect, events, report_endpoint):
         "report_endpoint": report_endpoint
     }
 
-    status_api_url = NOTIFY_API_URL
-    params = notification_data
-    
+# 状態通知機能への通知の送信
+def deliver_notifications(notifications):
+    """
+    状態通知機能のAPIを実行（アウトボックスの送信スレッドから呼び出す）
+    1件の場合は通知API、複数件の場合は一括通知APIで1リクエストにまとめて送信する。
+
+    :param notifications: build_notificationで作成した通知データのリスト
+    :type notifications: list
+
+    """
+    logger.debug("deliver_notifications(): count:" + str(len(notifications)))
+
+    if not notifications:
+        return
+
+    if len(notifications) == 1:
+        post_notification(NOTIFY_API_URL, notifications[0])
+    else:
+        post_notification(NOTIFY_BATCH_API_URL, notifications)
+    return
+
+# 通知のアウトボックスへの追加
+def enqueue_notifications(cursor, notifications):
+    """
+    状態通知機能への通知をアウトボックスに追加する。
+    立入り状態の登録と同一トランザクション内で呼び出し、コミット後にwake_outbox_dispatchersを呼び出すこと。
+
+    :param cursor: カーソル
+    :param notifications: build_notificationで作成した通知データのリスト
+    :type notifications: list
+
+    """
+    if not notifications:
+        return
+    prepared_statements.execute(cursor, STMT_OUTBOX_INSERT, (
+        [notification["port"] for notification in notifications],
+        [Json(notification) for notification in notifications]))
+
+# 状態変化の判定取得
+def get_state_tracker():
+    """
+     ドローンポートごとの状態変化の判定取得
+     設定ファイルでstate_suppression_enabledが有効な場合、初回呼び出し時に生成し、以降はプロセス内で共有する。
+
+    :return: 状態変化の判定（無効の場合はNone）
+    :rtype: StateTracker
+
+    """
+    global _state_tracker
+
+    if _state_tracker is None:
+        with _state_tracker_lock:
+            if _state_tracker is None:
+                config = load_config()
+                if not config.get(CONFIG_KEY_STATE_SUPPRESSION_ENABLED, False):
+                    _state_tracker = False
+                else:
+                    _state_tracker = state_tracker.StateTracker(load_latest_states)
+
+    return _state_tracker or None
+
+# 状態変化の判定
+def observe_states(statuses) -> list:
+    """
+    立入り状態が直前の状態からの変化を含むかを到着順に判定する。
+    状態変化の判定が無効の場合は全て変化ありとする。
+
+    :param statuses: (ポート, 日時, 代表値, イベントのリスト)のリスト
+    :type statuses: list
+
+    :return: 要素ごとの判定結果（state_tracker.TRANSITION, UNCHANGED, STALE）
+    :rtype: list
+    """
+    tracker = get_state_tracker()
+    if tracker is None:
+        return [state_tracker.TRANSITION] * len(statuses)
+    return tracker.observe(statuses)
+
+# 変化のない立入り状態を登録するか
+def store_unchanged_states() -> bool:
+    """
+    状態変化の判定が有効な場合に、変化のない立入り状態を登録するかどうかを返す（通知は行わない）。
+
+    :rtype: bool
+    """
+    return load_config().get(CONFIG_KEY_STATE_SUPPRESSION_STORE_UNCHANGED, True)
+
+# 登録失敗時の状態の破棄
+@contextmanager
+def state_guard(ports):
+    """
+    with文内で例外が発生した場合に、判定済みのポートの状態を破棄する。
+    破棄した状態は次回の判定時にDBの最新の立入り状態から復元する。
+
+    :param ports: ドローンポートのIDのリスト
+    :type ports: list
+
+    """
+    try:
+        yield
+    except Exception:
+        if _state_tracker:
+            _state_tracker.forget(ports)
+        raise
+
+# 最新の状態の読み込み
+def load_latest_states(ports) -> dict:
+    """
+    ドローンポートごとの最新の立入り状態をDBから読み込む（状態変化の判定の復元に使用する）。
+    登録直後の状態を読むため、読み取り用レプリカは使用しない。
+    初期データの補完の完了までは立入り状態の履歴から読み込む。
+
+    :param ports: ドローンポートのIDのリスト
+    :type ports: list
+
+    :return: ポート -> (日時, 代表値, イベントのリスト)
+    :rtype: dict
+    """
+    if latest_status_seeded():
+        query_latest = """
+            SELECT port, datetime, detect, events
+            FROM PORT_LATEST_STATUS
+            WHERE port = ANY(%s)
+        """
+    else:
+        query_latest = SQL_LATEST_STATUS_FROM_HISTORY.format(condition="AND port = ANY(%s)")
+    results = execute_query(query_latest, (list(ports),))
+    return {row[0]: (row[1], row[2], row[3] or []) for row in results}
+
+# 状態変化の判定の統計情報取得
+def get_state_tracker_stats() -> dict:
+    """
+     状態変化の判定の統計情報取得
+     判定が無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    tracker = get_state_tracker()
+    if tracker is None:
+        return {}
+    return tracker.stats()
+
+# S3クライアント取得
+def get_s3_client():
+    """
+     S3クライアント取得
+     初回呼び出し時に設定ファイルの接続プール・タイムアウト・再試行・エンドポイントの設定で生成し、以降はプロセス内で共有する。
+
+    :return: S3クライアント
+    :rtype: S3Client
+
+    """
+    global _s3_client
+
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                config = load_config()
+                try:
+                    _s3_client = s3_client.S3Client(
+                        endpoint_url=config.get(CONFIG_KEY_S3_ENDPOINT_URL) or None,
+                        region_name=config.get(CONFIG_KEY_S3_REGION_NAME) or None,
+                        max_pool_connections=config.get(CONFIG_KEY_S3_MAX_POOL_CONNECTIONS, s3_client.DEFAULT_MAX_POOL_CONNECTIONS),
+                        connect_timeout=config.get(CONFIG_KEY_S3_CONNECT_TIMEOUT, s3_client.DEFAULT_CONNECT_TIMEOUT),
+                        read_timeout=config.get(CONFIG_KEY_S3_READ_TIMEOUT, s3_client.DEFAULT_READ_TIMEOUT),
+                        retry_mode=config.get(CONFIG_KEY_S3_RETRY_MODE, s3_client.DEFAULT_RETRY_MODE),
+                        max_attempts=config.get(CONFIG_KEY_S3_MAX_ATTEMPTS, s3_client.DEFAULT_MAX_ATTEMPTS),
+                        addressing_style=config.get(CONFIG_KEY_S3_ADDRESSING_STYLE) or None)
+                except Exception as e:
+                    logger.exception("Failed to create S3 client.")
+                    raise ManageException("Failed to create S3 client.", 500)
+
+    return _s3_client
+
+# S3クライアントの統計情報取得
+def get_s3_stats() -> dict:
+    """
+     S3クライアントの統計情報取得
+     クライアント未生成の場合は空の辞書を返す。
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    if _s3_client is None:
+        return {}
+    return _s3_client.stats()
+
+# HTTPクライアント取得
+def get_http_client():
+    """
+     HTTPクライアント取得
+     初回呼び出し時に設定ファイルの接続プール・タイムアウト・再試行の設定で生成し、以降はプロセス内で共有する。
+
+    :return: HTTPクライアント
+    :rtype: HttpClient
+
+    """
+    global _http_client
+
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                config = load_config()
+                try:
+                    _http_client = http_client.HttpClient(
+                        pool_connections=config.get(CONFIG_KEY_HTTP_POOL_CONNECTIONS, http_client.DEFAULT_POOL_CONNECTIONS),
+                        pool_maxsize=config.get(CONFIG_KEY_HTTP_POOL_MAXSIZE, http_client.DEFAULT_POOL_MAXSIZE),
+                        connect_timeout=config.get(CONFIG_KEY_HTTP_CONNECT_TIMEOUT, http_client.DEFAULT_CONNECT_TIMEOUT),
+                        read_timeout=config.get(CONFIG_KEY_HTTP_READ_TIMEOUT, http_client.DEFAULT_READ_TIMEOUT),
+                        retry_total=config.get(CONFIG_KEY_HTTP_RETRY_TOTAL, http_client.DEFAULT_RETRY_TOTAL),
+                        retry_backoff=config.get(CONFIG_KEY_HTTP_RETRY_BACKOFF, http_client.DEFAULT_RETRY_BACKOFF),
+                        retry_status=config.get(CONFIG_KEY_HTTP_RETRY_STATUS, http_client.DEFAULT_RETRY_STATUS),
+                        retry_post=config.get(CONFIG_KEY_HTTP_RETRY_POST, False))
+                except (ValueError, TypeError) as e:
+                    logger.error("Invalid configuration.(http: " + str(e) + ")")
+                    raise ManageException("Invalid configuration.(http)", 500)
+
+    return _http_client
+
+# HTTPクライアントの統計情報取得
+def get_http_stats() -> dict:
+    """
+     HTTPクライアントの送信先ホストごとの統計情報取得
+
+    :return: 統計情報
+    :rtype: dict
+
+    """
+    return get_http_client().stats()
+
+# 状態通知機能へのPOST
+def post_notification(status_api_url, params):
+    """
+    状態通知機能へ通知データをPOSTする
+
+    :param status_api_url: 送信先URL
+    :type status_api_url: str
+    :param params: 通知データ
+    :type params: dict or list
+
+    """
     try:
-        response = requests.post(status_api_url, json=params)
+        response = get_http_client().post(status_api_url, json=params)
     except Timeout:
         logger.exception("Timeout occured.")
         raise ManageException("Timeout occuered.", 500)
@@ -320,7 +2362,7 @@ def notify(port, datetime, detect, events, report_endpoint):
         logger.error("notify request error. status code:" + str(response.status_code) + ", " + str(response.text))
         raise ManageException(str(response.text), response.status_code)
         
-    logger.debug("notify(): response status:" + str(response.status_code))
+    logger.debug("post_notification(): response status:" + str(response.status_code))
     return 
 
 
@@ -341,12 +2383,10 @@ def get_report(filename):
         logger.error("Failed to load config file. bucket_name parameter is invalid.")
         raise ManageException("Failed to load config file. bucket_name parameter is invalid.", 500)
     
+    s3 = get_s3_client()
     try:      
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucket_name)
-        report_file = bucket.Object(filename).get()
-        report_data = report_file["Body"].read()
-    except s3.meta.client.exceptions.NoSuchKey as e:
+        report_data = s3.get_object(bucket_name, filename)
+    except s3.client.exceptions.NoSuchKey as e:
         logger.exception("Not found report file.")
         raise ManageException("Not found report file.", 404)
     except Exception as e:
@@ -390,9 +2430,7 @@ def put_report(report, filename) -> str:
         raise ManageException("Failed to load config file. endpoint_url parameter is invalid.", 500)
     
     try:      
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucket_name)
-        bucket.upload_fileobj(report, filename)
+        get_s3_client().upload_fileobj(report, bucket_name, filename)
     
     except Exception as e:
         logger.exception("Faild to upload a report file.")
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from swagger_server.service import service
+from swagger_server.utilities.db_pool import ConnectionPool
+
+
+class FakeCursor(object):
+    """
+    実行したクエリを記録し、FakeDatabaseの応答関数の結果を返すカーソル
+    """
+
+    def __init__(self, connection, name=None):
+        self.connection = connection
+        self.name = name
+        self.itersize = 2000
+        self.rowcount = 0
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        database = self.connection.database
+        database.queries.append((query, params))
+        self._rows = list(database.respond(query, params) or [])
+        self.rowcount = len(self._rows)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def __iter__(self):
+        while self._rows:
+            yield self._rows.pop(0)
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+
+    def __init__(self, database):
+        self.database = database
+        self.prepared = set()
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, name=None, **kwargs):
+        return FakeCursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def get_transaction_status(self):
+        return 0
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeDatabase(object):
+    """
+    DBの代わりにクエリを記録するコネクションの生成元
+    応答関数は(クエリ, パラメータ)を受け取り、結果の行のリストを返す。
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.respond = lambda query, params: []
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def executed(self, text) -> list:
+        return [(query, params) for query, params in self.queries if text in query]
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """
+    設定ファイルの代わりの設定（テスト内で変更できる）
+    プロセス内で共有するオブジェクトは初期化し、テストごとに設定から生成させる。
+    """
+    config = {"status_cache_enabled": False}
+    monkeypatch.setattr(service, "load_config", lambda: config)
+    for name in ("_db_pool", "_replica_router", "_status_cache", "_state_tracker", "_http_client",
+                 "_s3_client", "_ingest_queue", "_latest_status_seeded"):
+        monkeypatch.setattr(service, name, None)
+    return config
+
+
+@pytest.fixture
+def db(config, monkeypatch):
+    """
+    接続数1のコネクションプールで払い出すFakeDatabase
+    コネクションを保持したまま別のコネクションを払い出すと待機時間の経過後に例外となる。
+    """
+    database = FakeDatabase()
+    pool = ConnectionPool(database.connect, min_size=0, max_size=1, wait_timeout=0.2)
+    monkeypatch.setattr(service, "_db_pool", pool)
+    return database
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from swagger_server.utilities.backfill import Backfill, BackfillRunner
+
+BACKFILL_TEST = Backfill("test", "entry_status_information", "UPDATE test %(start)s %(end)s")
+BACKFILL_TEST_RESUMABLE = Backfill(
+    "test", "entry_status_information", "INSERT INTO test %(start)s %(end)s", resumable=True)
+
+
+def new_respond(completed=False, ids=(1, 10), bound=None):
+    def respond(query, params):
+        if query.startswith("SELECT 1 FROM data_backfill"):
+            return [(1,)] if completed else []
+        if query.startswith("SELECT min(id), max(id)"):
+            return [ids]
+        if query.startswith("SELECT max_id, position FROM data_backfill_range"):
+            return [bound] if bound is not None else []
+        return []
+    return respond
+
+
+def ranges(db, text):
+    return [(params["start"], params["end"]) for _query, params in db.executed(text)]
+
+
+def run(db, backfill, batch_size=4):
+    runner = BackfillRunner(None, [backfill], batch_size=batch_size, pause=0)
+    runner.run_backfill(db.connect(), backfill)
+    return runner
+
+
+def test_backfill_runs_in_id_ranges(db):
+    db.respond = new_respond(ids=(1, 10))
+    runner = run(db, BACKFILL_TEST)
+
+    assert ranges(db, "UPDATE test") == [(1, 5), (5, 9), (9, 11)]
+    assert len(db.executed("INSERT INTO data_backfill ")) == 1
+    assert runner.stats()["test"]["completed"]
+
+
+def test_completed_backfill_is_skipped(db):
+    db.respond = new_respond(completed=True)
+    run(db, BACKFILL_TEST)
+    assert db.executed("UPDATE test") == []
+
+
+def test_resumable_backfill_stops_at_recorded_max_id(db):
+    # 記録した最大idより後の行は登録時に加算済みのため対象外とする
+    db.respond = new_respond(ids=(1, 20), bound=(6, None))
+    run(db, BACKFILL_TEST_RESUMABLE)
+
+    assert ranges(db, "INSERT INTO test") == [(1, 5), (5, 7)]
+    assert [params for _query, params in db.executed("UPDATE data_backfill_range")] == [(5, "test"), (7, "test")]
+
+
+def test_resumable_backfill_resumes_from_position(db):
+    db.respond = new_respond(ids=(1, 20), bound=(10, 5))
+    run(db, BACKFILL_TEST_RESUMABLE)
+    assert ranges(db, "INSERT INTO test") == [(5, 9), (9, 11)]
+
+
+def test_resumable_backfill_without_rows_at_migration(db):
+    db.respond = new_respond(ids=(1, 20), bound=(None, None))
+    run(db, BACKFILL_TEST_RESUMABLE)
+
+    assert db.executed("INSERT INTO test") == []
+    assert len(db.executed("INSERT INTO data_backfill ")) == 1
+
+
+def test_resumable_backfill_without_range_is_skipped(db):
+    db.respond = new_respond(ids=(1, 20))
+    run(db, BACKFILL_TEST_RESUMABLE)
+
+    assert db.executed("INSERT INTO test") == []
+    assert db.executed("INSERT INTO data_backfill ") == []
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from swagger_server.utilities.db_pool import ConnectionPool
+from swagger_server.utilities.manage_exception import ManageException
+
+
+class FakeCursor(object):
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise Exception("connection lost")
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def get_transaction_status(self):
+        return 2 if self.in_transaction else 0
+
+    def close(self):
+        self.closed = 1
+
+
+def new_pool(**kwargs):
+    connections = []
+
+    def connect():
+        conn = FakeConnection()
+        connections.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), connections
+
+
+def test_min_size_connections_are_created():
+    pool, connections = new_pool(min_size=2, max_size=4)
+    assert len(connections) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_returned_connection_is_reused():
+    pool, connections = new_pool(min_size=0, max_size=2)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(connections) == 1
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    pool, _connections = new_pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.in_transaction = True
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert pool.getconn() is conn
+
+
+def test_closed_connection_is_discarded():
+    pool, connections = new_pool(min_size=0, max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.closed = 1
+            raise RuntimeError()
+
+    assert pool.stats()["discarded"] == 1
+    assert pool.getconn() is not conn
+    assert len(connections) == 2
+
+
+def test_stale_connection_is_replaced():
+    pool, connections = new_pool(min_size=1, max_size=1, check_interval=0)
+    connections[0].broken = True
+    conn = pool.getconn()
+    assert conn is connections[1]
+    assert connections[0].closed
+
+
+def test_exhausted_pool_times_out():
+    pool, _connections = new_pool(min_size=0, max_size=1, wait_timeout=0.05)
+    pool.getconn()
+    with pytest.raises(ManageException) as e:
+        pool.getconn()
+    assert e.value.http_status_code == 503
+    assert pool.stats()["waits"] == 1
+
+
+def test_waiting_getconn_receives_returned_connection():
+    pool, _connections = new_pool(min_size=0, max_size=1, wait_timeout=5)
+    conn = pool.getconn()
+    received = []
+    waiter = threading.Thread(target=lambda: received.append(pool.getconn()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.putconn(conn)
+    waiter.join(5)
+
+    assert received == [conn]
+    assert pool.stats()["in_use"] == 1
+
+
+def test_idle_connections_expire_down_to_min_size():
+    pool, connections = new_pool(min_size=1, max_size=3, idle_timeout=0)
+    held = [pool.getconn() for _ in range(3)]
+    for conn in held:
+        pool.putconn(conn)
+
+    pool.putconn(pool.getconn())
+    assert pool.stats()["idle"] == 1
+    assert sum(1 for conn in connections if conn.closed) == 2
+
+
+def test_failed_connect_releases_slot():
+    def connect():
+        raise Exception("connection refused")
+
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    with pytest.raises(Exception):
+        pool.getconn()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_closed_pool_rejects_getconn():
+    pool, connections = new_pool(min_size=1, max_size=1)
+    pool.closeall()
+    assert connections[0].closed
+    with pytest.raises(ManageException):
+        pool.getconn()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+
+from swagger_server.service import service
+from swagger_server.utilities.manage_exception import ManageException
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_parse_bbox():
+    assert service.parse_bbox("35.0,139.0,36.5,140.25") == (35.0, 139.0, 36.5, 140.25)
+
+
+@pytest.mark.parametrize("bbox", ["35,139,36", "a,b,c,d", "36,139,35,140", "35,141,36,140", "-91,0,0,0", "0,0,0,181"])
+def test_invalid_bbox_is_rejected(bbox):
+    with pytest.raises(ManageException) as e:
+        service.parse_bbox(bbox)
+    assert e.value.http_status_code == 400
+
+
+def test_events_are_queried_in_box(config, db):
+    row = ("port1", T0, "obj1", "person", True, "35.5,139.5", 35.5, 139.5)
+    db.respond = lambda query, params: [row] if query.startswith("EXECUTE") else []
+
+    data = service.events_get_data("35,139,36,140", since=T0, port="port1", limit=5)
+
+    assert data == [{"port": "port1", "datetime": T0, "id": "obj1", "type": "person", "detect": True,
+                     "location": "35.5,139.5", "latitude": 35.5, "longitude": 139.5}]
+    # boxは(経度, 緯度)の点で指定する
+    assert db.executed("EXECUTE events_get_11")[0][1] == [139.0, 35.0, 140.0, 36.0, T0, "port1", 5]
+    query = db.executed("PREPARE events_get_11 AS")[0][0]
+    assert "point(EV.longitude, EV.latitude) <@ box(" in query
+
+
+def test_events_without_filters(config, db):
+    service.events_get_data("35,139,36,140")
+
+    query = db.executed("PREPARE events_get_00 AS")[0][0]
+    assert "EV.datetime >=" not in query
+    assert "ES.port =" not in query
+    assert db.executed("EXECUTE events_get_00")[0][1] == [139.0, 35.0, 140.0, 36.0, service.DEFAULT_MAX_COUNT]
+
+
+def test_invalid_bbox_does_not_query(config, db):
+    with pytest.raises(ManageException):
+        service.events_get_data("35,139")
+    assert db.queries == []
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import time
+
+import pytest
+
+from swagger_server.utilities.ingest_queue import IngestQueue, IngestWriter
+
+
+class TransientError(Exception):
+    pass
+
+
+@pytest.fixture
+def ingest_queue(tmp_path):
+    return IngestQueue(str(tmp_path / "ingest.db"), lease_timeout=60)
+
+
+def payloads(entries):
+    return [e[1] for e in entries]
+
+
+def test_claim_in_enqueue_order(ingest_queue):
+    for i in range(5):
+        ingest_queue.put({"n": i}, "port" + str(i))
+
+    assert payloads(ingest_queue.claim(3)) == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert payloads(ingest_queue.claim(3)) == [{"n": 3}, {"n": 4}]
+
+
+def test_leased_entries_are_not_claimed_again(ingest_queue):
+    ingest_queue.put({"n": 0})
+    assert len(ingest_queue.claim(10)) == 1
+    assert ingest_queue.claim(10) == []
+
+
+def test_leased_port_blocks_later_entries(ingest_queue):
+    ingest_queue.put({"n": 0}, "port1")
+    first = ingest_queue.claim(1)
+    ingest_queue.put({"n": 1}, "port1")
+    ingest_queue.put({"n": 2}, "port2")
+
+    # port1の前の要素がリース中のため、別の書き込みスレッドはport1の後続を取り出さない
+    assert payloads(ingest_queue.claim(10)) == [{"n": 2}]
+    ingest_queue.ack(first)
+    assert payloads(ingest_queue.claim(10)) == [{"n": 1}]
+
+
+def test_released_entry_is_claimed_before_later_entries_of_port(ingest_queue):
+    ingest_queue.put({"n": 0}, "port1")
+    ingest_queue.put({"n": 1}, "port1")
+    first = ingest_queue.claim(1)
+    assert ingest_queue.claim(1) == []
+
+    ingest_queue.release(first, count_attempt=False)
+    assert payloads(ingest_queue.claim(1)) == [{"n": 0}]
+    assert ingest_queue.claim(1) == []
+
+
+def test_entry_without_port_blocks_all_later_entries(ingest_queue):
+    ingest_queue.put({"n": 0})
+    ingest_queue.claim(1)
+    ingest_queue.put({"n": 1}, "port1")
+    assert ingest_queue.claim(10) == []
+
+
+def test_queue_file_without_port_column_is_migrated(tmp_path):
+    path = str(tmp_path / "ingest.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            enqueued_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT NULL,
+            lease_until REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT INTO queue (payload, enqueued_at) VALUES ('{\"n\": 0}', 0)")
+    conn.commit()
+    conn.close()
+
+    ingest_queue = IngestQueue(path)
+    ingest_queue.put({"n": 1}, "port1")
+    assert payloads(ingest_queue.claim(10)) == [{"n": 0}, {"n": 1}]
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    ingest_queue = IngestQueue(str(tmp_path / "ingest.db"), lease_timeout=0.01)
+    ingest_queue.put({"n": 0})
+    first = ingest_queue.claim(10)
+    time.sleep(0.02)
+
+    second = ingest_queue.claim(10)
+    assert [e[0] for e in second] == [e[0] for e in first]
+
+
+def test_ack_removes_entries(ingest_queue):
+    ingest_queue.put({"n": 0})
+    ingest_queue.put({"n": 1})
+    entries = ingest_queue.claim(10)
+    ingest_queue.ack(entries[:1], flush_time=0.1)
+
+    stats = ingest_queue.stats()
+    assert stats["depth"] == 1
+    assert stats["flushed"] == 1
+    assert stats["flushes"] == 1
+
+
+def test_release_counts_attempt(ingest_queue):
+    ingest_queue.put({"n": 0})
+    ingest_queue.release(ingest_queue.claim(10))
+    assert ingest_queue.claim(10)[0][3] == 1
+
+
+def test_release_without_counting_attempt(ingest_queue):
+    ingest_queue.put({"n": 0})
+    ingest_queue.release(ingest_queue.claim(10), count_attempt=False)
+    assert ingest_queue.claim(10)[0][3] == 0
+
+
+def test_released_entries_keep_order(ingest_queue):
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    ingest_queue.release(ingest_queue.claim(10))
+    assert payloads(ingest_queue.claim(10)) == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_fail_moves_entry_to_failed_table(ingest_queue):
+    ingest_queue.put({"n": 0})
+    ingest_queue.fail(ingest_queue.claim(10)[0], 400, "Bad request.")
+
+    stats = ingest_queue.stats()
+    assert stats["depth"] == 0
+    assert stats["failed_depth"] == 1
+    assert ingest_queue.claim(10) == []
+
+
+def new_writer(ingest_queue, store, **kwargs):
+    return IngestWriter(ingest_queue, store, flush_interval=0.01,
+                        is_transient=lambda error: isinstance(error, TransientError), **kwargs)
+
+
+def test_flush_stores_batch_and_acks(ingest_queue):
+    stored = []
+
+    def store(items):
+        stored.append(items)
+        return [{"status_code": 204} for _ in items], None
+
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    new_writer(ingest_queue, store).flush(ingest_queue.claim(10))
+
+    assert stored == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+    assert ingest_queue.stats()["depth"] == 0
+
+
+def test_flush_moves_rejected_entries_to_failed_table(ingest_queue):
+    def store(items):
+        return [{"status_code": 400 if item["n"] == 1 else 204, "message": "invalid"} for item in items], None
+
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    new_writer(ingest_queue, store).flush(ingest_queue.claim(10))
+
+    stats = ingest_queue.stats()
+    assert stats["depth"] == 0
+    assert stats["failed_depth"] == 1
+
+
+def test_transient_error_releases_batch_without_counting_attempts(ingest_queue):
+    calls = []
+
+    def store(items):
+        calls.append(items)
+        raise TransientError()
+
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    new_writer(ingest_queue, store).flush(ingest_queue.claim(10))
+
+    # 一時的なエラーでは1件ずつの登録を行わない
+    assert len(calls) == 1
+    entries = ingest_queue.claim(10)
+    assert payloads(entries) == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert [e[3] for e in entries] == [0, 0, 0]
+
+
+def test_data_error_isolates_bad_entry(ingest_queue):
+    def store(items):
+        if any(item["n"] == 1 for item in items):
+            raise ValueError("bad entry")
+        return [{"status_code": 204} for _ in items], None
+
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    new_writer(ingest_queue, store).flush(ingest_queue.claim(10))
+
+    entries = ingest_queue.claim(10)
+    assert payloads(entries) == [{"n": 1}]
+    assert entries[0][3] == 1
+    assert ingest_queue.stats()["flushed"] == 2
+
+
+def test_transient_error_during_isolation_releases_rest(ingest_queue):
+    def store(items):
+        if len(items) > 1:
+            raise ValueError("bad batch")
+        if items[0]["n"] == 1:
+            raise TransientError()
+        return [{"status_code": 204}], None
+
+    for i in range(3):
+        ingest_queue.put({"n": i})
+    new_writer(ingest_queue, store).flush(ingest_queue.claim(10))
+
+    entries = ingest_queue.claim(10)
+    assert payloads(entries) == [{"n": 1}, {"n": 2}]
+    assert [e[3] for e in entries] == [0, 0]
+
+
+def test_entry_exceeding_max_attempts_is_failed(ingest_queue):
+    def store(items):
+        raise ValueError("bad entry")
+
+    ingest_queue.put({"n": 0})
+    writer = new_writer(ingest_queue, store, max_attempts=2)
+    writer.flush(ingest_queue.claim(10))
+    writer.flush(ingest_queue.claim(10))
+
+    stats = ingest_queue.stats()
+    assert stats["depth"] == 0
+    assert stats["failed_depth"] == 1
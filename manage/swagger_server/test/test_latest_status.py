@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from swagger_server.service import service
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+EVENTS = [{"id": "a", "type": "person", "detect": True, "location": None}]
+
+
+def new_respond(seeded):
+    def respond(query, params):
+        if "FROM DATA_BACKFILL" in query:
+            return [(1,)] if seeded else []
+        if "PORT_LATEST_STATUS" in query or "ENTRY_STATUS_INFORMATION" in query:
+            return [("port1", T0, True, EVENTS, "http://report")]
+        return []
+    return respond
+
+
+def test_latest_is_read_from_history_until_seeded(db):
+    db.respond = new_respond(seeded=False)
+
+    data = service.status_latest_get_data()
+
+    assert data == [{"port": "port1", "datetime": T0, "detect": True, "report_endpoint": "http://report",
+                     "events": EVENTS}]
+    assert db.executed("FROM PORT_LATEST_STATUS") == []
+    assert len(db.executed("DISTINCT ON (port)")) == 1
+
+
+def test_latest_is_read_from_read_model_after_seeded(db):
+    db.respond = new_respond(seeded=True)
+
+    service.status_latest_get_data()
+    service.status_latest_get_data()
+
+    assert len(db.executed("FROM PORT_LATEST_STATUS")) == 2
+    assert db.executed("DISTINCT ON (port)") == []
+    # 完了を確認した後は再確認しない
+    assert len(db.executed("FROM DATA_BACKFILL")) == 1
+
+
+def test_seed_completion_is_rechecked_until_completed(db):
+    seeded = []
+    respond = new_respond(seeded=True)
+    db.respond = lambda query, params: respond(query, params) if seeded or "DATA_BACKFILL" not in query else []
+
+    service.status_latest_get_data()
+    seeded.append(True)
+    service.status_latest_get_data()
+
+    assert len(db.executed("FROM DATA_BACKFILL")) == 2
+    assert len(db.executed("FROM PORT_LATEST_STATUS")) == 1
+
+
+def test_state_tracker_loads_from_history_until_seeded(db):
+    db.respond = new_respond(seeded=False)
+
+    states = service.load_latest_states(["port1"])
+
+    assert states == {"port1": (T0, True, EVENTS)}
+    query, params = db.executed("DISTINCT ON (port)")[0]
+    assert "AND port = ANY(%s)" in query
+    assert params == (["port1"],)
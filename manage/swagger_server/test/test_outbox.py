@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from swagger_server.utilities import outbox
+from swagger_server.utilities.outbox import OutboxDispatcher, in_port_order
+
+
+class FakeCursor(object):
+
+    def __init__(self):
+        self.retried = []
+
+    def execute(self, query, params=None):
+        if query == outbox.SQL_OUTBOX_RETRY:
+            self.retried.append(params[2])
+
+
+def row(id, port, ready=True, attempts=0):
+    return (id, port, {"id": id}, attempts, ready)
+
+
+def test_in_port_order_keeps_ready_prefix_per_port():
+    rows = [
+        row(1, "port1"),
+        row(2, "port2", ready=False),
+        row(3, "port1"),
+        row(4, "port2"),
+        row(5, "port1", ready=False),
+        row(6, "port1"),
+        row(7, None),
+    ]
+    assert [r[0] for r in in_port_order(rows)] == [1, 3, 7]
+
+
+def test_deliver_each_blocks_port_after_failure():
+    def deliver(items):
+        if items[0]["id"] == 2:
+            raise Exception("failed")
+
+    dispatcher = OutboxDispatcher(pool=None, deliver=deliver)
+    cursor = FakeCursor()
+    rows = [row(1, "port1"), row(2, "port1"), row(3, "port2"), row(4, "port1")]
+
+    assert dispatcher._deliver_each(cursor, rows) == [1, 3]
+    assert cursor.retried == [2]
+
+
+def test_deliver_each_stops_after_consecutive_failures():
+    def deliver(items):
+        raise Exception("unavailable")
+
+    dispatcher = OutboxDispatcher(pool=None, deliver=deliver)
+    cursor = FakeCursor()
+    rows = [row(i, "port" + str(i)) for i in range(1, 6)] + [row(6, "port5")]
+
+    assert dispatcher._deliver_each(cursor, rows) == []
+    # 連続して失敗した後は送信せず、各ポートの先頭のみ再送待ちとする
+    assert cursor.retried == [1, 2, 3, 4, 5]
+    assert dispatcher.stats["failed_attempts"] == 5
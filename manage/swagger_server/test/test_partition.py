@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from swagger_server.utilities import partition
+
+UTC = datetime.timezone.utc
+
+
+def test_period_start_converts_to_utc():
+    value = datetime.datetime(2024, 3, 1, 5, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=9)))
+    assert partition.period_start(value, partition.INTERVAL_DAILY) == datetime.datetime(2024, 2, 29, tzinfo=UTC)
+    assert partition.period_start(value, partition.INTERVAL_MONTHLY) == datetime.datetime(2024, 2, 1, tzinfo=UTC)
+
+
+def test_next_period():
+    assert partition.next_period(datetime.datetime(2024, 12, 1, tzinfo=UTC), partition.INTERVAL_MONTHLY) \
+        == datetime.datetime(2025, 1, 1, tzinfo=UTC)
+    assert partition.next_period(datetime.datetime(2024, 2, 28, tzinfo=UTC), partition.INTERVAL_DAILY) \
+        == datetime.datetime(2024, 2, 29, tzinfo=UTC)
+
+
+def test_partition_name_round_trip():
+    start = datetime.datetime(2024, 2, 29, tzinfo=UTC)
+    for interval, name in [(partition.INTERVAL_DAILY, "event_information_p20240229"),
+                           (partition.INTERVAL_MONTHLY, "event_information_p202402")]:
+        period = partition.period_start(start, interval)
+        assert partition.partition_name(partition.EVENT_TABLE, period, interval) == name
+        assert partition.parse_partition_bounds(name) == (
+            partition.EVENT_TABLE, period, partition.next_period(period, interval))
+
+
+def test_parse_partition_bounds_ignores_other_tables():
+    assert partition.parse_partition_bounds("event_information_default") is None
+    assert partition.parse_partition_bounds("event_information_p2024") is None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from swagger_server.utilities.prepared import PreparedStatementRegistry  # noqa: E402
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.prepared = set()
+
+
+class FakeCursor(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+
+def test_placeholders_are_rewritten_to_positional_parameters():
+    registry = PreparedStatementRegistry()
+    registry.register("get_status", "SELECT * FROM t WHERE port = %s AND datetime >= %s LIMIT %s")
+    cursor = FakeCursor(FakeConnection())
+
+    registry.execute(cursor, "get_status", ("port1", "2024-01-01", 10))
+
+    assert cursor.queries == [
+        ("PREPARE get_status AS SELECT * FROM t WHERE port = $1 AND datetime >= $2 LIMIT $3", None),
+        ("EXECUTE get_status (%s, %s, %s)", ("port1", "2024-01-01", 10)),
+    ]
+
+
+def test_statement_is_prepared_once_per_connection():
+    registry = PreparedStatementRegistry()
+    registry.register("get_port", "SELECT * FROM t WHERE port = %s")
+    conn = FakeConnection()
+    cursor = FakeCursor(conn)
+
+    registry.execute(cursor, "get_port", ("port1",))
+    registry.execute(cursor, "get_port", ("port2",))
+    assert [q for q, _p in cursor.queries if q.startswith("PREPARE")] == [
+        "PREPARE get_port AS SELECT * FROM t WHERE port = $1"]
+
+    other = FakeCursor(FakeConnection())
+    registry.execute(other, "get_port", ("port1",))
+    assert other.queries[0][0].startswith("PREPARE get_port")
+
+
+def test_statement_without_parameters():
+    registry = PreparedStatementRegistry()
+    registry.register("get_all", "SELECT * FROM t")
+    cursor = FakeCursor(FakeConnection())
+
+    registry.execute(cursor, "get_all")
+    assert cursor.queries[-1] == ("EXECUTE get_all", ())
+
+
+def test_register_conflicting_sql():
+    registry = PreparedStatementRegistry()
+    registry.register("get_port", "SELECT * FROM t WHERE port = %s")
+    registry.register("get_port", "SELECT * FROM t WHERE port = %s")
+    with pytest.raises(ValueError):
+        registry.register("get_port", "SELECT * FROM t WHERE id = %s")
+
+
+def test_register_invalid_name():
+    registry = PreparedStatementRegistry()
+    with pytest.raises(ValueError):
+        registry.register("get port; DROP TABLE t", "SELECT 1")
+
+
+def test_connection_without_prepared_set():
+    registry = PreparedStatementRegistry()
+    registry.register("get_all", "SELECT * FROM t")
+    cursor = FakeCursor(object())
+    with pytest.raises(TypeError):
+        registry.execute(cursor, "get_all")
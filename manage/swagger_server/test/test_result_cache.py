@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from swagger_server.utilities.result_cache import ResultCache
+
+
+def test_put_and_get():
+    cache = ResultCache(max_size=10, ttl=60)
+    hit, value, generation = cache.get(("port1", "a"))
+    assert not hit and value is None
+
+    cache.put(("port1", "a"), "value", generation)
+    hit, value, _generation = cache.get(("port1", "a"))
+    assert hit and value == "value"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entry_is_miss():
+    cache = ResultCache(max_size=10, ttl=0.01)
+    _hit, _value, generation = cache.get(("port1", "a"))
+    cache.put(("port1", "a"), "value", generation)
+    time.sleep(0.02)
+
+    hit, _value, _generation = cache.get(("port1", "a"))
+    assert not hit
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_port_keeps_other_ports():
+    cache = ResultCache(max_size=10, ttl=60)
+    for key in [("port1", "a"), ("port2", "a")]:
+        _hit, _value, generation = cache.get(key)
+        cache.put(key, key[0], generation)
+
+    cache.invalidate("port1")
+    assert not cache.get(("port1", "a"))[0]
+    assert cache.get(("port2", "a"))[0]
+
+
+def test_invalidate_port_drops_all_ports_entry():
+    # ポート未指定のエントリはいずれのポートの更新でも無効化する
+    cache = ResultCache(max_size=10, ttl=60)
+    _hit, _value, generation = cache.get((None, "a"))
+    cache.put((None, "a"), "all", generation)
+
+    cache.invalidate("port1")
+    assert not cache.get((None, "a"))[0]
+
+
+def test_put_after_invalidate_is_ignored():
+    # 取得中に無効化された結果は格納しない
+    cache = ResultCache(max_size=10, ttl=60)
+    _hit, _value, generation = cache.get(("port1", "a"))
+    cache.invalidate("port1")
+    cache.put(("port1", "a"), "old", generation)
+
+    hit, _value, generation = cache.get(("port1", "a"))
+    assert not hit
+    cache.put(("port1", "a"), "new", generation)
+    assert cache.get(("port1", "a"))[1] == "new"
+
+
+def test_put_for_all_ports_after_port_invalidate_is_ignored():
+    cache = ResultCache(max_size=10, ttl=60)
+    _hit, _value, generation = cache.get((None, "a"))
+    cache.invalidate("port1")
+    cache.put((None, "a"), "old", generation)
+    assert not cache.get((None, "a"))[0]
+
+
+def test_put_after_global_invalidate_is_ignored():
+    cache = ResultCache(max_size=10, ttl=60)
+    _hit, _value, generation = cache.get(("port1", "a"))
+    cache.invalidate()
+    cache.put(("port1", "a"), "old", generation)
+    assert not cache.get(("port1", "a"))[0]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_size=2, ttl=60)
+    for key in [("port1", "a"), ("port1", "b")]:
+        _hit, _value, generation = cache.get(key)
+        cache.put(key, key[1], generation)
+    cache.get(("port1", "a"))
+
+    _hit, _value, generation = cache.get(("port1", "c"))
+    cache.put(("port1", "c"), "c", generation)
+
+    assert cache.get(("port1", "a"))[0]
+    assert not cache.get(("port1", "b"))[0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(max_size=0)
+
+
+def test_put_with_entry_ttl():
+    cache = ResultCache(max_size=10, ttl=60)
+    _hit, _value, generation = cache.get(("port1", "a"))
+    cache.put(("port1", "a"), "value", generation, ttl=0.01)
+    cache.put(("port1", "b"), "value", generation, ttl=0)
+    time.sleep(0.02)
+
+    assert not cache.get(("port1", "a"))[0]
+    # 有効秒数が0以下の場合は格納しない
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+botocore_stub = pytest.importorskip("botocore.stub")
+
+from swagger_server.service import service  # noqa: E402
+from swagger_server.utilities.manage_exception import ManageException  # noqa: E402
+from swagger_server.utilities.s3_client import S3Client  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def credentials(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+
+
+@pytest.fixture
+def stubbed():
+    client = S3Client(endpoint_url="http://127.0.0.1:9000", region_name="ap-northeast-1", addressing_style="path")
+    with botocore_stub.Stubber(client.client) as stubber:
+        yield client, stubber
+
+
+def test_client_is_created_with_configured_pool_and_timeouts():
+    client = S3Client(endpoint_url="http://127.0.0.1:9000", region_name="ap-northeast-1",
+                      max_pool_connections=4, connect_timeout=1, read_timeout=2, max_attempts=5,
+                      addressing_style="path")
+    config = client.client.meta.config
+
+    assert client.endpoint_url == "http://127.0.0.1:9000"
+    assert (config.max_pool_connections, config.connect_timeout, config.read_timeout) == (4, 1, 2)
+    # 初回を含む試行回数として指定する
+    assert config.retries == {"mode": "standard", "total_max_attempts": 5}
+    assert config.s3 == {"addressing_style": "path"}
+
+
+def test_get_object_returns_body(stubbed):
+    client, stubber = stubbed
+    stubber.add_response("get_object", {"Body": io.BytesIO(b"report")}, {"Bucket": "bucket", "Key": "r.pdf"})
+
+    assert client.get_object("bucket", "r.pdf") == b"report"
+    assert client.stats()["operations"]["get_object"]["requests"] == 1
+
+
+def test_get_object_error_is_recorded(stubbed):
+    client, stubber = stubbed
+    stubber.add_client_error("get_object", "NoSuchKey", http_status_code=404)
+
+    with pytest.raises(client.client.exceptions.NoSuchKey):
+        client.get_object("bucket", "missing.pdf")
+    assert client.stats()["operations"]["get_object"]["errors"] == 1
+
+
+def test_missing_report_is_not_found(config, stubbed, monkeypatch):
+    client, stubber = stubbed
+    monkeypatch.setattr(service, "_s3_client", client)
+    config[service.CONFIG_KEY_BUCKET_NAME] = "bucket"
+    stubber.add_client_error("get_object", "NoSuchKey", http_status_code=404)
+
+    with pytest.raises(ManageException) as e:
+        service.get_report("missing.pdf")
+    assert e.value.http_status_code == 404
+
+
+def test_client_is_shared_in_process(config):
+    config[service.CONFIG_KEY_S3_ENDPOINT_URL] = "http://127.0.0.1:9000"
+    config[service.CONFIG_KEY_S3_REGION_NAME] = "ap-northeast-1"
+
+    client = service.get_s3_client()
+    assert service.get_s3_client() is client
+    assert client.endpoint_url == "http://127.0.0.1:9000"
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from swagger_server.service import service
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def status(port, seconds, detect):
+    return {"port": port, "datetime": T0 + datetime.timedelta(seconds=seconds), "detect": detect, "event": []}
+
+
+def respond(query, params):
+    if query.startswith("EXECUTE status_id_reserve"):
+        return [(i + 1,) for i in range(params[0])]
+    return []
+
+
+def test_batch_loads_states_without_holding_a_connection(config, db, monkeypatch):
+    # 最新の状態の更新はexecute_valuesで実際のカーソルを必要とするため対象外とする
+    monkeypatch.setattr(service, "upsert_latest_status", lambda cursor, rows: None)
+    config[service.CONFIG_KEY_STATE_SUPPRESSION_ENABLED] = True
+    db.respond = respond
+
+    results, notifications = service.store_status_batch([status("port1", 0, True), status("port2", 0, False)])
+
+    assert [r["status_code"] for r in results] == [204, 204]
+    assert [n["port"] for n in notifications] == ["port1", "port2"]
+    assert len(db.executed("port = ANY(%s)")) == 1
+
+
+def test_batch_skips_unchanged_statuses(config, db, monkeypatch):
+    monkeypatch.setattr(service, "upsert_latest_status", lambda cursor, rows: None)
+    config[service.CONFIG_KEY_STATE_SUPPRESSION_ENABLED] = True
+    config[service.CONFIG_KEY_STATE_SUPPRESSION_STORE_UNCHANGED] = False
+    db.respond = respond
+
+    service.store_status_batch([status("port1", 0, True)])
+    results, notifications = service.store_status_batch([status("port1", 1, True), status("port1", 2, False)])
+
+    assert [r["status_code"] for r in results] == [204, 204]
+    assert [n["detect"] for n in notifications] == [False]
+    assert db.executed("EXECUTE status_id_reserve")[-1][1] == (1,)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from swagger_server.utilities.state_tracker import STALE, TRANSITION, UNCHANGED, StateTracker
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def at(seconds):
+    return T0 + datetime.timedelta(seconds=seconds)
+
+
+def event(object_id, detect, x=0):
+    return {"id": object_id, "type": "person", "detect": detect, "x": x}
+
+
+def test_first_status_is_transition():
+    tracker = StateTracker(lambda ports: {})
+    assert tracker.observe([("port1", at(0), 0, [])]) == [TRANSITION]
+
+
+def test_unchanged_and_transition():
+    tracker = StateTracker(lambda ports: {})
+    results = tracker.observe([
+        ("port1", at(0), 1, [event("a", 1)]),
+        ("port1", at(1), 1, [event("a", 1, x=10)]),
+        ("port1", at(2), 0, [event("a", 0)]),
+        ("port1", at(3), 0, [event("a", 0)]),
+    ])
+    # 位置の変化は状態の変化としない
+    assert results == [TRANSITION, UNCHANGED, TRANSITION, UNCHANGED]
+
+
+def test_ports_are_tracked_independently():
+    tracker = StateTracker(lambda ports: {})
+    results = tracker.observe([
+        ("port1", at(0), 1, []),
+        ("port2", at(0), 1, []),
+        ("port1", at(1), 1, []),
+    ])
+    assert results == [TRANSITION, TRANSITION, UNCHANGED]
+
+
+def test_older_status_is_stale_and_keeps_state():
+    tracker = StateTracker(lambda ports: {})
+    tracker.observe([("port1", at(10), 1, [])])
+
+    assert tracker.observe([("port1", at(5), 0, [])]) == [STALE]
+    assert tracker.observe([("port1", at(11), 1, [])]) == [UNCHANGED]
+
+
+def test_state_is_loaded_once_for_missing_ports():
+    loads = []
+
+    def load(ports):
+        loads.append(sorted(ports))
+        return {"port1": (at(0), 1, [event("a", 1)])}
+
+    tracker = StateTracker(load)
+    assert tracker.observe([("port1", at(1), 1, [event("a", 1)]), ("port2", at(1), 1, [])]) == [
+        UNCHANGED, TRANSITION]
+    assert tracker.observe([("port1", at(2), 1, [event("a", 1)])]) == [UNCHANGED]
+    assert loads == [["port1", "port2"]]
+
+
+def test_forget_reloads_state():
+    loads = []
+
+    def load(ports):
+        loads.append(sorted(ports))
+        return {}
+
+    tracker = StateTracker(load)
+    tracker.observe([("port1", at(0), 1, [])])
+    tracker.forget(["port1"])
+    assert tracker.observe([("port1", at(1), 1, [])]) == [TRANSITION]
+    assert loads == [["port1"], ["port1"]]
+    assert tracker.stats()["loads"] == 2
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import datetime
+import time
+
+import pytest
+
+from swagger_server.service import service
+from swagger_server.utilities.db_router import Replica, ReplicaRouter
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def respond(query, params):
+    if query.startswith("EXECUTE status_get_json"):
+        return [("[]", False, None, None)]
+    if query.startswith("EXECUTE"):
+        return [("port1", T0, True, None, None, 1)]
+    return []
+
+
+@pytest.fixture
+def replica(config, db, monkeypatch):
+    """
+    プライマリと同じFakeDatabaseを読み取り用レプリカとして使用する
+    """
+    config[service.CONFIG_KEY_STATUS_CACHE_ENABLED] = True
+    config[service.CONFIG_KEY_STATUS_CACHE_TTL] = 60
+    replica = Replica("replica1", service._db_pool)
+    replica.healthy = True
+    router = ReplicaRouter([replica], max_lag=5)
+    monkeypatch.setattr(service, "_replica_router", router)
+    db.respond = respond
+    return replica
+
+
+@pytest.mark.parametrize("get", [service.status_get_data, service.status_get_json])
+def test_replica_results_are_cached(replica, db, get):
+    first = get("port1", None)
+    assert get("port1", None) == first
+
+    assert replica.reads == 1
+    assert len(db.executed("EXECUTE status_get")) == 1
+
+
+def test_replica_results_expire_with_replica_ttl(config, replica, db):
+    config[service.CONFIG_KEY_STATUS_CACHE_REPLICA_TTL] = 0.01
+    service.status_get_data("port1", None)
+    time.sleep(0.02)
+    service.status_get_data("port1", None)
+
+    assert replica.reads == 2
+
+
+def test_replica_ttl_is_limited_by_cache_ttl_and_max_lag(config, replica):
+    cache = service.get_status_cache()
+    config[service.CONFIG_KEY_STATUS_CACHE_REPLICA_TTL] = 10
+    assert service.status_cache_replica_ttl(cache) == 5
+    config[service.CONFIG_KEY_STATUS_CACHE_TTL] = 2
+    service._status_cache = None
+    assert service.status_cache_replica_ttl(service.get_status_cache()) == 2
+
+
+def test_replica_results_are_invalidated_by_write(replica, db):
+    service.status_get_data("port1", None)
+    service.invalidate_status_cache(["port1"])
+    service.status_get_data("port1", None)
+
+    assert replica.reads == 2
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from swagger_server.service import service
+
+
+def rows(count):
+    return [('{"n": %d}' % i,) for i in range(count)]
+
+
+@pytest.fixture
+def export_rows(config, db):
+    config[service.CONFIG_KEY_EXPORT_FETCH_SIZE] = 2
+    db.respond = lambda query, params: rows(3) if "json_build_object" in query else []
+    return db
+
+
+def test_export_streams_rows_and_returns_connection(export_rows):
+    lines = service.status_export_data("port1", None)
+
+    assert list(lines) == ['{"n": 0}\n{"n": 1}\n', '{"n": 2}\n']
+    assert service._db_pool.stats()["in_use"] == 0
+
+
+def test_connection_is_returned_when_closed_before_reading(export_rows):
+    lines = service.status_export_data("port1", None)
+    # クライアントが最初のチャンクの前に切断した場合、WSGIサーバーはclose()のみを呼び出す
+    lines.close()
+    lines.close()
+
+    assert service._db_pool.stats()["in_use"] == 0
+    assert list(lines) == []
+
+
+def test_connection_is_returned_when_closed_by_response(export_rows):
+    werkzeug = pytest.importorskip("werkzeug.wrappers")
+    response = werkzeug.Response(service.status_export_data("port1", None), mimetype="application/x-ndjson")
+    response.close()
+
+    assert service._db_pool.stats()["in_use"] == 0
+
+
+def test_connection_is_returned_when_read_fails(export_rows, monkeypatch):
+    lines = service.status_export_data("port1", None)
+
+    def fail(size):
+        raise Exception("connection lost")
+    monkeypatch.setattr(lines.cursor, "fetchmany", fail)
+
+    with pytest.raises(Exception):
+        next(lines)
+    assert service._db_pool.stats()["in_use"] == 0
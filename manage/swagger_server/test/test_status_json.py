@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import datetime
+import re
+
+from swagger_server.service import service
+
+T0 = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+BODY = '[{"datetime": "2024-01-01T00:00:00+00:00", "detect": true, "events": [], "port": "port1", ' \
+       '"report_endpoint": null}]'
+
+
+def prepared(db, name):
+    return [query for query, _params in db.executed("PREPARE " + name + " AS")][0]
+
+
+def test_body_is_returned_without_decoding(config, db):
+    db.respond = lambda query, params: [(BODY, False, None, None)] if query.startswith("EXECUTE") else []
+
+    body, next_cursor = service.status_get_json("port1", None, limit=10)
+
+    assert body == BODY
+    assert next_cursor is None
+    # 件数の判定のパラメータの後に立入り状態の絞り込みのパラメータを渡す
+    assert db.executed("EXECUTE status_get_json_100")[0][1] == [10, 10, 10, 10, "port1", 11]
+
+
+def test_next_cursor_from_last_row(config, db):
+    db.respond = lambda query, params: [(BODY, True, T0, 7)] if query.startswith("EXECUTE") else []
+
+    _body, next_cursor = service.status_get_json(None, T0, limit=1)
+
+    assert service.decode_cursor(next_cursor) == (T0, 7)
+
+
+def test_keys_are_built_in_jsonify_order(config, db):
+    db.respond = lambda query, params: [("[]", False, None, None)] if query.startswith("EXECUTE") else []
+    service.status_get_json(None, None, limit=10)
+
+    query = prepared(db, "status_get_json_000")
+    # jsonifyはキーをソートして出力するため同じ順で組み立てる
+    keys = re.findall(r"'(\w+)', ", query.split("FROM (")[0])
+    assert keys == ["datetime", "detect", "events", "port", "report_endpoint"]
+    assert "COALESCE(S.event, '[]'::json)" in query
+
+
+def test_isoformat_expression_matches_python_format():
+    expression = service.sql_isoformat("ES.datetime")
+
+    assert "'YYYY-MM-DD\"T\"HH24:MI:SS'" in expression
+    # 小数秒が0の場合はisoformat()と同じく省略する
+    assert "to_char(ES.datetime, 'US') = '000000' THEN ''" in expression
+    assert expression.endswith("|| to_char(ES.datetime, 'TZH:TZM'))")
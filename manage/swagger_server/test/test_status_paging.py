@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import base64
+import datetime
+
+import pytest
+
+from swagger_server.service import service
+from swagger_server.utilities.manage_exception import ManageException
+
+T0 = datetime.datetime(2024, 1, 1, 12, 0, 0, 123400, tzinfo=datetime.timezone(datetime.timedelta(hours=9)))
+
+
+def row(seconds, entry_status_id):
+    return ("port1", T0 - datetime.timedelta(seconds=seconds), True, None, None, entry_status_id)
+
+
+def test_cursor_round_trip():
+    cursor = service.encode_cursor(T0, 42)
+    assert "=" not in cursor
+    assert service.decode_cursor(cursor) == (T0, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", service.encode_cursor(T0, 1)[:-2],
+                                    base64.urlsafe_b64encode(b"[1]").decode("ascii")])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ManageException) as e:
+        service.decode_cursor(cursor)
+    assert e.value.http_status_code == 400
+
+
+def test_cursor_with_non_integer_id_is_rejected():
+    cursor = service.encode_cursor(T0, "1")
+    with pytest.raises(ManageException):
+        service.decode_cursor(cursor)
+
+
+def test_query_starts_after_cursor_row():
+    query, params, name = service.build_status_query("port1", None, service.encode_cursor(T0, 42), 10)
+
+    assert "(ES.datetime, ES.id) < (%s::timestamptz, %s::integer)" in query
+    assert params == ["port1", T0, 42, 11]
+    assert name == "status_get_101"
+
+
+def test_page_returns_next_cursor_of_last_row(config, db):
+    config[service.CONFIG_KEY_MAX_COUNT] = 2
+    db.respond = lambda query, params: [row(0, 3), row(1, 2), row(2, 1)] if query.startswith("EXECUTE") else []
+
+    data, next_cursor = service.status_get_data("port1", None)
+
+    assert [d["datetime"] for d in data] == [row(0, 3)[1], row(1, 2)[1]]
+    assert data[0]["events"] == []
+    assert service.decode_cursor(next_cursor) == (row(1, 2)[1], 2)
+    # 次ページの有無を判定するため1件多く取得する
+    assert db.executed("EXECUTE status_get_100")[0][1] == ["port1", 3]
+
+
+def test_last_page_has_no_cursor(config, db):
+    db.respond = lambda query, params: [row(0, 1)] if query.startswith("EXECUTE") else []
+
+    data, next_cursor = service.status_get_data(None, None, service.encode_cursor(T0, 2), 10)
+
+    assert len(data) == 1
+    assert next_cursor is None
+    assert db.executed("EXECUTE status_get_001")[0][1] == [T0, 2, 11]
+
+
+def test_invalid_cursor_does_not_query(config, db):
+    with pytest.raises(ManageException) as e:
+        service.status_get_data("port1", None, "not-a-cursor")
+    assert e.value.http_status_code == 400
+    assert db.queries == []
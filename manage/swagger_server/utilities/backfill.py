@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 複数プロセスが同時に補完しないためのアドバイザリロックキー
+ADVISORY_LOCK_KEY = 72310004
+
+
+class Backfill(object):
+    """
+    既存データの補完1件分の情報
+    idの範囲ごとにUPDATEを実行するため、1回の更新で対象となる行・ロックする行はbatch_size件以内となる。
+    """
+
+    def __init__(self, name: str, table: str, sql: str, resumable: bool = False):
+        """
+        Args:
+            name str : 補完名（完了記録のキー）
+            table str : 補完対象のテーブル（idの範囲の取得用）
+            sql str : 補完のSQL（%(start)s以上%(end)s未満のidの行を更新すること）
+            resumable bool : 補完済みの位置をdata_backfill_rangeに記録して続きから再開するかどうか
+                             （集計の加算等、同じ範囲を2回実行できない補完の場合に指定する）。
+                             対象範囲はマイグレーションでdata_backfill_rangeに記録した最大idまでとする。
+        """
+        self.name = name
+        self.table = table
+        self.sql = sql
+        self.resumable = resumable
+
+
+# ドローンポートごとの最新の立入り状態を設定する
+# 範囲内のポートごとの最新の立入り状態が、登録済みの状態より新しい場合のみ更新するため、同じ範囲を再実行しても変わらない
+BACKFILL_PORT_LATEST_STATUS = Backfill("port_latest_status", "entry_status_information", """
+    INSERT INTO "port_latest_status" AS LS (port, entry_status_id, datetime, detect, events, report_endpoint)
+    SELECT
+        ES.port,
+        ES.id,
+        ES.datetime,
+        ES.detect,
+        COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', EV.object_id,
+                'type', EV.object_type,
+                'detect', EV.detect,
+                'location', EV.location
+            ) ORDER BY EV.id)
+            FROM "event_information" EV
+            WHERE EV.ent_stat_id = ES.id
+        ), '[]'::jsonb),
+        R.endpoint
+    FROM (
+        SELECT DISTINCT ON (port) id, port, datetime, detect, report_id
+        FROM "entry_status_information"
+        WHERE id >= %(start)s AND id < %(end)s
+          AND port IS NOT NULL
+        ORDER BY port, datetime DESC NULLS LAST, id DESC
+    ) ES
+    LEFT OUTER JOIN "report" R
+        ON ES.report_id = R.report_id
+    ON CONFLICT (port) DO UPDATE SET
+        entry_status_id = EXCLUDED.entry_status_id,
+        datetime = EXCLUDED.datetime,
+        detect = EXCLUDED.detect,
+        events = EXCLUDED.events,
+        report_endpoint = EXCLUDED.report_endpoint,
+        updated_at = now()
+    WHERE (LS.datetime IS NULL AND (EXCLUDED.datetime IS NOT NULL OR LS.entry_status_id < EXCLUDED.entry_status_id))
+       OR (LS.datetime, LS.entry_status_id) < (EXCLUDED.datetime, EXCLUDED.entry_status_id)
+""")
+
+# イベントの位置情報("緯度, 経度")から数値の緯度・経度を設定する（形式・範囲が不正な行はNULLのまま）
+BACKFILL_EVENT_COORDINATES = Backfill("event_coordinates", "event_information", r"""
+    UPDATE "event_information" EV
+    SET latitude = L.latitude, longitude = L.longitude
+    FROM (
+        SELECT id,
+            split_part(location, ',', 1)::DOUBLE PRECISION AS latitude,
+            split_part(location, ',', 2)::DOUBLE PRECISION AS longitude
+        FROM "event_information"
+        WHERE id >= %(start)s AND id < %(end)s
+          AND latitude IS NULL
+          AND location ~ '^\s*[-+]?[0-9]+(\.[0-9]+)?\s*,\s*[-+]?[0-9]+(\.[0-9]+)?\s*$'
+    ) L
+    WHERE EV.id = L.id
+      AND EV.id >= %(start)s AND EV.id < %(end)s
+      AND L.latitude BETWEEN -90 AND 90
+      AND L.longitude BETWEEN -180 AND 180
+""")
+
+# 日時が未設定のイベントに立入り状態の日時を設定する
+BACKFILL_EVENT_DATETIME = Backfill("event_datetime", "event_information", """
+    UPDATE "event_information" EV
+    SET datetime = ES.datetime
+    FROM "entry_status_information" ES
+    WHERE EV.id >= %(start)s AND EV.id < %(end)s
+      AND EV.datetime IS NULL
+      AND ES.id = EV.ent_stat_id
+""")
+
+# 立入り状態・イベントの件数を集計に加算する
+# 登録時の加算と重複しないよう、集計の追加時点の最大idまでを対象とする
+BACKFILL_STATUS_ROLLUP = Backfill("status_rollup", "entry_status_information", """
+    INSERT INTO "status_rollup" AS SR (port, bucket, bucket_start, object_type, detect, count)
+    SELECT T.port, B.bucket, date_trunc(B.bucket, T.datetime AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        T.object_type, T.detect, count(*)
+    FROM (
+        SELECT ES.port, ES.datetime, '' AS object_type, COALESCE(ES.detect, FALSE) AS detect
+        FROM "entry_status_information" ES
+        WHERE ES.id >= %(start)s AND ES.id < %(end)s
+          AND ES.port IS NOT NULL AND ES.datetime IS NOT NULL
+        UNION ALL
+        SELECT ES.port, ES.datetime, COALESCE(EV.object_type, ''), COALESCE(EV.detect, FALSE)
+        FROM "event_information" EV
+        JOIN "entry_status_information" ES
+            ON ES.id = EV.ent_stat_id
+        WHERE ES.id >= %(start)s AND ES.id < %(end)s
+          AND ES.port IS NOT NULL AND ES.datetime IS NOT NULL
+    ) T
+    CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS B(bucket)
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (port, bucket, bucket_start, object_type, detect)
+    DO UPDATE SET count = SR.count + EXCLUDED.count
+""", resumable=True)
+
+BACKFILLS = [BACKFILL_PORT_LATEST_STATUS, BACKFILL_EVENT_COORDINATES, BACKFILL_EVENT_DATETIME, BACKFILL_STATUS_ROLLUP]
+
+
+class BackfillRunner(threading.Thread):
+    """
+    既存データの補完を行うバックグラウンドスレッド
+    起動時のマイグレーションで全件を1トランザクションで更新するとサービス停止中に長時間ロック・肥大化するため、
+    サービス起動後にidの範囲ごとに分けて更新・コミットし、間隔をあけて次の範囲を更新する。
+    補完中に登録された行は登録時に設定済みのため、開始時点の最大idまでを対象とする。
+    再開可能な補完は、範囲ごとの更新と同じトランザクションで補完済みの位置を記録する。
+    """
+
+    def __init__(self, pool, backfills: list = None, batch_size: int = 1000, pause: float = 0.1):
+        """
+        Args:
+            pool ConnectionPool : DBコネクションプール
+            backfills list : Backfillのリスト
+            batch_size int : 1回に更新するidの範囲
+            pause float : 更新の間隔（秒）
+        """
+        super(BackfillRunner, self).__init__(name="BackfillRunner", daemon=True)
+        self.pool = pool
+        self.backfills = backfills if backfills is not None else BACKFILLS
+        self.batch_size = batch_size
+        self.pause = pause
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # 補完名 -> {"start", "end", "position", "updated", "completed"}
+        self._progress = {}
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s)", (ADVISORY_LOCK_KEY,))
+                    locked = cursor.fetchone()[0]
+                conn.commit()
+                if not locked:
+                    logger.info("BackfillRunner: another process is running backfills.")
+                    return
+                try:
+                    for backfill in self.backfills:
+                        if self._stop_event.is_set():
+                            break
+                        self.run_backfill(conn, backfill)
+                finally:
+                    conn.rollback()
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_KEY,))
+                    conn.commit()
+        except Exception:
+            logger.exception("BackfillRunner: backfill failed. It will be resumed on the next startup.")
+
+    def run_backfill(self, conn, backfill: Backfill):
+        """
+        補完を1件実行する。完了済みの場合は何もしない。
+        """
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM data_backfill WHERE name = %s", (backfill.name,))
+            if cursor.fetchone() is not None:
+                conn.commit()
+                return
+            cursor.execute('SELECT min(id), max(id) FROM "' + backfill.table + '"')
+            start, last = cursor.fetchone()
+            if backfill.resumable:
+                cursor.execute("SELECT max_id, position FROM data_backfill_range WHERE name = %s", (backfill.name,))
+                bound = cursor.fetchone()
+                if bound is None:
+                    conn.commit()
+                    logger.warning("BackfillRunner: %s has no recorded range. Skipped.", backfill.name)
+                    return
+                last = bound[0]
+                if bound[1] is not None:
+                    start = bound[1]
+        conn.commit()
+        if last is None:
+            start = None
+
+        progress = {"start": start, "end": last, "position": start, "updated": 0, "completed": False}
+        with self._lock:
+            self._progress[backfill.name] = progress
+        logger.info("BackfillRunner: %s started. (id: %s - %s)", backfill.name, start, last)
+
+        position = start
+        while position is not None and position <= last:
+            if self._stop_event.is_set():
+                return
+            # 対象範囲の後に登録された行を含めない
+            end = min(position + self.batch_size, last + 1)
+            with conn.cursor() as cursor:
+                cursor.execute(backfill.sql, {"start": position, "end": end})
+                updated = cursor.rowcount
+                if backfill.resumable:
+                    cursor.execute(
+                        "UPDATE data_backfill_range SET position = %s WHERE name = %s", (end, backfill.name))
+            conn.commit()
+            position = end
+            with self._lock:
+                progress["position"] = position
+                progress["updated"] += updated
+            if self.pause:
+                self._stop_event.wait(self.pause)
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO data_backfill (name) VALUES (%s) ON CONFLICT (name) DO NOTHING", (backfill.name,))
+        conn.commit()
+        with self._lock:
+            progress["completed"] = True
+        logger.info("BackfillRunner: %s completed. (updated: %d)", backfill.name, progress["updated"])
+
+    def stats(self) -> dict:
+        """
+        補完の進捗
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {name: dict(progress) for name, progress in self._progress.items()}
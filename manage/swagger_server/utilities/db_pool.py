@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+
+from swagger_server.utilities.manage_exception import ManageException
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool(object):
+    """
+    PostgreSQLコネクションプール
+    プロセス内で共有するスレッドセーフなコネクションプール。
+    最小・最大接続数、アイドルタイムアウト、払い出し時の死活確認、統計情報を持つ。
+    """
+
+    def __init__(
+            self,
+            connect,
+            min_size: int = 1,
+            max_size: int = 10,
+            idle_timeout: float = 300,
+            wait_timeout: float = 30,
+            check_interval: float = 30):
+        """
+        Args:
+            connect callable : 新規コネクションを生成する関数
+            min_size int : 最小接続数（アイドルタイムアウトでもこの数は維持する）
+            max_size int : 最大接続数
+            idle_timeout float : アイドル状態のコネクションを切断するまでの秒数
+            wait_timeout float : 空きコネクションを待つ最大秒数
+            check_interval float : 払い出し時に死活確認(SELECT 1)を行うアイドル秒数
+        """
+        if min_size < 0 or max_size <= 0 or min_size > max_size:
+            raise ValueError("Invalid pool size. (min_size: %s, max_size: %s)" % (min_size, max_size))
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.check_interval = check_interval
+
+        self._cond = threading.Condition(threading.Lock())
+        # (コネクション, 返却時刻) のリスト。末尾が最も新しい
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+
+        self._waits = 0
+        self._wait_time = 0.0
+        self._created = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        # ロック取得済みの状態で呼び出すこと
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            logger.debug("ConnectionPool: failed to close connection.", exc_info=True)
+
+    def _is_alive(self, conn, idle_seconds) -> bool:
+        """
+        払い出し前の死活確認
+        一定時間以上アイドルだったコネクションのみSELECT 1で疎通確認する。
+        """
+        if conn.closed:
+            return False
+        if idle_seconds < self.check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+        except Exception:
+            logger.warning("ConnectionPool: stale connection detected.")
+            return False
+        return True
+
+    def _expire_idle(self, now):
+        """
+        アイドルタイムアウトを超えたコネクションを最小接続数まで切断する。
+        ロック取得済みの状態で呼び出すこと。
+        """
+        expired = []
+        while (self._idle
+               and len(self._idle) + self._in_use > self.min_size
+               and now - self._idle[0][1] >= self.idle_timeout):
+            expired.append(self._idle.pop(0)[0])
+        return expired
+
+    def getconn(self):
+        """
+        コネクションを払い出す。
+        空きが無く最大接続数に達している場合はwait_timeout秒まで返却を待つ。
+
+        :return: DBコネクション
+        """
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ManageException("Database connection pool is closed.", 500)
+
+                now = time.monotonic()
+                expired = self._expire_idle(now)
+                for conn in expired:
+                    self._close_quietly(conn)
+
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+
+                if self._in_use < self.max_size:
+                    # 接続処理はロック外で行うため枠だけ確保する
+                    self._in_use += 1
+                    conn = None
+                    break
+
+                remaining = self.wait_timeout - (now - started)
+                if remaining <= 0:
+                    self._record_wait(started, waited)
+                    logger.error("ConnectionPool: timed out waiting for a connection.")
+                    raise ManageException("Database connection pool exhausted.", 503)
+                waited = True
+                self._cond.wait(remaining)
+
+            self._record_wait(started, waited)
+
+        if conn is not None:
+            if self._is_alive(conn, time.monotonic() - returned_at):
+                return conn
+            with self._cond:
+                self._close_quietly(conn)
+
+        try:
+            conn = self._new_connection()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _record_wait(self, started, waited):
+        if waited:
+            self._waits += 1
+            self._wait_time += time.monotonic() - started
+
+    def putconn(self, conn, discard: bool = False):
+        """
+        コネクションを返却する。
+        トランザクションが残っている場合はロールバックし、異常なコネクションは破棄する。
+
+        :param conn: 返却するコネクション
+        :param discard: Trueの場合はプールに戻さず切断する
+        """
+        if not discard and not conn.closed:
+            try:
+                # 未完了のトランザクションを残したままプールに戻さない
+                if conn.get_transaction_status() != 0:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        with文でコネクションを払い出し、終了時に返却する。
+        例外発生時、コネクションが切断されていれば破棄する。
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            self.putconn(conn, discard=bool(conn.closed))
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        """
+        全てのアイドルコネクションを切断し、以降の払い出しを停止する。
+        """
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            for conn, _ in idle:
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """
+        プールの統計情報
+
+        :return: 統計情報
+        :rtype: dict
+        """
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waits": self._waits,
+                "wait_time": round(self._wait_time, 6),
+                "created": self._created,
+                "discarded": self._discarded
+            }
+
+
+class CursorStream(object):
+    """
+    プールから払い出したコネクションのカーソルの結果を一定件数ずつ返すイテラブル
+    最後まで読み出した場合・読み出し中の例外・close()のいずれでも、カーソルを閉じてコネクションを1回だけ返却する。
+    WSGIサーバーはクライアントの切断時にレスポンスのclose()を呼び出すため、読み出しの開始前に切断された場合も返却される。
+    """
+
+    def __init__(self, pool: ConnectionPool, conn, cursor, fetch_size: int, format_rows):
+        """
+        Args:
+            pool ConnectionPool : コネクションの払い出し元
+            conn connection : 払い出したコネクション
+            cursor cursor : クエリ実行済みのカーソル
+            fetch_size int : 1回に取得する行数
+            format_rows function : 取得した行のリストを受け取り、返却する値を返す関数
+        """
+        self.pool = pool
+        self.conn = conn
+        self.cursor = cursor
+        self.fetch_size = fetch_size
+        self.format_rows = format_rows
+        self.count = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        try:
+            rows = self.cursor.fetchmany(self.fetch_size)
+        except Exception:
+            logger.exception("CursorStream: read aborted. (rows: %d)", self.count)
+            self.close()
+            raise
+        if not rows:
+            self.close()
+            raise StopIteration
+        self.count += len(rows)
+        return self.format_rows(rows)
+
+    def close(self):
+        """
+        カーソルを閉じ、コネクションをプールへ返却する（2回目以降は何もしない）。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+        self.pool.putconn(self.conn, discard=bool(self.conn.closed))
+        logger.debug("CursorStream: closed. (rows: %d)", self.count)
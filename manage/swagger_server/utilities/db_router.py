@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# レプリカの遅延秒数（WALを全て適用済みの場合は0とする）
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+# 遅延確認のクエリのタイムアウト（ミリ秒）
+CHECK_STATEMENT_TIMEOUT_MS = 2000
+
+
+class Replica(object):
+    """
+    読み取り用レプリカ1台分の情報
+    """
+
+    def __init__(self, name: str, pool):
+        """
+        Args:
+            name str : 表示名（ホスト名等）
+            pool ConnectionPool : レプリカのコネクションプール
+        """
+        self.name = name
+        self.pool = pool
+        # 最初の確認が終わるまでは使用しない
+        self.healthy = False
+        self.lag = None
+        self.checked_at = 0.0
+        self.reads = 0
+        self.errors = 0
+
+
+class ReplicaRouter(object):
+    """
+    読み取りクエリの振り分け先を決めるルーター
+    正常かつ遅延が閾値以内のレプリカをラウンドロビンで選び、該当が無い場合はプライマリを使用する。
+    レプリカの遅延・死活はバックグラウンドのスレッドで一定間隔ごとに確認し、リクエストのスレッドでは確認しない。
+    """
+
+    def __init__(self, replicas: list, max_lag: float = 5.0, check_interval: float = 5.0):
+        """
+        Args:
+            replicas list : Replicaのリスト
+            max_lag float : 読み取りに使用する遅延秒数の上限
+            check_interval float : 遅延・死活を確認する間隔（秒）
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next = 0
+        self._fallbacks = 0
+        self._stop_event = threading.Event()
+        self._checker = None
+
+    def start(self):
+        """
+        遅延・死活の確認スレッドを開始する（最初の確認は開始直後に行う）。
+        """
+        with self._lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._run, name="ReplicaRouter-checker", daemon=True)
+        self._checker.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            for replica in self.replicas:
+                self._check(replica)
+            self._stop_event.wait(self.check_interval)
+
+    def _check(self, replica: Replica):
+        """
+        レプリカの遅延を確認する。確認に失敗した場合は異常とする。
+        """
+        try:
+            with replica.pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", (CHECK_STATEMENT_TIMEOUT_MS,))
+                    cursor.execute(REPLICA_LAG_QUERY)
+                    lag = float(cursor.fetchone()[0])
+                conn.rollback()
+            healthy = lag <= self.max_lag
+            if not healthy:
+                logger.warning("ReplicaRouter: replica lag exceeded. (%s: %.3fs)", replica.name, lag)
+        except Exception:
+            logger.warning("ReplicaRouter: replica check failed. (%s)", replica.name, exc_info=True)
+            lag = None
+            healthy = False
+
+        with self._lock:
+            replica.lag = lag
+            replica.healthy = healthy
+            replica.checked_at = time.monotonic()
+
+    def choose(self):
+        """
+        読み取りに使用するレプリカを返す。使用できるレプリカが無い場合はNoneを返す。
+
+        :rtype: Replica
+        """
+        with self._lock:
+            count = len(self.replicas)
+            for offset in range(count):
+                replica = self.replicas[(self._next + offset) % count]
+                if replica.healthy:
+                    self._next = (self._next + offset + 1) % count
+                    replica.reads += 1
+                    return replica
+            self._fallbacks += 1
+            return None
+
+    def mark_failed(self, replica: Replica):
+        """
+        レプリカでの実行に失敗した場合に、次の確認まで使用しないようにする。
+        """
+        with self._lock:
+            replica.errors += 1
+            replica.healthy = False
+
+    def record_fallback(self):
+        with self._lock:
+            self._fallbacks += 1
+
+    def stats(self) -> dict:
+        """
+        ルーターの統計情報
+
+        :rtype: dict
+        """
+        with self._lock:
+            replicas = [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "lag": r.lag,
+                    "reads": r.reads,
+                    "errors": r.errors
+                }
+                for r in self.replicas
+            ]
+            fallbacks = self._fallbacks
+        for item, replica in zip(replicas, self.replicas):
+            item["pool"] = replica.pool.stats()
+        return {
+            "max_lag": self.max_lag,
+            "primary_fallbacks": fallbacks,
+            "replicas": replicas
+        }
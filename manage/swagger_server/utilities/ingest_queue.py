@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 一時的なエラーで登録に失敗した場合の最大待機秒数
+MAX_BACKOFF = 30.0
+
+QUEUE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        port TEXT NULL,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_owner TEXT NULL,
+        lease_until REAL NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS queue_lease_idx ON queue (lease_until, id)",
+    """
+    CREATE TABLE IF NOT EXISTS failed (
+        id INTEGER PRIMARY KEY,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        failed_at REAL NOT NULL,
+        attempts INTEGER NOT NULL,
+        status_code INTEGER NULL,
+        message TEXT NULL
+    )
+    """,
+]
+
+# ポートの列が無い旧形式のキューファイルへの追加
+QUEUE_MIGRATIONS = [
+    ("port", "ALTER TABLE queue ADD COLUMN port TEXT NULL"),
+]
+QUEUE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS queue_port_idx ON queue (port, id)",
+]
+
+# リース中でない要素を古い順に取り出す。
+# 同じポートの前の要素がリース中の場合は、ポートごとの登録順を保つため取り出さない。
+# ポート未設定（旧形式）の要素のリース中は、全ポートの後続の要素を取り出さない。
+SQL_QUEUE_CLAIM = """
+    UPDATE queue SET lease_owner = :owner, lease_until = :lease_until
+    WHERE id IN (
+        SELECT q.id FROM queue q
+        WHERE q.lease_until < :now
+          AND NOT EXISTS (
+              SELECT 1 FROM queue p
+              WHERE p.id < q.id AND p.lease_until >= :now
+                AND (p.port IS q.port OR p.port IS NULL)
+          )
+        ORDER BY q.id
+        LIMIT :limit
+    )
+"""
+
+
+class IngestQueue(object):
+    """
+    SQLiteによる永続化キュー（追記型）
+    putはSQLiteへのコミット（fsync）完了後に戻るため、戻った要素はプロセスの再起動後も失われない。
+    取り出しはリース方式とし、リース期限内にack/releaseされなかった要素は再度取り出し対象となる。
+    同じポートの要素は、前の要素のリース中は取り出さないため、複数の書き込みスレッドでもポートごとに登録順に登録される。
+    """
+
+    def __init__(self, path: str, lease_timeout: float = 60.0):
+        """
+        Args:
+            path str : キューのファイルパス
+            lease_timeout float : 取り出した要素のリース秒数
+        """
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._enqueued = 0
+        self._flushed = 0
+        self._failed = 0
+        self._retries = 0
+        self._flush_count = 0
+        self._flush_time = 0.0
+        self._flush_time_max = 0.0
+        self._latency_last = None
+        self._latency_max = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        for statement in QUEUE_SCHEMA:
+            conn.execute(statement)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(queue)")]
+        for column, statement in QUEUE_MIGRATIONS:
+            if column not in columns:
+                conn.execute(statement)
+        for statement in QUEUE_INDEXES:
+            conn.execute(statement)
+
+    def _connection(self):
+        """
+        スレッドごとのSQLiteコネクション
+        WALモード・synchronous=FULLとし、コミットごとにディスクへ書き出す。
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, item, port: str = None):
+        """
+        要素を追加する。
+
+        :param item: JSONに変換可能な要素
+        :param port: ドローンポートのID（同じポートの要素は登録順に取り出す）
+        """
+        payload = json.dumps(item)
+        conn = self._connection()
+        conn.execute("INSERT INTO queue (port, payload, enqueued_at) VALUES (?, ?, ?)", (port, payload, time.time()))
+        with self._lock:
+            self._enqueued += 1
+
+    def claim(self, limit: int) -> list:
+        """
+        リース中でない要素を古い順に最大limit件取り出す。
+        前の要素がリース中のポートの要素は取り出さない。
+
+        :return: (id, 要素, 追加日時, 試行回数)のリスト
+        :rtype: list
+        """
+        owner = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(SQL_QUEUE_CLAIM, {
+                "owner": owner, "lease_until": now + self.lease_timeout, "now": now, "limit": limit})
+            rows = conn.execute(
+                "SELECT id, payload, enqueued_at, attempts FROM queue WHERE lease_owner = ? ORDER BY id",
+                (owner,)).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(row[0], json.loads(row[1]), row[2], row[3]) for row in rows]
+
+    def ack(self, entries: list, flush_time: float = None):
+        """
+        登録済みの要素を削除する。
+
+        :param entries: claimで取り出した要素のリスト
+        :param flush_time: 登録に要した秒数
+        """
+        if not entries:
+            return
+        conn = self._connection()
+        conn.executemany("DELETE FROM queue WHERE id = ?", [(e[0],) for e in entries])
+
+        now = time.time()
+        with self._lock:
+            self._flushed += len(entries)
+            self._latency_last = now - min(e[2] for e in entries)
+            self._latency_max = max(self._latency_max, self._latency_last)
+            if flush_time is not None:
+                self._flush_count += 1
+                self._flush_time += flush_time
+                self._flush_time_max = max(self._flush_time_max, flush_time)
+
+    def release(self, entries: list, count_attempt: bool = True):
+        """
+        登録に失敗した要素のリースを解除する。
+
+        :param entries: claimで取り出した要素のリスト
+        :param count_attempt: 試行回数を加算するかどうか（DB停止等の要素によらない失敗の場合は加算しない）
+        """
+        if not entries:
+            return
+        conn = self._connection()
+        conn.executemany(
+            "UPDATE queue SET lease_owner = NULL, lease_until = 0, attempts = attempts + ? WHERE id = ?",
+            [(1 if count_attempt else 0, e[0]) for e in entries])
+        with self._lock:
+            self._retries += len(entries)
+
+    def fail(self, entry, status_code=None, message=None):
+        """
+        登録できない要素を失敗テーブルに移す。
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO failed (id, payload, enqueued_at, failed_at, attempts, status_code, message)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (entry[0], json.dumps(entry[1]), entry[2], time.time(), entry[3] + 1, status_code, message))
+            conn.execute("DELETE FROM queue WHERE id = ?", (entry[0],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._failed += 1
+
+    def stats(self) -> dict:
+        """
+        キューの統計情報
+
+        :rtype: dict
+        """
+        conn = self._connection()
+        depth, oldest = conn.execute("SELECT count(*), min(enqueued_at) FROM queue").fetchone()
+        failed_depth = conn.execute("SELECT count(*) FROM failed").fetchone()[0]
+        with self._lock:
+            return {
+                "depth": depth,
+                "oldest_age": time.time() - oldest if oldest else 0.0,
+                "failed_depth": failed_depth,
+                "enqueued": self._enqueued,
+                "flushed": self._flushed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "flushes": self._flush_count,
+                "flush_time_avg": self._flush_time / self._flush_count if self._flush_count else 0.0,
+                "flush_time_max": self._flush_time_max,
+                "latency_last": self._latency_last,
+                "latency_max": self._latency_max
+            }
+
+
+class IngestWriter(threading.Thread):
+    """
+    キューの要素をまとめて取り出し、登録関数に渡すバックグラウンドスレッド
+    登録関数は要素のリストを受け取り、(要素ごとの結果({"status_code", "message"})のリスト, 付加情報)を返す。
+    登録のコミット後、キューから削除する前にプロセスが停止した場合は再起動後に再度登録される（at-least-once）。
+    4xxの結果となった要素は再試行しても登録できないため失敗テーブルに移す。
+    """
+
+    def __init__(self, queue: IngestQueue, store, batch_size: int = 500, flush_interval: float = 0.2,
+                 max_attempts: int = 10, after_store=None, is_transient=None, name: str = "IngestWriter"):
+        """
+        Args:
+            queue IngestQueue : キュー
+            store function : 登録関数
+            batch_size int : 1回に登録する最大件数
+            flush_interval float : キューが空の場合の待機秒数
+            max_attempts int : 失敗テーブルに移すまでの試行回数
+            after_store function : 登録・削除の完了後に登録関数の戻り値の付加情報を渡す関数
+            is_transient function : 登録関数の例外が要素によらない一時的なエラー（DB接続断等）かどうかを返す関数
+            name str : スレッド名
+        """
+        super(IngestWriter, self).__init__(name=name, daemon=True)
+        self.queue = queue
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.after_store = after_store
+        self.is_transient = is_transient or (lambda error: False)
+        self._stop_event = threading.Event()
+        # 一時的なエラーが連続した回数（待機秒数の算出用）
+        self._transient_failures = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                entries = self.queue.claim(self.batch_size)
+            except Exception:
+                logger.exception("IngestWriter: failed to claim entries.")
+                self._stop_event.wait(self.flush_interval)
+                continue
+
+            if not entries:
+                self._stop_event.wait(self.flush_interval)
+                continue
+
+            self.flush(entries)
+
+    def flush(self, entries: list):
+        """
+        要素をまとめて登録する。
+        一時的なエラーの場合は全要素のリースを解除して1回だけ待機する（1件ずつの登録は行わない）。
+        それ以外のエラーの場合は1件ずつ登録し、登録できない要素を特定する。
+        """
+        error = self._store(entries)
+        if error is None:
+            return
+        if self.is_transient(error):
+            self._back_off(entries, error)
+            return
+        if len(entries) == 1:
+            self._retry(entries[0], error)
+            return
+
+        logger.warning("IngestWriter: batch store failed, retrying one by one. (count: %d)", len(entries),
+                       exc_info=error)
+        for index, entry in enumerate(entries):
+            error = self._store([entry])
+            if error is None:
+                continue
+            if self.is_transient(error):
+                # 1件ずつの登録中にDBが停止した場合は、残りの要素をまとめて待機させる
+                self._back_off(entries[index:], error)
+                return
+            self._retry(entry, error)
+
+    def _store(self, entries: list):
+        """
+        要素を登録し、結果をキューに反映する。
+
+        :return: 登録関数の例外（成功した場合はNone）
+        """
+        started = time.monotonic()
+        try:
+            results, extra = self.store([e[1] for e in entries])
+        except Exception as e:
+            return e
+        self._transient_failures = 0
+
+        flush_time = time.monotonic() - started
+        for entry, result in zip(entries, results):
+            status_code = result.get("status_code", 204)
+            if 400 <= status_code < 500:
+                logger.error("IngestWriter: rejected entry. (id: %s, status: %s, message: %s)",
+                             entry[0], status_code, result.get("message"))
+                self.queue.fail(entry, status_code, result.get("message"))
+        self.queue.ack(entries, flush_time)
+
+        if self.after_store:
+            try:
+                self.after_store(extra)
+            except Exception:
+                logger.exception("IngestWriter: after store failed.")
+        return None
+
+    def _back_off(self, entries: list, error):
+        """
+        一時的なエラーの場合に、全要素のリースを試行回数を加算せずに解除し、連続回数に応じて待機する。
+        """
+        self._transient_failures += 1
+        wait = min(self.flush_interval * (2 ** min(self._transient_failures - 1, 20)), MAX_BACKOFF)
+        logger.warning("IngestWriter: store failed with a transient error. (count: %d, retry in %.1fs)",
+                       len(entries), wait, exc_info=error)
+        self.queue.release(entries, count_attempt=False)
+        self._stop_event.wait(wait)
+
+    def _retry(self, entry, error):
+        """
+        登録できなかった要素のリースを解除する。試行回数の上限に達した場合は失敗テーブルに移す。
+        """
+        if entry[3] + 1 >= self.max_attempts:
+            logger.error("IngestWriter: entry exceeded max attempts. (id: %s)", entry[0], exc_info=error)
+            self.queue.fail(entry, None, "Exceeded max attempts.")
+            return
+        logger.warning("IngestWriter: store failed. (id: %s, attempts: %d)", entry[0], entry[3] + 1, exc_info=error)
+        self.queue.release([entry])
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+# マイグレーションファイル名 例: 0001_add_status_port_datetime_index.sql
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_([0-9A-Za-z_\-]+)\.sql$")
+# トランザクション外で実行するマイグレーションの目印（CREATE INDEX CONCURRENTLY等）
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+VERSION_TABLE = "schema_migrations"
+# パーティションテーブル等でCONCURRENTLYが使用できない場合のエラーコード(feature_not_supported)
+FEATURE_NOT_SUPPORTED = "0A000"
+# 複数プロセスが同時に起動した場合に適用を直列化するためのアドバイザリロックキー
+ADVISORY_LOCK_KEY = 72310001
+
+
+class Migration(object):
+    """
+    マイグレーション1件分の情報
+    """
+
+    def __init__(self, version: int, name: str, sql: str):
+        """
+        Args:
+            version int : バージョン番号（ファイル名先頭の数値）
+            name str : マイグレーション名
+            sql str : 実行するSQL
+        """
+        self.version = version
+        self.name = name
+        self.sql = sql
+        self.no_transaction = NO_TRANSACTION_MARKER in sql
+
+    def statements(self) -> list:
+        """
+        トランザクション外で実行する場合にSQLを1文ずつに分割する。
+        コメント行は除外する。文中に';'を含むリテラルは使用しないこと。
+        """
+        lines = [line for line in self.sql.splitlines() if not line.strip().startswith("--")]
+        return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def load_migrations(directory: str = MIGRATION_DIR) -> list:
+    """
+    マイグレーションディレクトリからSQLファイルを読み込み、バージョン順に並べて返す。
+
+    :param directory: マイグレーションディレクトリ
+    :return: Migrationのリスト
+    :rtype: list
+    """
+    migrations = {}
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError("Duplicate migration version. (version: %s)" % version)
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+            migrations[version] = Migration(version, match.group(2), f.read())
+
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def _execute_statement(cursor, statement: str):
+    """
+    autocommitで1文を実行する。
+    パーティションテーブルに対するCREATE/DROP INDEX CONCURRENTLYは未サポートのため、
+    その場合はCONCURRENTLYを外して再実行する（親テーブル経由で各パーティションに適用される）。
+    """
+    try:
+        cursor.execute(statement)
+    except Exception as e:
+        if getattr(e, "pgcode", None) != FEATURE_NOT_SUPPORTED or " CONCURRENTLY" not in statement:
+            raise
+        logger.warning("migrate(): CONCURRENTLY is not supported, retrying without it. (" + str(e).strip() + ")")
+        cursor.execute(statement.replace(" CONCURRENTLY", "", 1))
+
+
+def migrate(conn, directory: str = MIGRATION_DIR) -> list:
+    """
+    未適用のマイグレーションをバージョン順に適用し、バージョンテーブルに記録する。
+    通常のマイグレーションは1トランザクションで、目印のあるものはautocommitで1文ずつ実行する。
+
+    :param conn: DBコネクション（本関数内でautocommitを切り替える）
+    :param directory: マイグレーションディレクトリ
+    :return: 適用したバージョンのリスト
+    :rtype: list
+    """
+    migrations = load_migrations(directory)
+    applied_now = []
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (ADVISORY_LOCK_KEY,))
+        try:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS " + VERSION_TABLE + " ("
+                " version INTEGER PRIMARY KEY,"
+                " name VARCHAR(128) NOT NULL,"
+                " applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())")
+            cursor.execute("SELECT version FROM " + VERSION_TABLE)
+            applied = {row[0] for row in cursor.fetchall()}
+
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+
+                logger.info("migrate(): applying %04d_%s", migration.version, migration.name)
+                if migration.no_transaction:
+                    for statement in migration.statements():
+                        _execute_statement(cursor, statement)
+                    cursor.execute(
+                        "INSERT INTO " + VERSION_TABLE + " (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name))
+                else:
+                    conn.autocommit = False
+                    try:
+                        cursor.execute(migration.sql)
+                        cursor.execute(
+                            "INSERT INTO " + VERSION_TABLE + " (version, name) VALUES (%s, %s)",
+                            (migration.version, migration.name))
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+
+                applied_now.append(migration.version)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_KEY,))
+
+    logger.info("migrate(): applied versions: " + str(applied_now))
+    return applied_now
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 1件ずつの送信で連続して失敗した場合に送信を打ち切る件数
+MAX_CONSECUTIVE_FAILURES = 3
+
+# ドローンポートごとの送信順を保つためのアドバイザリロックのキー（ドローンポートのハッシュ値と組み合わせる）
+ADVISORY_LOCK_KEY = 72310003
+
+# 先頭（最も古い未送信）の通知が送信時刻になったドローンポートを、先頭の通知が古い順に取り出す
+# 先頭の通知が再送待ちのポートは、後続の通知を追い越して送信しないよう取り出さない
+SQL_OUTBOX_READY_PORTS = """
+    SELECT H.port
+    FROM (
+        SELECT DISTINCT ON (COALESCE(port, '')) COALESCE(port, '') AS port, id, next_attempt_at
+        FROM NOTIFICATION_OUTBOX
+        WHERE delivered_at IS NULL
+        ORDER BY COALESCE(port, ''), id
+    ) H
+    WHERE H.next_attempt_at <= now()
+    ORDER BY H.id
+    LIMIT %s
+"""
+# ドローンポートのロックを取得する（他の送信スレッド・プロセスが送信中のポートは飛ばす）
+# ロックはトランザクションの終了（送信結果の反映）まで保持する
+SQL_OUTBOX_LOCK_PORTS = """
+    SELECT P.port
+    FROM unnest(%s::varchar[]) AS P(port)
+    WHERE pg_try_advisory_xact_lock(%s, hashtext(P.port))
+"""
+# ロックしたドローンポートの未送信の通知を古い順に取り出す
+SQL_OUTBOX_CLAIM = """
+    SELECT id, COALESCE(port, ''), payload, attempts, next_attempt_at <= now()
+    FROM NOTIFICATION_OUTBOX
+    WHERE delivered_at IS NULL AND COALESCE(port, '') = ANY(%s)
+    ORDER BY id
+    LIMIT %s
+"""
+SQL_OUTBOX_DELIVERED = """
+    UPDATE NOTIFICATION_OUTBOX SET delivered_at = now(), attempts = attempts + 1, last_error = NULL
+    WHERE id = ANY(%s)
+"""
+SQL_OUTBOX_RETRY = """
+    UPDATE NOTIFICATION_OUTBOX
+    SET attempts = attempts + 1,
+        next_attempt_at = now() + make_interval(secs => %s),
+        last_error = %s
+    WHERE id = %s
+"""
+SQL_OUTBOX_PURGE = """
+    DELETE FROM NOTIFICATION_OUTBOX
+    WHERE delivered_at IS NOT NULL AND delivered_at < now() - make_interval(secs => %s)
+"""
+SQL_OUTBOX_PENDING = """
+    SELECT count(*), EXTRACT(EPOCH FROM now() - min(created_at))
+    FROM NOTIFICATION_OUTBOX
+    WHERE delivered_at IS NULL
+"""
+
+
+def backoff(attempts: int, base: float, maximum: float) -> float:
+    """
+    再送までの待機秒数（試行回数ごとに倍にし、上限で打ち切る）
+    """
+    return min(base * (2 ** min(attempts, 20)), maximum)
+
+
+def in_port_order(rows) -> list:
+    """
+    取り出した通知のうち、ドローンポートごとに先頭から送信時刻になった通知が続く範囲のみを返す。
+    再送待ちの通知以降は、順序を保つため同じポートの通知を送信しない。
+
+    :param rows: (id, ポート, 通知データ, 試行回数, 送信時刻になったか)のリスト（id順）
+    :rtype: list
+    """
+    blocked = set()
+    result = []
+    for row in rows:
+        if row[1] in blocked:
+            continue
+        if not row[4]:
+            blocked.add(row[1])
+            continue
+        result.append(row)
+    return result
+
+
+class OutboxDispatcher(threading.Thread):
+    """
+    アウトボックスの通知を送信するバックグラウンドスレッド
+    未送信の通知をまとめて取り出して送信関数に渡し、成功した通知を送信済みにする。
+    まとめての送信に失敗した場合は1件ずつ送信し、失敗した通知は待機時間を延ばして再送する。
+    通知はドローンポートごとに登録順に送信する。送信中のポートはアドバイザリロックで他のスレッド・プロセスから除外し、
+    送信に失敗した通知の再送待ちの間は、同じポートの後続の通知を送信しない。
+    """
+
+    def __init__(self, pool, deliver, batch_size: int = 100, poll_interval: float = 0.5,
+                 retry_base: float = 1.0, max_backoff: float = 300.0, retention: float = 86400.0,
+                 wakeup: threading.Event = None, stats: dict = None, stats_lock: threading.Lock = None,
+                 name: str = "OutboxDispatcher"):
+        """
+        Args:
+            pool ConnectionPool : DBコネクションプール
+            deliver function : 通知データのリストを送信する関数（失敗時は例外を送出する）
+            batch_size int : 1回に送信する最大件数
+            poll_interval float : 未送信の通知が無い場合の待機秒数
+            retry_base float : 再送の初回待機秒数
+            max_backoff float : 再送の最大待機秒数
+            retention float : 送信済みの通知を保持する秒数
+            wakeup threading.Event : 通知追加時にセットされるイベント（待機を打ち切る）
+            stats dict : 送信スレッド間で共有する統計情報
+            stats_lock threading.Lock : 統計情報のロック
+            name str : スレッド名
+        """
+        super(OutboxDispatcher, self).__init__(name=name, daemon=True)
+        self.pool = pool
+        self.deliver = deliver
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.wakeup = wakeup or threading.Event()
+        self.stats = stats if stats is not None else {}
+        self.stats_lock = stats_lock or threading.Lock()
+        self._stop_event = threading.Event()
+        self._purged_at = 0.0
+
+    def stop(self):
+        self._stop_event.set()
+        self.wakeup.set()
+
+    def _count(self, key: str, value=1):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + value
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                sent = self.dispatch_once()
+            except Exception:
+                logger.exception("OutboxDispatcher: dispatch failed.")
+                sent = 0
+
+            try:
+                self.purge()
+            except Exception:
+                logger.exception("OutboxDispatcher: purge failed.")
+
+            if sent < self.batch_size:
+                # 未送信の通知が無い場合は、通知の追加またはポーリング間隔まで待機する
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+
+    def claim(self, cursor) -> list:
+        """
+        送信可能なドローンポートをロックし、その通知をポートごとの登録順に取り出す。
+
+        :return: (id, ポート, 通知データ, 試行回数, 送信時刻になったか)のリスト
+        :rtype: list
+        """
+        cursor.execute(SQL_OUTBOX_READY_PORTS, (self.batch_size,))
+        ports = [row[0] for row in cursor.fetchall()]
+        if not ports:
+            return []
+        cursor.execute(SQL_OUTBOX_LOCK_PORTS, (ports, ADVISORY_LOCK_KEY))
+        ports = [row[0] for row in cursor.fetchall()]
+        if not ports:
+            return []
+        cursor.execute(SQL_OUTBOX_CLAIM, (ports, self.batch_size))
+        return in_port_order(cursor.fetchall())
+
+    def dispatch_once(self) -> int:
+        """
+        未送信の通知をまとめて送信する。
+
+        :return: 取り出した件数
+        :rtype: int
+        """
+        with self.pool.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    rows = self.claim(cursor)
+                    if not rows:
+                        conn.rollback()
+                        return 0
+
+                    started = time.monotonic()
+                    try:
+                        self.deliver([row[2] for row in rows])
+                        delivered = [row[0] for row in rows]
+                    except Exception as e:
+                        if len(rows) == 1:
+                            delivered = []
+                            self._retry(cursor, rows[0], e)
+                        else:
+                            logger.warning("OutboxDispatcher: batch delivery failed, retrying one by one. (count: %d)",
+                                           len(rows))
+                            delivered = self._deliver_each(cursor, rows)
+
+                    if delivered:
+                        cursor.execute(SQL_OUTBOX_DELIVERED, (delivered,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        self._count("delivered", len(delivered))
+        self._count("delivery_time", time.monotonic() - started)
+        self._count("deliveries")
+        return len(rows)
+
+    def _deliver_each(self, cursor, rows) -> list:
+        """
+        1件ずつ送信する。送信に失敗したポートは、失敗した通知を再送待ちとし後続の通知を送信しない。
+        送信先の停止時に全件を順に待たないよう、連続して失敗した場合は残りのポートの先頭の通知を再送待ちとする。
+        """
+        delivered = []
+        blocked = set()
+        consecutive_failures = 0
+        error = None
+        for row in rows:
+            if row[1] in blocked:
+                continue
+            if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                blocked.add(row[1])
+                self._retry(cursor, row, error)
+                continue
+            try:
+                self.deliver([row[2]])
+                delivered.append(row[0])
+                consecutive_failures = 0
+            except Exception as e:
+                error = e
+                consecutive_failures += 1
+                blocked.add(row[1])
+                self._retry(cursor, row, e)
+        return delivered
+
+    def _retry(self, cursor, row, error):
+        wait = backoff(row[3], self.retry_base, self.max_backoff)
+        logger.warning("OutboxDispatcher: delivery failed. (id: %s, attempts: %d, retry in %.1fs)",
+                       row[0], row[3] + 1, wait)
+        message = getattr(error, "error_message", None) or str(error)
+        cursor.execute(SQL_OUTBOX_RETRY, (wait, str(message)[:1000], row[0]))
+        self._count("failed_attempts")
+
+    def purge(self):
+        """
+        保持期間を過ぎた送信済みの通知を削除する（ポーリング間隔によらず1分に1回）。
+        """
+        now = time.monotonic()
+        if now - self._purged_at < 60:
+            return
+        self._purged_at = now
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(SQL_OUTBOX_PURGE, (self.retention,))
+                purged = cursor.rowcount
+            conn.commit()
+        if purged:
+            logger.debug("OutboxDispatcher: purged %d delivered notifications.", purged)
+            self._count("purged", purged)
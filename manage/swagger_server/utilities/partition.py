@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+import datetime
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 日時でレンジパーティショニングする立入り状態テーブル
+PARTITIONED_TABLES = ("entry_status_information", "event_information")
+STATUS_TABLE = "entry_status_information"
+EVENT_TABLE = "event_information"
+LEGACY_SUFFIX = "_legacy"
+DEFAULT_PARTITION_SUFFIX = "_default"
+
+INTERVAL_DAILY = "daily"
+INTERVAL_MONTHLY = "monthly"
+RETENTION_ACTION_DROP = "drop"
+RETENTION_ACTION_DETACH = "detach"
+
+# パーティション名の接尾辞 例: entry_status_information_p20241122 / entry_status_information_p202411
+PARTITION_NAME_PATTERN = re.compile(r"^(?P<parent>.+)_p(?P<suffix>\d{6}|\d{8})$")
+# 複数プロセスが同時に変換・メンテナンスしないためのアドバイザリロックキー
+ADVISORY_LOCK_KEY = 72310002
+
+
+def period_start(value: datetime.datetime, interval: str) -> datetime.datetime:
+    """
+    指定日時を含むパーティション期間の開始日時(UTC)を返す。
+    """
+    value = value.astimezone(datetime.timezone.utc)
+    if interval == INTERVAL_MONTHLY:
+        return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, value.day, tzinfo=datetime.timezone.utc)
+
+
+def next_period(start: datetime.datetime, interval: str) -> datetime.datetime:
+    """
+    パーティション期間の次の開始日時を返す。
+    """
+    if interval == INTERVAL_MONTHLY:
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start + datetime.timedelta(days=1)
+
+
+def partition_name(parent: str, start: datetime.datetime, interval: str) -> str:
+    """
+    パーティション名を返す。
+    """
+    if interval == INTERVAL_MONTHLY:
+        return parent + "_p" + start.strftime("%Y%m")
+    return parent + "_p" + start.strftime("%Y%m%d")
+
+
+def parse_partition_bounds(name: str):
+    """
+    パーティション名から(親テーブル名, 開始日時, 終了日時)を返す。
+    命名規則に合わないテーブルの場合はNoneを返す。
+    """
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    suffix = match.group("suffix")
+    if len(suffix) == 6:
+        start = datetime.datetime.strptime(suffix, "%Y%m").replace(tzinfo=datetime.timezone.utc)
+        return match.group("parent"), start, next_period(start, INTERVAL_MONTHLY)
+    start = datetime.datetime.strptime(suffix, "%Y%m%d").replace(tzinfo=datetime.timezone.utc)
+    return match.group("parent"), start, next_period(start, INTERVAL_DAILY)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    """
+    テーブルがパーティションテーブルかどうかを返す。
+    """
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema() AND c.relname = %s", (table,))
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(cursor, parent: str) -> list:
+    """
+    親テーブルにアタッチされているパーティション名のリストを返す。
+    """
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "JOIN pg_namespace n ON n.oid = p.relnamespace "
+        "WHERE n.nspname = current_schema() AND p.relname = %s", (parent,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _table_columns(cursor, table: str) -> list:
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position", (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _table_indexes(cursor, table: str) -> list:
+    """
+    主キー以外のインデックスの(インデックス名, 定義)のリストを返す。
+    """
+    cursor.execute(
+        "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+        "WHERE i.schemaname = current_schema() AND i.tablename = %s "
+        "AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid "
+        "  JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "  WHERE n.nspname = i.schemaname AND t.relname = i.tablename "
+        "  AND c.contype = 'p' AND c.conname = i.indexname)", (table,))
+    return cursor.fetchall()
+
+
+def _foreign_keys(cursor, table: str) -> list:
+    """
+    テーブルの外部キー制約名のリストを返す。
+    """
+    cursor.execute(
+        "SELECT c.conname FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = current_schema() AND t.relname = %s AND c.contype = 'f'", (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _default_periods(cursor, interval: str) -> list:
+    """
+    デフォルトパーティションに格納されている行の期間の開始日時のリストを返す。
+    """
+    unit = "month" if interval == INTERVAL_MONTHLY else "day"
+    periods = set()
+    for parent in PARTITIONED_TABLES:
+        cursor.execute(
+            "SELECT DISTINCT date_trunc(%s, datetime AT TIME ZONE 'UTC') "
+            'FROM "' + parent + DEFAULT_PARTITION_SUFFIX + '" WHERE datetime IS NOT NULL', (unit,))
+        periods.update(row[0].replace(tzinfo=datetime.timezone.utc) for row in cursor.fetchall())
+    return sorted(periods)
+
+
+def create_period_partitions(cursor, start: datetime.datetime, interval: str) -> list:
+    """
+    指定期間のパーティションを両テーブルに作成する（作成済みの場合は何もしない）。
+    デフォルトパーティションに期間内の行がある場合は、重複する範囲のパーティションを作成できないため、
+    行を新しいパーティションに移してからアタッチする。
+    イベントは立入り状態を外部キー(ent_stat_id, datetime)で参照するため、移動はイベント、立入り状態の順に行い、
+    アタッチは立入り状態、イベントの順に行う。
+
+    :return: 作成したパーティション名のリスト
+    :rtype: list
+    """
+    end = next_period(start, interval)
+    names = {parent: partition_name(parent, start, interval) for parent in PARTITIONED_TABLES}
+    created = []
+    moved = []
+    for parent in (EVENT_TABLE, STATUS_TABLE):
+        name = names[parent]
+        if name in list_partitions(cursor, parent):
+            continue
+        default = parent + DEFAULT_PARTITION_SUFFIX
+        cursor.execute(
+            'SELECT 1 FROM "' + default + '" WHERE datetime >= %s AND datetime < %s LIMIT 1', (start, end))
+        if cursor.fetchone() is None:
+            cursor.execute(
+                'CREATE TABLE "' + name + '" PARTITION OF "' + parent + '" FOR VALUES FROM (%s) TO (%s)',
+                (start, end))
+        else:
+            cursor.execute('CREATE TABLE "' + name + '" (LIKE "' + parent + '" INCLUDING DEFAULTS)')
+            cursor.execute(
+                'WITH moved AS (DELETE FROM "' + default + '" WHERE datetime >= %s AND datetime < %s RETURNING *) '
+                'INSERT INTO "' + name + '" SELECT * FROM moved', (start, end))
+            logger.warning("create_period_partitions(): moved %d rows from %s to %s.", cursor.rowcount, default, name)
+            moved.append(parent)
+        created.append(name)
+
+    for parent in PARTITIONED_TABLES:
+        if parent in moved:
+            cursor.execute(
+                'ALTER TABLE "' + parent + '" ATTACH PARTITION "' + names[parent] + '" FOR VALUES FROM (%s) TO (%s)',
+                (start, end))
+    return created
+
+
+def create_partitions(cursor, start: datetime.datetime, end: datetime.datetime, interval: str) -> list:
+    """
+    start～endを含む全期間のパーティションを両テーブルに作成する。
+
+    :return: 作成したパーティション名のリスト
+    :rtype: list
+    """
+    created = []
+    current = period_start(start, interval)
+    while current <= end:
+        created.extend(create_period_partitions(cursor, current, interval))
+        current = next_period(current, interval)
+    return created
+
+
+def expire_partition(cursor, parent: str, name: str, retention_action: str):
+    """
+    保持期間を過ぎたパーティションをデタッチし、dropの場合は削除する。
+    参照先のパーティションは参照元の行が残っているとデタッチできないため、イベントを先に処理すること。
+    デタッチしたイベントのパーティションからは、立入り状態テーブルへの外部キーを外す。
+    """
+    cursor.execute('ALTER TABLE "' + parent + '" DETACH PARTITION "' + name + '"')
+    if retention_action == RETENTION_ACTION_DETACH:
+        for constraint in _foreign_keys(cursor, name):
+            cursor.execute('ALTER TABLE "' + name + '" DROP CONSTRAINT "' + constraint + '"')
+    else:
+        cursor.execute('DROP TABLE "' + name + '"')
+
+
+def convert_to_partitioned(conn, interval: str, premake: int) -> bool:
+    """
+    立入り状態テーブルとイベントテーブルを日時でのレンジパーティションテーブルに変換する。
+    既存データは全件を新テーブルへコピーし、旧テーブルは削除する（保持期間を過ぎたパーティションはmaintain_partitionsで削除する）。
+    主キーはパーティションキーを含む(id, datetime)とし、イベントの立入り状態への外部キーは(ent_stat_id, datetime)とする。
+    変換中は両テーブルを排他ロックし、全件を1トランザクションでコピーするため、サービス停止中に実行すること。
+
+    :param conn: DBコネクション
+    :param interval: パーティション期間(daily/monthly)
+    :param premake: 事前に作成する将来のパーティション数
+    :return: 変換した場合はTrue、変換済みの場合はFalse
+    :rtype: bool
+    :raises ValueError: 一方のテーブルのみ変換済みの場合、または日時が未設定の立入り状態がある場合
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    with conn.cursor() as cursor:
+        partitioned = [is_partitioned(cursor, table) for table in PARTITIONED_TABLES]
+        if all(partitioned):
+            return False
+        if any(partitioned):
+            raise ValueError("Only one of the status tables is partitioned. " + str(dict(zip(PARTITIONED_TABLES, partitioned))))
+
+        logger.warning("convert_to_partitioned(): converting status tables to partitioned tables.")
+        cursor.execute('LOCK TABLE "' + STATUS_TABLE + '", "' + EVENT_TABLE + '" IN ACCESS EXCLUSIVE MODE')
+
+        # パーティションキーの日時は必須のため、未設定の行がある場合は変換しない
+        cursor.execute('SELECT count(*) FROM "' + STATUS_TABLE + '" WHERE datetime IS NULL')
+        missing = cursor.fetchone()[0]
+        if missing:
+            raise ValueError("Status rows without datetime cannot be partitioned. (count: %d)" % missing)
+
+        indexes = {}
+        columns = {}
+        for table in PARTITIONED_TABLES:
+            legacy = table + LEGACY_SUFFIX
+            indexes[table] = _table_indexes(cursor, table)
+            columns[table] = _table_columns(cursor, table)
+            cursor.execute('ALTER TABLE "' + table + '" RENAME TO "' + legacy + '"')
+            # 旧テーブル削除時に採番用シーケンスが削除されないよう紐づけを外す
+            cursor.execute('ALTER SEQUENCE "' + table + '_id_seq" OWNED BY NONE')
+            cursor.execute(
+                'CREATE TABLE "' + table + '" (LIKE "' + legacy + '" INCLUDING DEFAULTS) '
+                "PARTITION BY RANGE (datetime)")
+            cursor.execute(
+                'CREATE TABLE "' + table + DEFAULT_PARTITION_SUFFIX + '" PARTITION OF "' + table + '" DEFAULT')
+            # pg_get_serial_sequenceで採番用シーケンスを引けるよう新テーブルの列に紐づける
+            cursor.execute('ALTER SEQUENCE "' + table + '_id_seq" OWNED BY "' + table + '".id')
+
+        # 既存データの全期間と将来分のパーティションを作成
+        cursor.execute('SELECT min(datetime) FROM "' + STATUS_TABLE + LEGACY_SUFFIX + '"')
+        oldest = cursor.fetchone()[0] or now
+        latest = now
+        for _ in range(premake):
+            latest = next_period(period_start(latest, interval), interval)
+        create_partitions(cursor, min(oldest, now), latest, interval)
+
+        # 全データをコピー（イベントの日時は外部キーに合わせて立入り状態の日時とする）
+        status_columns = ", ".join('"' + c + '"' for c in columns[STATUS_TABLE])
+        cursor.execute(
+            'INSERT INTO "' + STATUS_TABLE + '" (' + status_columns + ') '
+            'SELECT ' + status_columns + ' FROM "' + STATUS_TABLE + LEGACY_SUFFIX + '"')
+
+        event_columns = ", ".join('"' + c + '"' for c in columns[EVENT_TABLE])
+        event_select = ", ".join(
+            "ES.datetime" if c == "datetime" else 'EV."' + c + '"' for c in columns[EVENT_TABLE])
+        cursor.execute(
+            'INSERT INTO "' + EVENT_TABLE + '" (' + event_columns + ') '
+            'SELECT ' + event_select + ' FROM "' + EVENT_TABLE + LEGACY_SUFFIX + '" EV '
+            'JOIN "' + STATUS_TABLE + LEGACY_SUFFIX + '" ES ON ES.id = EV.ent_stat_id')
+
+        cursor.execute('DROP TABLE "' + EVENT_TABLE + LEGACY_SUFFIX + '"')
+        cursor.execute('DROP TABLE "' + STATUS_TABLE + LEGACY_SUFFIX + '"')
+
+        # 主キー・外部キーを作成（パーティションテーブルの一意制約はパーティションキーを含める必要がある）
+        for table in PARTITIONED_TABLES:
+            cursor.execute(
+                'ALTER TABLE "' + table + '" ADD CONSTRAINT "' + table + '_pkey" PRIMARY KEY (id, datetime)')
+        cursor.execute(
+            'ALTER TABLE "' + STATUS_TABLE + '" ADD FOREIGN KEY (report_id) REFERENCES "report" (report_id)')
+        cursor.execute(
+            'ALTER TABLE "' + EVENT_TABLE + '" ADD FOREIGN KEY (ent_stat_id, datetime) '
+            'REFERENCES "' + STATUS_TABLE + '" (id, datetime)')
+
+        # 旧テーブルのインデックスを親テーブルに再作成
+        # パーティションキーを含まない一意インデックスは作成できないため、その場合は変換全体を失敗させる
+        for table in PARTITIONED_TABLES:
+            for name, definition in indexes[table]:
+                cursor.execute(definition)
+
+    conn.commit()
+    logger.warning("convert_to_partitioned(): conversion finished.")
+    return True
+
+
+def maintain_partitions(conn, interval: str, premake: int, retention_days: int, retention_action: str) -> dict:
+    """
+    将来分のパーティションを事前作成し、保持期間を過ぎたパーティションを削除またはデタッチする。
+    デフォルトパーティションに格納された行（範囲外の日時の行）は、その期間のパーティションを作成して移す。
+
+    :param conn: DBコネクション
+    :param interval: パーティション期間(daily/monthly)
+    :param premake: 事前に作成する将来のパーティション数
+    :param retention_days: 保持日数（0以下の場合は無期限）
+    :param retention_action: 保持期間を過ぎたパーティションの扱い(drop/detach)
+    :return: 作成・削除したパーティション名
+    :rtype: dict
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    result = {"created": [], "expired": []}
+
+    with conn.cursor() as cursor:
+        latest = now
+        for _ in range(premake):
+            latest = next_period(period_start(latest, interval), interval)
+        result["created"].extend(create_partitions(cursor, now, latest, interval))
+        conn.commit()
+
+        for start in _default_periods(cursor, interval):
+            result["created"].extend(create_period_partitions(cursor, start, interval))
+            conn.commit()
+
+        if not retention_days or retention_days <= 0:
+            return result
+
+        # 参照元のイベントのパーティションから処理する
+        cutoff = now - datetime.timedelta(days=retention_days)
+        for parent in (EVENT_TABLE, STATUS_TABLE):
+            for name in sorted(list_partitions(cursor, parent)):
+                bounds = parse_partition_bounds(name)
+                if not bounds or bounds[0] != parent or bounds[2] > cutoff:
+                    continue
+                expire_partition(cursor, parent, name, retention_action)
+                conn.commit()
+                result["expired"].append(name)
+
+    return result
+
+
+class PartitionMaintainer(threading.Thread):
+    """
+    パーティションメンテナンス用のバックグラウンドスレッド
+    一定間隔でパーティションの事前作成と保持期間切れパーティションの削除を行う。
+    テーブルの変換は行わないため、変換前（convert_partitions未実行）の場合は何もしない。
+    """
+
+    def __init__(
+            self,
+            pool,
+            interval: str,
+            premake: int,
+            retention_days: int,
+            retention_action: str,
+            check_interval: float):
+        """
+        Args:
+            pool ConnectionPool : DBコネクションプール
+            interval str : パーティション期間(daily/monthly)
+            premake int : 事前に作成する将来のパーティション数
+            retention_days int : 保持日数（0以下の場合は無期限）
+            retention_action str : 保持期間を過ぎたパーティションの扱い(drop/detach)
+            check_interval float : メンテナンスの実行間隔（秒）
+        """
+        super(PartitionMaintainer, self).__init__(name="partition-maintainer", daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self.premake = premake
+        self.retention_days = retention_days
+        self.retention_action = retention_action
+        self.check_interval = check_interval
+        self._stop_event = threading.Event()
+
+    def run_once(self) -> dict:
+        """
+        メンテナンスを1回実行する。
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (ADVISORY_LOCK_KEY,))
+                locked = cursor.fetchone()[0]
+            conn.commit()
+            if not locked:
+                logger.debug("PartitionMaintainer: another process is maintaining partitions.")
+                return {"created": [], "expired": []}
+
+            try:
+                with conn.cursor() as cursor:
+                    partitioned = all(is_partitioned(cursor, table) for table in PARTITIONED_TABLES)
+                conn.commit()
+                if not partitioned:
+                    logger.warning("PartitionMaintainer: status tables are not partitioned. "
+                                   "Run 'python3 -m swagger_server.convert_partitions' while the service is stopped.")
+                    return {"created": [], "expired": []}
+                result = maintain_partitions(
+                    conn, self.interval, self.premake, self.retention_days, self.retention_action)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_KEY,))
+                conn.commit()
+        if result["created"] or result["expired"]:
+            logger.info("PartitionMaintainer: " + str(result))
+        return result
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("PartitionMaintainer: maintenance failed.")
+            self._stop_event.wait(self.check_interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+import threading
+
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# プリペアドステートメントが存在しない場合のエラーコード(invalid_sql_statement_name)
+INVALID_SQL_STATEMENT_NAME = "26000"
+STATEMENT_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """
+    プリペアド済みのステートメント名を保持するコネクション
+    プリペアドステートメントはセッション単位のため、プールのコネクションごとに管理する。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PreparingConnection, self).__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class PreparedStatementRegistry(object):
+    """
+    サーバーサイドのプリペアドステートメントの登録簿
+    名前とSQL(%sプレースホルダー)を登録しておき、コネクションごとに初回のみPREPAREして、以降はEXECUTEで実行する。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> PREPARE文
+        self._statements = {}
+
+    def register(self, name: str, sql: str):
+        """
+        ステートメントを登録する。同名で同じSQLの再登録は無視する。
+
+        :param name: ステートメント名
+        :param sql: %sプレースホルダーのSQL
+        """
+        if not STATEMENT_NAME_PATTERN.match(name):
+            raise ValueError("Invalid statement name. (name: %s)" % name)
+
+        # %sを位置パラメータ($1, $2, ...)に置き換える
+        counter = iter(range(1, sql.count("%s") + 1))
+        prepare = "PREPARE " + name + " AS " + re.sub(r"%s", lambda m: "$" + str(next(counter)), sql)
+
+        with self._lock:
+            registered = self._statements.get(name)
+            if registered is not None and registered != prepare:
+                raise ValueError("Statement is already registered with another SQL. (name: %s)" % name)
+            self._statements[name] = prepare
+
+    def is_registered(self, name: str) -> bool:
+        with self._lock:
+            return name in self._statements
+
+    def execute(self, cursor, name: str, params=()):
+        """
+        登録済みのステートメントを実行する。
+        コネクションで未PREPAREの場合は先にPREPAREする。
+
+        :param cursor: PreparingConnectionのカーソル
+        :param name: ステートメント名
+        :param params: パラメータ
+        """
+        conn = cursor.connection
+        prepared = getattr(conn, "prepared", None)
+
+        if prepared is None:
+            # PreparingConnection以外ではPREPARE済みかを管理できない
+            raise TypeError("Connection does not support prepared statements.")
+
+        if name not in prepared:
+            with self._lock:
+                prepare = self._statements[name]
+            cursor.execute(prepare)
+            prepared.add(name)
+            logger.debug("PreparedStatementRegistry: prepared " + name)
+
+        query = "EXECUTE " + name
+        if params:
+            query += " (" + ", ".join(["%s"] * len(params)) + ")"
+        try:
+            cursor.execute(query, params)
+        except psycopg2.Error as e:
+            if e.pgcode == INVALID_SQL_STATEMENT_NAME:
+                # セッション側で破棄されていた場合は次回に再PREPAREする
+                prepared.discard(name)
+            raise
+
+
+# プロセス内で共有する登録簿
+registry = PreparedStatementRegistry()
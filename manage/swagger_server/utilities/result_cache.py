@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class ResultCache(object):
+    """
+    LRU + TTLの結果キャッシュ
+    スレッドセーフで件数上限を持ち、ポート単位での無効化と統計情報を提供する。
+    キーの先頭要素をポートとして扱い、ポート未指定(None)のエントリは全ポートの更新で無効化する。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 1.0):
+        """
+        Args:
+            max_size int : 最大エントリ数
+            ttl float : エントリの有効秒数
+        """
+        if max_size <= 0 or ttl <= 0:
+            raise ValueError("Invalid cache size or ttl. (max_size: %s, ttl: %s)" % (max_size, ttl))
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (値, 有効期限, 世代)
+        self._entries = OrderedDict()
+        # ポートごとの無効化世代。取得開始後に無効化された結果は格納しない
+        self._generations = {}
+        self._global_generation = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def _generation(self, port):
+        # ロック取得済みの状態で呼び出すこと
+        if port is None:
+            return (self._global_generation, sum(self._generations.values()))
+        return (self._global_generation, self._generations.get(port, 0))
+
+    def get(self, key):
+        """
+        キャッシュから値を取得する。
+
+        :param key: キャッシュキー（先頭要素がポート）
+        :return: (ヒットしたか, 値, 世代)。ミスの場合の世代はputに渡す。
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, generation = entry
+                if expires_at > now and generation == self._generation(key[0]):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, value, generation
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return False, None, self._generation(key[0])
+
+    def put(self, key, value, generation, ttl: float = None):
+        """
+        値をキャッシュに格納する。
+        取得開始後に対象ポートが無効化されている場合は格納しない。
+
+        :param key: キャッシュキー（先頭要素がポート）
+        :param value: 値
+        :param generation: getで返却された世代
+        :param ttl: このエントリの有効秒数（省略時はキャッシュの有効秒数、0以下の場合は格納しない）
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation(key[0]):
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, port=None):
+        """
+        ポートのエントリを無効化する。ポート未指定の場合は全エントリを無効化する。
+
+        :param port: ドローンポートのID
+        """
+        with self._lock:
+            self._invalidations += 1
+            if port is None:
+                self._global_generation += 1
+                self._entries.clear()
+                return
+            self._generations[port] = self._generations.get(port, 0) + 1
+            for key in [k for k in self._entries if k[0] == port or k[0] is None]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """
+        キャッシュの統計情報
+
+        :return: 統計情報
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations
+            }
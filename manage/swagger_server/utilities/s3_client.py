@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_RETRY_MODE = "standard"
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class S3Client(object):
+    """
+    プロセス内で共有するS3クライアント
+    boto3のセッション・認証情報・エンドポイントの解決と接続プールを生成時に1回だけ行い、以降のリクエストで再利用する。
+    boto3のクライアントはスレッドセーフのため、複数スレッドから同時に使用できる（resourceはスレッドセーフではないため使用しない）。
+    """
+
+    def __init__(
+            self,
+            endpoint_url: str = None,
+            region_name: str = None,
+            max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            retry_mode: str = DEFAULT_RETRY_MODE,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+            addressing_style: str = None):
+        """
+        Args:
+            endpoint_url str : S3互換ストレージ（MinIO等）のエンドポイント（省略時はAWSのS3）
+            region_name str : リージョン（省略時は環境変数・設定ファイルの値）
+            max_pool_connections int : 接続プールの最大接続数
+            connect_timeout float : 接続タイムアウト（秒）
+            read_timeout float : 読み取りタイムアウト（秒）
+            retry_mode str : 再試行モード（legacy, standard, adaptive）
+            max_attempts int : 最大試行回数（初回を含む）
+            addressing_style str : バケットの指定方式（auto, virtual, path）。MinIO等ではpathを指定する
+        """
+        s3_config = {"addressing_style": addressing_style} if addressing_style else None
+        config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={"mode": retry_mode, "total_max_attempts": max_attempts},
+            s3=s3_config)
+        session = boto3.session.Session()
+        self.client = session.client("s3", endpoint_url=endpoint_url, region_name=region_name, config=config)
+        self.endpoint_url = self.client.meta.endpoint_url
+
+        self._lock = threading.Lock()
+        # 操作 -> {"requests", "errors", "time"}
+        self._operations = {}
+        # 再試行・マルチパートの各パートを含むHTTPリクエスト数
+        self._http_requests = 0
+        self.client.meta.events.register("before-send.s3", self._on_send)
+
+    def _on_send(self, **kwargs):
+        with self._lock:
+            self._http_requests += 1
+
+    def _record(self, operation: str, started: float, error: bool):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._operations.setdefault(operation, {"requests": 0, "errors": 0, "time": 0.0})
+            stats["requests"] += 1
+            stats["time"] += elapsed
+            if error:
+                stats["errors"] += 1
+
+    def get_object(self, bucket: str, key: str) -> bytes:
+        """
+        オブジェクトを取得する。
+
+        :return: オブジェクトの内容
+        :rtype: bytes
+        """
+        started = time.monotonic()
+        error = False
+        try:
+            response = self.client.get_object(Bucket=bucket, Key=key)
+            return response["Body"].read()
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record("get_object", started, error)
+
+    def upload_fileobj(self, fileobj, bucket: str, key: str):
+        """
+        ファイルオブジェクトをアップロードする（サイズに応じてマルチパートでアップロードする）。
+        """
+        started = time.monotonic()
+        error = False
+        try:
+            self.client.upload_fileobj(fileobj, bucket, key)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record("upload_fileobj", started, error)
+
+    def _connections(self) -> int:
+        """
+        接続プールで新規に確立した接続数（botocoreの内部構造に依存するため、取得できない場合はNone）
+        """
+        try:
+            pools = self.client._endpoint.http_session._manager.pools
+            connections = 0
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+            return connections
+        except Exception:
+            return None
+
+    def stats(self) -> dict:
+        """
+        S3クライアントの統計情報
+        connectionsは新規に確立した接続数で、http_requestsとの差が接続を再利用したリクエスト数となる。
+
+        :rtype: dict
+        """
+        connections = self._connections()
+        with self._lock:
+            operations = {
+                operation: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "time_avg": stats["time"] / stats["requests"] if stats["requests"] else 0.0
+                }
+                for operation, stats in self._operations.items()
+            }
+            http_requests = self._http_requests
+        return {
+            "endpoint_url": self.endpoint_url,
+            "http_requests": http_requests,
+            "connections": connections,
+            "reused": max(http_requests - connections, 0) if connections is not None else None,
+            "operations": operations
+        }
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import threading
+
+# 変化判定の結果
+TRANSITION = "transition"
+UNCHANGED = "unchanged"
+STALE = "stale"
+
+
+def state_of(detect, events) -> tuple:
+    """
+    変化判定に使用する状態（立入り状態の代表値, 障害物の識別子 -> (種別, 検知状態)）
+    位置情報は移動により毎回変わるため状態に含めない。
+    """
+    objects = {}
+    for event in events or []:
+        objects[event.get('id')] = (event.get('type'), event.get('detect'))
+    return (detect, objects)
+
+
+class StateTracker(object):
+    """
+    ドローンポートごとの最後の状態を保持し、立入り状態が状態の変化を含むかを判定する。
+    状態はプロセス内で保持し、初回の参照時にload関数で永続化済みの最新の状態から復元する。
+    """
+
+    def __init__(self, load):
+        """
+        Args:
+            load function : ポートのリストを受け取り、ポート -> (日時, 代表値, イベントのリスト)を返す関数
+        """
+        self.load = load
+        self._lock = threading.Lock()
+        # ポート -> (日時, 状態)
+        self._states = {}
+
+        self._observed = 0
+        self._transitions = 0
+        self._unchanged = 0
+        self._stale = 0
+        self._loads = 0
+
+    def observe(self, statuses: list) -> list:
+        """
+        立入り状態を到着順に判定し、変化を含む場合は最後の状態を更新する。
+        保持している状態より古い日時の立入り状態は、状態を更新せずSTALEとする。
+
+        :param statuses: (ポート, 日時, 代表値, イベントのリスト)のリスト
+        :return: 要素ごとの判定結果（TRANSITION, UNCHANGED, STALE）
+        :rtype: list
+        """
+        with self._lock:
+            missing = set(s[0] for s in statuses if s[0] not in self._states)
+        loaded = {}
+        if missing:
+            loaded = self.load(list(missing))
+
+        results = []
+        with self._lock:
+            for port in missing:
+                if port not in self._states and port in loaded:
+                    _datetime, detect, events = loaded[port]
+                    self._states[port] = (_datetime, state_of(detect, events))
+            if missing:
+                self._loads += 1
+
+            for port, _datetime, detect, events in statuses:
+                current = self._states.get(port)
+                state = state_of(detect, events)
+                if current is None:
+                    result = TRANSITION
+                else:
+                    try:
+                        older = _datetime < current[0]
+                    except TypeError:
+                        # タイムゾーン有無が混在する日時は比較できないため到着順とする
+                        older = False
+                    if older:
+                        result = STALE
+                    elif state == current[1]:
+                        result = UNCHANGED
+                    else:
+                        result = TRANSITION
+
+                if result != STALE:
+                    self._states[port] = (_datetime, state)
+                results.append(result)
+
+            self._observed += len(statuses)
+            self._transitions += results.count(TRANSITION)
+            self._unchanged += results.count(UNCHANGED)
+            self._stale += results.count(STALE)
+        return results
+
+    def forget(self, ports):
+        """
+        ポートの状態を破棄する（登録に失敗した場合に呼び出し、次回の参照時に永続化済みの状態から復元する）。
+        """
+        with self._lock:
+            for port in set(ports):
+                self._states.pop(port, None)
+
+    def stats(self) -> dict:
+        """
+        状態変化判定の統計情報
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "ports": len(self._states),
+                "observed": self._observed,
+                "transitions": self._transitions,
+                "unchanged": self._unchanged,
+                "stale": self._stale,
+                "loads": self._loads
+            }
@@ -4,6 +4,7 @@ import connexion
 import logging
 
 from swagger_server import encoder
+from swagger_server.service import service
 from swagger_server.utilities.error_handler import handle_api_exception
 
 __LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s :%(message)s'
@@ -11,6 +12,8 @@ logging.basicConfig(format=__LOG_FORMAT, level=logging.DEBUG)
 
 
 def main():
+    service.start_delivery_workers()
+
     app = connexion.App(__name__, specification_dir='./swagger/')
     app.app.json_encoder = encoder.JSONEncoder
     app.add_error_handler(Exception, handle_api_exception)
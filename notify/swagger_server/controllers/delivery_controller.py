@@ -0,0 +1,79 @@
+import logging
+from flask import jsonify, make_response # type: ignore
+from swagger_server.service import service
+
+logger = logging.getLogger(__name__)
+
+# 未送信の通知取得
+def deliveries_pending_get(subscriber=None, limit=None):  # noqa: E501
+    """未送信通知取得API
+
+    送信キューの未送信の通知を古い順に取得するためのAPI # noqa: E501
+
+    :param subscriber: 購読者名
+    :type subscriber: str
+    :param limit: 取得件数
+    :type limit: int
+
+    :rtype: List[DeliveryEntry]
+    """
+    logger.debug("deliveries_pending_get(): subscriber : " + str(subscriber) + ", limit : " + str(limit))
+
+    entries = service.get_pending_deliveries(subscriber, limit)
+    response = make_response(jsonify(entries))
+
+    logger.debug("deliveries_pending_get(): response status code : " + str(response.status_code))
+    logger.debug("deliveries_pending_get(): count : " + str(len(entries)))
+
+    return response
+
+
+# デッドレター取得
+def deliveries_dead_letters_get(subscriber=None, limit=None):  # noqa: E501
+    """デッドレター取得API
+
+    送信に失敗し続けた通知を古い順に取得するためのAPI # noqa: E501
+
+    :param subscriber: 購読者名
+    :type subscriber: str
+    :param limit: 取得件数
+    :type limit: int
+
+    :rtype: List[DeliveryEntry]
+    """
+    logger.debug("deliveries_dead_letters_get(): subscriber : " + str(subscriber) + ", limit : " + str(limit))
+
+    entries = service.get_dead_letters(subscriber, limit)
+    response = make_response(jsonify(entries))
+
+    logger.debug("deliveries_dead_letters_get(): response status code : " + str(response.status_code))
+    logger.debug("deliveries_dead_letters_get(): count : " + str(len(entries)))
+
+    return response
+
+
+# デッドレター再送
+def deliveries_dead_letters_replay_post(body=None):  # noqa: E501
+    """デッドレター再送API
+
+    デッドレターの通知を送信キューへ戻し、指定した速度で再送するためのAPI # noqa: E501
+
+    :param body: 再送条件
+    :type body: dict | bytes
+
+    :rtype: ReplayResponse
+    """
+    body = body or {}
+    logger.debug("deliveries_dead_letters_replay_post(): body : " + str(body))
+
+    replayed = service.replay_dead_letters(
+        ids=body.get('ids'),
+        subscriber=body.get('subscriber'),
+        limit=body.get('limit'),
+        rate=body.get('rate'))
+    response = make_response(jsonify({"replayed": replayed}))
+
+    logger.debug("deliveries_dead_letters_replay_post(): response status code : " + str(response.status_code))
+    logger.debug("deliveries_dead_letters_replay_post(): response data : " + str(response.data))
+
+    return response
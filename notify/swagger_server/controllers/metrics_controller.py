@@ -0,0 +1,31 @@
+import logging
+from flask import jsonify, make_response # type: ignore
+from swagger_server.service import service
+
+logger = logging.getLogger(__name__)
+
+# 統計情報取得
+def metrics_get():  # noqa: E501
+    """統計情報取得API
+
+    ローカルデータ管理への送信に使用するHTTP接続、バッチ送信、レーン、購読者ごとの送信、送信キュー、設定ファイルの読み込み等の統計情報を取得するためのAPI # noqa: E501
+
+    :rtype: object
+    """
+    logger.debug("metrics_get(): start")
+
+    metrics = {
+        "http": service.get_http_stats(),
+        "batch": service.get_batcher_stats(),
+        "subscribers": service.get_subscriber_stats(),
+        "lanes": service.get_lanes_stats(),
+        "queue": service.get_delivery_queue_stats(),
+        "config": service.get_config_stats()
+    }
+
+    response = make_response(jsonify(metrics))
+
+    logger.debug("metrics_get(): response status code : " + str(response.status_code))
+    logger.debug("metrics_get(): response data : " + str(response.data))
+
+    return response
@@ -25,9 +25,32 @@ def status_post(body):  # noqa: E501
 
     service.notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpointUrl)
 
-    response = make_response('', 200)
+    # 送信キューが有効な場合は、キューに追加した時点で受付済みとする
+    response = make_response('', 202 if service.delivery_queue_enabled() else 200)
     
     logger.debug("status_post(): response status code : " + str(response.status_code))
     logger.debug("status_post(): response headers : " + str(response.headers))
     
-    return response
\ No newline at end of file
+    return response
+
+
+def status_batch_post(body):  # noqa: E501
+    """立入り状態一括通知API
+
+    複数の立入り状態の情報（テキストデータ）をまとめて通知するためのAPI # noqa: E501
+
+    :param body: 通知データのリスト
+    :type body: list | bytes
+
+    :rtype: None
+    """
+    logger.debug("status_batch_post(): count : " + str(len(body)))
+
+    service.notify_local_data_batch(body)
+
+    response = make_response('', 202 if service.delivery_queue_enabled() else 200)
+
+    logger.debug("status_batch_post(): response status code : " + str(response.status_code))
+    logger.debug("status_batch_post(): response headers : " + str(response.headers))
+
+    return response
@@ -1,7 +1,14 @@
 import logging
-import requests # type: ignore
-import json
+import threading
+import time
+from queue import Full
 from swagger_server.utilities.notify_exception import NotifyException
+from swagger_server.utilities.batcher import MicroBatcher
+from swagger_server.utilities.fanout import FanOut, Subscriber
+from swagger_server.utilities.delivery_queue import DeliveryQueue, DeliveryWorker
+from swagger_server.utilities.lanes import LaneDispatcher
+from service_common import config_loader, http_client
+from service_common.config_loader import ConfigLoader
 from requests.exceptions import Timeout
 from flask import make_response
 
@@ -10,29 +17,192 @@ logger = logging.getLogger(__name__)
 CONFIG_PATH = "/usr/src/app/swagger_server/configs/config.json"
 CONFIG_LOCAL_URL = "local_url"
 CONFIG_LOCAL_API_KEY = "local_api_key"
+CONFIG_HTTP_POOL_CONNECTIONS = "http_pool_connections"
+CONFIG_HTTP_POOL_MAXSIZE = "http_pool_maxsize"
+CONFIG_HTTP_CONNECT_TIMEOUT = "http_connect_timeout"
+CONFIG_HTTP_READ_TIMEOUT = "http_read_timeout"
+CONFIG_HTTP_RETRY_TOTAL = "http_retry_total"
+CONFIG_HTTP_RETRY_BACKOFF = "http_retry_backoff"
+CONFIG_HTTP_RETRY_STATUS = "http_retry_status"
+CONFIG_HTTP_RETRY_POST = "http_retry_post"
+CONFIG_LOCAL_BATCH_ENABLED = "local_batch_enabled"
+CONFIG_LOCAL_BATCH_URL = "local_batch_url"
+CONFIG_LOCAL_BATCH_WINDOW_MS = "local_batch_window_ms"
+CONFIG_LOCAL_BATCH_MAX_COUNT = "local_batch_max_count"
+CONFIG_LOCAL_BATCH_WAIT_TIMEOUT = "local_batch_wait_timeout"
+CONFIG_SUBSCRIBERS = "subscribers"
+CONFIG_SUBSCRIBER_WORKERS = "subscriber_workers"
+CONFIG_LOCAL_LANES_ENABLED = "local_lanes_enabled"
+CONFIG_LOCAL_LANE_COUNT = "local_lane_count"
+CONFIG_LOCAL_LANE_QUEUE_SIZE = "local_lane_queue_size"
+CONFIG_LOCAL_LANE_PUT_TIMEOUT = "local_lane_put_timeout"
+CONFIG_DELIVERY_QUEUE_ENABLED = "delivery_queue_enabled"
+CONFIG_DELIVERY_QUEUE_PATH = "delivery_queue_path"
+CONFIG_DELIVERY_WORKER_COUNT = "delivery_worker_count"
+CONFIG_DELIVERY_BATCH_SIZE = "delivery_batch_size"
+CONFIG_DELIVERY_POLL_INTERVAL = "delivery_poll_interval"
+CONFIG_DELIVERY_RETRY_BASE = "delivery_retry_base"
+CONFIG_DELIVERY_MAX_BACKOFF = "delivery_max_backoff"
+CONFIG_DELIVERY_MAX_ATTEMPTS = "delivery_max_attempts"
+CONFIG_DELIVERY_LEASE_TIMEOUT = "delivery_lease_timeout"
+CONFIG_DELIVERY_REPLAY_RATE = "delivery_replay_rate"
+CONFIG_CONFIG_CHECK_INTERVAL = "config_check_interval"
+
+# 設定値の型（読み込み時に検証し、不正な場合は直前の設定を使用する）
+CONFIG_SCHEMA = {
+    CONFIG_LOCAL_URL: config_loader.STR,
+    CONFIG_LOCAL_API_KEY: config_loader.STR,
+    CONFIG_HTTP_POOL_CONNECTIONS: config_loader.INT,
+    CONFIG_HTTP_POOL_MAXSIZE: config_loader.INT,
+    CONFIG_HTTP_CONNECT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_HTTP_READ_TIMEOUT: config_loader.NUMBER,
+    CONFIG_HTTP_RETRY_TOTAL: config_loader.INT,
+    CONFIG_HTTP_RETRY_BACKOFF: config_loader.NUMBER,
+    CONFIG_HTTP_RETRY_STATUS: config_loader.LIST,
+    CONFIG_HTTP_RETRY_POST: config_loader.BOOL,
+    CONFIG_LOCAL_BATCH_ENABLED: config_loader.BOOL,
+    CONFIG_LOCAL_BATCH_URL: config_loader.STR,
+    CONFIG_LOCAL_BATCH_WINDOW_MS: config_loader.NUMBER,
+    CONFIG_LOCAL_BATCH_MAX_COUNT: config_loader.INT,
+    CONFIG_LOCAL_BATCH_WAIT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_SUBSCRIBERS: config_loader.LIST,
+    CONFIG_SUBSCRIBER_WORKERS: config_loader.INT,
+    CONFIG_LOCAL_LANES_ENABLED: config_loader.BOOL,
+    CONFIG_LOCAL_LANE_COUNT: config_loader.INT,
+    CONFIG_LOCAL_LANE_QUEUE_SIZE: config_loader.INT,
+    CONFIG_LOCAL_LANE_PUT_TIMEOUT: config_loader.NUMBER,
+    CONFIG_DELIVERY_QUEUE_ENABLED: config_loader.BOOL,
+    CONFIG_DELIVERY_QUEUE_PATH: config_loader.STR,
+    CONFIG_DELIVERY_WORKER_COUNT: config_loader.INT,
+    CONFIG_DELIVERY_BATCH_SIZE: config_loader.INT,
+    CONFIG_DELIVERY_POLL_INTERVAL: config_loader.NUMBER,
+    CONFIG_DELIVERY_RETRY_BASE: config_loader.NUMBER,
+    CONFIG_DELIVERY_MAX_BACKOFF: config_loader.NUMBER,
+    CONFIG_DELIVERY_MAX_ATTEMPTS: config_loader.INT,
+    CONFIG_DELIVERY_LEASE_TIMEOUT: config_loader.NUMBER,
+    CONFIG_DELIVERY_REPLAY_RATE: config_loader.NUMBER,
+    CONFIG_CONFIG_CHECK_INTERVAL: config_loader.NUMBER,
+}
+
+DEFAULT_LOCAL_BATCH_WINDOW_MS = 20
+DEFAULT_LOCAL_BATCH_MAX_COUNT = 100
+DEFAULT_LOCAL_BATCH_WAIT_TIMEOUT = 60
+DEFAULT_SUBSCRIBER_WORKERS = 8
+# subscribers未設定の場合にlocal_url/local_api_keyから作成する購読者の名前
+DEFAULT_SUBSCRIBER_NAME = "local"
+DEFAULT_LOCAL_LANE_COUNT = 8
+DEFAULT_LOCAL_LANE_QUEUE_SIZE = 1000
+DEFAULT_LOCAL_LANE_PUT_TIMEOUT = 5
+DEFAULT_DELIVERY_QUEUE_PATH = "/usr/src/app/data/delivery_queue.db"
+DEFAULT_DELIVERY_WORKER_COUNT = 2
+DEFAULT_DELIVERY_BATCH_SIZE = 100
+DEFAULT_DELIVERY_POLL_INTERVAL = 0.5
+DEFAULT_DELIVERY_RETRY_BASE = 1
+DEFAULT_DELIVERY_MAX_BACKOFF = 300
+DEFAULT_DELIVERY_MAX_ATTEMPTS = 10
+DEFAULT_DELIVERY_LEASE_TIMEOUT = 60
+DEFAULT_DELIVERY_REPLAY_RATE = 10
+# 管理APIで取得・再送する件数の上限
+DEFAULT_ADMIN_LIMIT = 100
+MAX_ADMIN_LIMIT = 1000
+
+# ローカルデータ管理への送信で共有するHTTPクライアント
+_http_client = None
+_http_client_lock = threading.Lock()
+# ローカルデータ管理へのバッチ送信スレッド（無効の場合はFalse）
+_batcher = None
+_batcher_lock = threading.Lock()
+# 購読者への並行送信
+_fanout = None
+_fanout_lock = threading.Lock()
+# ポートごとの順序を保って並行に送信するレーン（無効の場合はFalse）
+_lanes = None
+_lanes_lock = threading.Lock()
+# 購読者ごとの送信キュー（無効の場合はFalse）と送信スレッド
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
+_delivery_workers = []
+_delivery_wakeup = threading.Event()
+# 設定ファイルの読み込み結果（更新時のみ再読み込みする）
+_config_loader = ConfigLoader(CONFIG_PATH, CONFIG_SCHEMA, check_interval_key=CONFIG_CONFIG_CHECK_INTERVAL)
 
 #設定ファイルの読み込み
 def load_config():
     """
      CONFIG_PATHに設定された設定ファイルの読み込み
+     読み込み・検証済みの設定を返し、ファイルが更新された場合のみ再読み込みする。
+     購読者・HTTPクライアント等の初回呼び出し時に生成するオブジェクトには、再読み込みした設定は反映されない。
     
-    :return: コンフィグ
+    :return: コンフィグ（読み取り専用）
     
     """
     try:
-        with open(CONFIG_PATH, "r") as config_file:
-            config = json.load(config_file)
+        return _config_loader.get()
     except Exception as e:
         logger.exception("Failed to load config file.")
         raise NotifyException("Failed to load config file.", 500)
 
-    logger.debug("load_config(): config" + str(config))
-    return config
+#設定ファイルの読み込みの統計情報取得
+def get_config_stats():
+    """
+     設定ファイルの読み込みの統計情報取得
+
+    :return: 統計情報
+
+    """
+    return _config_loader.stats()
+
+#HTTPクライアント取得
+def get_http_client():
+    """
+     HTTPクライアント取得
+     初回呼び出し時に設定ファイルの接続プール・タイムアウト・再試行の設定で生成し、以降はプロセス内で共有する。
+     ローカルデータ管理への接続（TLS）を再利用する。
+
+    :return: HTTPクライアント
+
+    """
+    global _http_client
+
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                config = load_config()
+                try:
+                    _http_client = http_client.HttpClient(
+                        pool_connections=config.get(CONFIG_HTTP_POOL_CONNECTIONS, http_client.DEFAULT_POOL_CONNECTIONS),
+                        pool_maxsize=config.get(CONFIG_HTTP_POOL_MAXSIZE, http_client.DEFAULT_POOL_MAXSIZE),
+                        connect_timeout=config.get(CONFIG_HTTP_CONNECT_TIMEOUT, http_client.DEFAULT_CONNECT_TIMEOUT),
+                        read_timeout=config.get(CONFIG_HTTP_READ_TIMEOUT, http_client.DEFAULT_READ_TIMEOUT),
+                        retry_total=config.get(CONFIG_HTTP_RETRY_TOTAL, http_client.DEFAULT_RETRY_TOTAL),
+                        retry_backoff=config.get(CONFIG_HTTP_RETRY_BACKOFF, http_client.DEFAULT_RETRY_BACKOFF),
+                        retry_status=config.get(CONFIG_HTTP_RETRY_STATUS, http_client.DEFAULT_RETRY_STATUS),
+                        retry_post=config.get(CONFIG_HTTP_RETRY_POST, False))
+                except (ValueError, TypeError) as e:
+                    logger.error("Invalid configuration.(http: " + str(e) + ")")
+                    raise NotifyException("Invalid configuration.(http)", 500)
+
+    return _http_client
+
+#HTTPクライアントの統計情報取得
+def get_http_stats():
+    """
+     HTTPクライアントの送信先ホストごとの統計情報取得
+
+    :return: 統計情報
+
+    """
+    return get_http_client().stats()
 
 #ローカルデータ管理に通知
 def notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpointUrl):
     """
     ローカルデータ管理に通知。
+    設定ファイルの購読者のうち、条件に一致する全ての購読者へ並行して送信する。
+    送信キューが有効な場合は、キューに追加した時点で戻り、送信は送信スレッドで行う。
+    送信キューは購読者・ポートごとに到着順に送信するため、レーン・バッチ送信の設定は使用しない。
+    レーンが有効な場合は、ポートのレーンで到着順に送信し、送信の完了まで待機する。
+    バッチ送信が有効な場合は、他の通知とまとめて送信し、送信の完了まで待機する。
 
     :param dronePortId: ドローンポートのID
     :param timestamp: 日時
@@ -47,12 +217,51 @@ def notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpoi
     logger.debug("notify_local_data(): events:" + str(events))
     logger.debug("notify_local_data(): reportEndpointUrl:" + str(reportEndpointUrl))
 
+    notification_data = build_notification_data(dronePortId, timestamp, anyDetection, events, reportEndpointUrl)
+
+    if delivery_queue_enabled():
+        enqueue_deliveries([notification_data])
+        return
+
+    lanes = get_lanes()
+    if lanes is not None:
+        wait_batch(submit_lanes(lanes, [notification_data]))
+        return
+
+    batcher = get_batcher()
+    if batcher is not None:
+        # バッチ送信の完了まで待機し、失敗した場合はエラーとする
+        wait_batch(batcher.submit([notification_data]))
+        return
+
+    deliver_to_subscribers([notification_data])
+    return
+
+#ローカルデータ管理への通知データ作成
+def build_notification_data(dronePortId, timestamp, anyDetection, events, reportEndpointUrl):
+    """
+    ローカルデータ管理へ送信する通知データを作成する。
+
+    :param dronePortId: ドローンポートのID
+    :param timestamp: 日時
+    :param anyDetection: 検知フラグ
+    :param events: イベントのリスト
+    :param reportEndpointUrl: レポートのエンドポイント
+    :return: 通知データ
+    """
     event_list = []
     #リストからjsonを取り出す
     for ev in events:        
         tmp = {}
+        #管理機能で解析済みの緯度経度がある場合はそのまま使用する
+        if ev.get('latitude') is not None and ev.get('longitude') is not None:
+            ev['location'] = {
+                "latitude": ev['latitude'],
+                "longitude": ev['longitude']
+            }
+            tmp['location'] = ev['location']
         #locationの値(緯度経度)を分割
-        if 'location' in ev:
+        elif 'location' in ev:
             location_div = ev['location'].split(",")         
             #分割した値のデータ型を変更し、変数に設定
             try:
@@ -87,8 +296,15 @@ def notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpoi
         "events": event_list,
         "reportEndpointUrl": reportEndpointUrl
     }
-    
-    # 設定ファイルからローカルデータ管理の接続情報を取得
+    return notification_data
+
+#ローカルデータ管理の接続情報取得
+def get_local_config():
+    """
+    設定ファイルからローカルデータ管理の接続情報を取得する。
+
+    :return: (local_url, local_api_key)
+    """
     config = load_config()
     if CONFIG_LOCAL_URL in config and config[CONFIG_LOCAL_URL] :
         local_url = config[CONFIG_LOCAL_URL]
@@ -102,11 +318,117 @@ def notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpoi
         logger.error("Not found local_api_key. (Local API Key: %s)", CONFIG_LOCAL_API_KEY)
         raise NotifyException("Not found local_api_key.", 500)
 
+    return local_url, local_api_key
+
+#購読者の設定読み込み
+def load_subscribers(config):
+    """
+    設定ファイルから購読者のリストを作成する。
+    subscribersが未設定の場合は、local_url/local_api_key/local_batch_urlを送信先とする購読者1件とする。
+
+    :param config: コンフィグ
+    :return: Subscriberのリスト
+    """
+    entries = config.get(CONFIG_SUBSCRIBERS)
+    if not entries:
+        local_url, local_api_key = get_local_config()
+        return [Subscriber(DEFAULT_SUBSCRIBER_NAME, local_url, local_api_key,
+                           batch_url=config.get(CONFIG_LOCAL_BATCH_URL))]
+
+    subscribers = []
+    names = set()
+    for entry in entries:
+        try:
+            subscriber = Subscriber(
+                entry.get("name"),
+                entry.get("url"),
+                entry.get("api_key"),
+                batch_url=entry.get("batch_url"),
+                ports=entry.get("ports"),
+                object_types=entry.get("object_types"))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error("Invalid configuration.(subscribers: " + str(e) + ")")
+            raise NotifyException("Invalid configuration.(subscribers)", 500)
+        if subscriber.name in names:
+            logger.error("Duplicate subscriber name. (name: %s)", subscriber.name)
+            raise NotifyException("Invalid configuration.(subscribers)", 500)
+        names.add(subscriber.name)
+        subscribers.append(subscriber)
+    return subscribers
+
+#購読者への並行送信取得
+def get_fanout():
+    """
+     購読者への並行送信取得
+     初回呼び出し時に設定ファイルの購読者で生成し、以降はプロセス内で共有する。
+
+    :return: 購読者への並行送信
+
+    """
+    global _fanout
+
+    if _fanout is None:
+        with _fanout_lock:
+            if _fanout is None:
+                config = load_config()
+                subscribers = load_subscribers(config)
+                try:
+                    _fanout = FanOut(
+                        subscribers,
+                        post_local_data,
+                        max_workers=config.get(CONFIG_SUBSCRIBER_WORKERS, DEFAULT_SUBSCRIBER_WORKERS))
+                except (ValueError, TypeError) as e:
+                    logger.error("Invalid configuration.(subscriber_workers: " + str(e) + ")")
+                    raise NotifyException("Invalid configuration.(subscriber_workers)", 500)
+
+    return _fanout
+
+#購読者へ送信
+def deliver_to_subscribers(notification_data_list, batch=False):
+    """
+    通知データを条件に一致する購読者へ並行して送信する。
+    いずれかの購読者への送信に失敗した場合はエラーとする（送信に成功した購読者へは再通知時に重複して送信される）。
+
+    :param notification_data_list: 通知データのリスト（到着順）
+    :param batch: 購読者のバッチ受付URLへまとめて送信するか
+    """
+    errors = get_fanout().deliver(notification_data_list, batch=batch)
+    if not errors:
+        return
+
+    names = sorted(errors.keys())
+    logger.error("deliver_to_subscribers(): failed subscribers:" + ", ".join(names))
+    last_error = errors[names[-1]]
+    if isinstance(last_error, NotifyException):
+        raise NotifyException(
+            "Failed to notify subscribers: " + ", ".join(names) + ". (" + str(last_error.error_message) + ")",
+            last_error.http_status_code)
+    raise NotifyException("Failed to notify subscribers: " + ", ".join(names) + ".", 500)
+
+#購読者ごとの統計情報取得
+def get_subscriber_stats():
+    """
+     購読者ごとの送信件数・エラー件数・送信時間の統計情報取得
+
+    :return: 統計情報
+
+    """
+    return get_fanout().stats()
+
+#ローカルデータ管理へのPOST
+def post_local_data(local_url, local_api_key, notification_data):
+    """
+    ローカルデータ管理へ通知データをPOSTする。
+
+    :param local_url: 送信先URL
+    :param local_api_key: APIキー
+    :param notification_data: 通知データ（バッチ送信の場合は通知データのリスト）
+    """
     # ローカルデータ管理へ状態通知
     try:
-        logger.debug("notify_local_data(): local_url:" + local_url)
-        logger.debug("notify_local_data(): notification_data:" + str(notification_data))
-        response = requests.post(
+        logger.debug("post_local_data(): local_url:" + local_url)
+        logger.debug("post_local_data(): notification_data:" + str(notification_data))
+        response = get_http_client().post(
             local_url,
             json=notification_data,
             headers={
@@ -127,3 +449,423 @@ def notify_local_data(dronePortId, timestamp, anyDetection, events, reportEndpoi
         
     logger.debug("notify(): response status:" + str(response.status_code))
     return
+
+#ローカルデータ管理に一括通知
+def notify_local_data_batch(notifications):
+    """
+    ローカルデータ管理に一括通知。
+    受信した通知データを順に通知し、失敗した通知があった場合は件数をまとめてエラーとする。
+
+    :param notifications: 通知データのリスト。各要素はport, datetime, detect, event, report_endpointを持つ辞書。
+    """
+
+    logger.debug("notify_local_data_batch(): count:" + str(len(notifications)))
+
+    queue_enabled = delivery_queue_enabled()
+    lanes = get_lanes()
+    batcher = get_batcher()
+    if queue_enabled or lanes is not None or batcher is not None:
+        notification_data_list = [
+            build_notification_data(
+                notification.get('port'),
+                notification.get('datetime'),
+                notification.get('detect'),
+                notification.get('event'),
+                notification.get('report_endpoint'))
+            for notification in notifications
+        ]
+        if queue_enabled:
+            # 受信した通知データを1回のコミットで送信キューに追加する
+            enqueue_deliveries(notification_data_list)
+        elif lanes is not None:
+            # ポートごとのレーンに到着順に追加する
+            wait_batch(submit_lanes(lanes, notification_data_list))
+        else:
+            # 受信した通知データを連続してバッチ送信に追加する
+            wait_batch(batcher.submit(notification_data_list))
+        return
+
+    failed = 0
+    last_error = None
+    for notification in notifications:
+        try:
+            notify_local_data(
+                notification.get('port'),
+                notification.get('datetime'),
+                notification.get('detect'),
+                notification.get('event'),
+                notification.get('report_endpoint'))
+        except NotifyException as e:
+            failed += 1
+            last_error = e
+
+    if failed:
+        logger.error("notify_local_data_batch(): failed:" + str(failed) + "/" + str(len(notifications)))
+        raise NotifyException(
+            "Failed to notify " + str(failed) + " of " + str(len(notifications)) + " statuses. (" + str(last_error.error_message) + ")",
+            last_error.http_status_code)
+    return
+
+#バッチ送信スレッド取得
+def get_batcher():
+    """
+     ローカルデータ管理へのバッチ送信スレッド取得
+     設定ファイルでlocal_batch_enabledが有効な場合、初回呼び出し時にスレッドを開始し、以降はプロセス内で共有する。
+
+    :return: バッチ送信スレッド（無効の場合はNone）
+
+    """
+    global _batcher
+
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                config = load_config()
+                if not config.get(CONFIG_LOCAL_BATCH_ENABLED, False):
+                    _batcher = False
+                else:
+                    try:
+                        batcher = MicroBatcher(
+                            send_local_batch,
+                            window=config.get(CONFIG_LOCAL_BATCH_WINDOW_MS, DEFAULT_LOCAL_BATCH_WINDOW_MS) / 1000.0,
+                            max_count=config.get(CONFIG_LOCAL_BATCH_MAX_COUNT, DEFAULT_LOCAL_BATCH_MAX_COUNT))
+                    except (ValueError, TypeError) as e:
+                        logger.error("Invalid configuration.(local_batch: " + str(e) + ")")
+                        raise NotifyException("Invalid configuration.(local_batch)", 500)
+                    batcher.start()
+                    _batcher = batcher
+
+    return _batcher or None
+
+#バッチ送信
+def send_local_batch(notification_data_list):
+    """
+    通知データのリストを購読者ごとのバッチ受付URLへ1回で送信する（バッチ送信スレッドから呼び出す）。
+    バッチ受付URLが未設定の購読者には1件ずつ送信する。
+
+    :param notification_data_list: 通知データのリスト（到着順）
+    """
+    deliver_to_subscribers(notification_data_list, batch=True)
+
+#バッチ送信の完了待ち
+def wait_batch(pending):
+    """
+    バッチ送信・レーンの送信の完了を待機し、失敗した通知があった場合はエラーとする。
+
+    :param pending: バッチ送信・レーンに追加した要素のリスト
+    """
+    config = load_config()
+    timeout = config.get(CONFIG_LOCAL_BATCH_WAIT_TIMEOUT, DEFAULT_LOCAL_BATCH_WAIT_TIMEOUT)
+    deadline = time.monotonic() + timeout
+
+    failed = 0
+    last_error = None
+    for item in pending:
+        if not item.wait(max(deadline - time.monotonic(), 0)):
+            logger.error("wait_batch(): batch send timed out.")
+            raise NotifyException("Timeout occuered.", 500)
+        if item.error is not None:
+            failed += 1
+            last_error = item.error
+
+    if failed:
+        logger.error("wait_batch(): failed:" + str(failed) + "/" + str(len(pending)))
+        if isinstance(last_error, NotifyException):
+            raise NotifyException(
+                "Failed to notify " + str(failed) + " of " + str(len(pending)) + " statuses. (" + str(last_error.error_message) + ")",
+                last_error.http_status_code)
+        raise NotifyException("Failed to notify " + str(failed) + " of " + str(len(pending)) + " statuses.", 500)
+    return
+
+#バッチ送信の統計情報取得
+def get_batcher_stats():
+    """
+     バッチ送信の統計情報取得
+     バッチ送信が無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+
+    """
+    batcher = get_batcher()
+    if batcher is None:
+        return {}
+    return batcher.stats()
+
+#レーン取得
+def get_lanes():
+    """
+     ポートごとの順序を保って並行に送信するレーン取得
+     設定ファイルでlocal_lanes_enabledが有効な場合、初回呼び出し時にレーンのスレッドを開始し、以降はプロセス内で共有する。
+
+    :return: レーン（無効の場合はNone）
+
+    """
+    global _lanes
+
+    if _lanes is None:
+        with _lanes_lock:
+            if _lanes is None:
+                config = load_config()
+                if not config.get(CONFIG_LOCAL_LANES_ENABLED, False):
+                    _lanes = False
+                else:
+                    try:
+                        _lanes = LaneDispatcher(
+                            send_lane,
+                            lane_count=config.get(CONFIG_LOCAL_LANE_COUNT, DEFAULT_LOCAL_LANE_COUNT),
+                            lane_size=config.get(CONFIG_LOCAL_LANE_QUEUE_SIZE, DEFAULT_LOCAL_LANE_QUEUE_SIZE),
+                            max_count=config.get(CONFIG_LOCAL_BATCH_MAX_COUNT, DEFAULT_LOCAL_BATCH_MAX_COUNT),
+                            put_timeout=config.get(CONFIG_LOCAL_LANE_PUT_TIMEOUT, DEFAULT_LOCAL_LANE_PUT_TIMEOUT))
+                    except (ValueError, TypeError) as e:
+                        logger.error("Invalid configuration.(local_lane: " + str(e) + ")")
+                        raise NotifyException("Invalid configuration.(local_lane)", 500)
+
+    return _lanes or None
+
+#レーンへの追加
+def submit_lanes(lanes, notification_data_list):
+    """
+    通知データをドローンポートIDのレーンに到着順に追加する。
+    レーンが満杯のまま待機時間を超えた場合は、送信元に再送させるためエラーとする。
+
+    :param lanes: レーン
+    :param notification_data_list: 通知データのリスト（到着順）
+    :return: レーンに追加した要素のリスト
+    """
+    try:
+        return lanes.submit([(data.get("dronePortId"), data) for data in notification_data_list])
+    except Full:
+        logger.error("submit_lanes(): lane queue is full.")
+        raise NotifyException("Too many pending notifications.", 503)
+
+#レーンの送信
+def send_lane(notification_data_list):
+    """
+    レーンに溜まった通知データを購読者へ送信する（レーンのスレッドから呼び出す）。
+    2件以上の場合は購読者ごとのバッチ受付URLへまとめて送信する。
+
+    :param notification_data_list: 通知データのリスト（到着順）
+    """
+    deliver_to_subscribers(notification_data_list, batch=len(notification_data_list) > 1)
+
+#レーンの統計情報取得
+def get_lanes_stats():
+    """
+     レーンの統計情報取得
+     レーンが無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+
+    """
+    lanes = get_lanes()
+    if lanes is None:
+        return {}
+    return lanes.stats()
+
+#送信キュー取得
+def get_delivery_queue():
+    """
+     購読者ごとの送信キュー取得
+     設定ファイルでdelivery_queue_enabledが有効な場合、初回呼び出し時にキューを開き、以降はプロセス内で共有する。
+
+    :return: 送信キュー（無効の場合はNone）
+
+    """
+    global _delivery_queue
+
+    if _delivery_queue is None:
+        with _delivery_queue_lock:
+            if _delivery_queue is None:
+                config = load_config()
+                if not config.get(CONFIG_DELIVERY_QUEUE_ENABLED, False):
+                    _delivery_queue = False
+                else:
+                    try:
+                        _delivery_queue = DeliveryQueue(
+                            config.get(CONFIG_DELIVERY_QUEUE_PATH, DEFAULT_DELIVERY_QUEUE_PATH),
+                            lease_timeout=config.get(CONFIG_DELIVERY_LEASE_TIMEOUT, DEFAULT_DELIVERY_LEASE_TIMEOUT))
+                    except Exception as e:
+                        logger.exception("Failed to open delivery queue.")
+                        raise NotifyException("Failed to open delivery queue.", 500)
+
+    return _delivery_queue or None
+
+#送信キューの有効判定
+def delivery_queue_enabled():
+    """
+    通知を送信キュー経由で送信するかどうかを返す。
+
+    :rtype: bool
+    """
+    return get_delivery_queue() is not None
+
+#送信キューへの追加
+def enqueue_deliveries(notification_data_list):
+    """
+    通知データを条件に一致する購読者ごとに送信キューへ追加し、待機中の送信スレッドを起こす。
+    送信キューは購読者・ドローンポートごとの到着順を保ち、別のポートの通知は並行して送信する。
+
+    :param notification_data_list: 通知データのリスト（到着順）
+    """
+    fanout = get_fanout()
+    entries = [
+        (name, notification_data, notification_data.get("dronePortId"))
+        for notification_data in notification_data_list
+        for name in fanout.match(notification_data)
+    ]
+    try:
+        get_delivery_queue().put(entries)
+    except Exception as e:
+        logger.exception("Failed to enqueue notifications.")
+        raise NotifyException("Failed to enqueue notifications.", 500)
+    _delivery_wakeup.set()
+
+#送信スレッド開始
+def start_delivery_workers():
+    """
+     送信スレッド開始
+     送信キューが有効な場合、キューの通知を購読者へ送信するスレッドを開始する。
+     前回の停止時に未送信だった通知も、起動後に送信する。
+
+    """
+    queue = get_delivery_queue()
+    if queue is None:
+        logger.info("start_delivery_workers(): delivery queue is disabled.")
+        return
+
+    config = load_config()
+    worker_count = config.get(CONFIG_DELIVERY_WORKER_COUNT, DEFAULT_DELIVERY_WORKER_COUNT)
+    batch_size = config.get(CONFIG_DELIVERY_BATCH_SIZE, DEFAULT_DELIVERY_BATCH_SIZE)
+    if not isinstance(worker_count, int) or worker_count <= 0:
+        logger.error("Invalid configuration.(delivery_worker_count: " + str(worker_count) + ")")
+        raise NotifyException("Invalid configuration.(delivery_worker_count)", 500)
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        logger.error("Invalid configuration.(delivery_batch_size: " + str(batch_size) + ")")
+        raise NotifyException("Invalid configuration.(delivery_batch_size)", 500)
+
+    # 購読者の設定を起動時に検証する
+    get_fanout()
+
+    for i in range(worker_count):
+        worker = DeliveryWorker(
+            queue, deliver_queued,
+            batch_size=batch_size,
+            poll_interval=config.get(CONFIG_DELIVERY_POLL_INTERVAL, DEFAULT_DELIVERY_POLL_INTERVAL),
+            retry_base=config.get(CONFIG_DELIVERY_RETRY_BASE, DEFAULT_DELIVERY_RETRY_BASE),
+            max_backoff=config.get(CONFIG_DELIVERY_MAX_BACKOFF, DEFAULT_DELIVERY_MAX_BACKOFF),
+            max_attempts=config.get(CONFIG_DELIVERY_MAX_ATTEMPTS, DEFAULT_DELIVERY_MAX_ATTEMPTS),
+            wakeup=_delivery_wakeup,
+            name="DeliveryWorker-" + str(i))
+        worker.start()
+        _delivery_workers.append(worker)
+
+#送信キューの通知の送信
+def deliver_queued(subscriber_name, notification_data_list):
+    """
+    送信キューから取り出した通知データを購読者へ送信する（送信スレッドから呼び出す）。
+    設定ファイルから削除された購読者の通知は送信できないため、デッドレターに移す。
+
+    :param subscriber_name: 購読者名
+    :param notification_data_list: 通知データのリスト（到着順）
+    """
+    try:
+        get_fanout().deliver_to(subscriber_name, notification_data_list)
+    except KeyError:
+        logger.error("Not found subscriber. (name: %s)", subscriber_name)
+        raise NotifyException("Not found subscriber.", 404)
+
+#送信キュー取得（管理API用）
+def get_delivery_queue_for_admin():
+    """
+    管理APIから送信キューを操作する。送信キューが無効の場合はエラーとする。
+
+    :return: 送信キュー
+    """
+    queue = get_delivery_queue()
+    if queue is None:
+        logger.error("Delivery queue is disabled.")
+        raise NotifyException("Delivery queue is disabled.", 404)
+    return queue
+
+#管理APIの取得件数の検証
+def check_admin_limit(limit):
+    """
+    管理APIの取得・再送件数を検証する。
+
+    :param limit: 件数（未指定の場合はNone）
+    :return: 件数
+    """
+    if limit is None:
+        return DEFAULT_ADMIN_LIMIT
+    if limit <= 0 or limit > MAX_ADMIN_LIMIT:
+        logger.error("Invalid limit. (limit: %s)", limit)
+        raise NotifyException("Invalid limit.", 400)
+    return limit
+
+#未送信の通知の取得
+def get_pending_deliveries(subscriber=None, limit=None):
+    """
+    送信キューの未送信の通知を古い順に取得する。
+
+    :param subscriber: 購読者名（省略時は全て）
+    :param limit: 取得件数
+    :return: 未送信の通知のリスト
+    """
+    limit = check_admin_limit(limit)
+    return get_delivery_queue_for_admin().pending(subscriber, limit)
+
+#デッドレターの取得
+def get_dead_letters(subscriber=None, limit=None):
+    """
+    デッドレターの通知を古い順に取得する。
+
+    :param subscriber: 購読者名（省略時は全て）
+    :param limit: 取得件数
+    :return: デッドレターの通知のリスト
+    """
+    limit = check_admin_limit(limit)
+    return get_delivery_queue_for_admin().dead_letters(subscriber, limit)
+
+#デッドレターの再送
+def replay_dead_letters(ids=None, subscriber=None, limit=None, rate=None):
+    """
+    デッドレターの通知を送信キューへ戻し、指定した速度で再送する。
+
+    :param ids: 再送する通知のID（省略時は全て）
+    :param subscriber: 購読者名（省略時は全て）
+    :param limit: 再送する最大件数
+    :param rate: 1秒あたりの再送件数（省略時は設定ファイルの値）
+    :return: 再送した件数
+    """
+    queue = get_delivery_queue_for_admin()
+    limit = check_admin_limit(limit)
+    if rate is None:
+        rate = load_config().get(CONFIG_DELIVERY_REPLAY_RATE, DEFAULT_DELIVERY_REPLAY_RATE)
+    if rate <= 0:
+        logger.error("Invalid rate. (rate: %s)", rate)
+        raise NotifyException("Invalid rate.", 400)
+
+    try:
+        replayed = queue.replay(ids=ids, subscriber=subscriber, limit=limit, rate=rate)
+    except Exception as e:
+        logger.exception("Failed to replay dead letters.")
+        raise NotifyException("Failed to replay dead letters.", 500)
+    logger.info("replay_dead_letters(): replayed:" + str(replayed))
+    _delivery_wakeup.set()
+    return replayed
+
+#送信キューの統計情報取得
+def get_delivery_queue_stats():
+    """
+     送信キューの統計情報取得
+     送信キューが無効の場合は空の辞書を返す。
+
+    :return: 統計情報
+
+    """
+    queue = get_delivery_queue()
+    if queue is None:
+        return {}
+    stats = queue.stats()
+    stats["workers"] = len(_delivery_workers)
+    return stats
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from swagger_server.utilities.batcher import MicroBatcher
+
+
+def test_items_are_sent_in_arrival_order():
+    batches = []
+    batcher = MicroBatcher(batches.append, window=0.05, max_count=100)
+    pending = batcher.submit([1, 2]) + batcher.submit([3])
+    batcher.start()
+    for p in pending:
+        assert p.wait(5)
+    batcher.stop()
+
+    assert batches == [[1, 2, 3]]
+    assert all(p.error is None for p in pending)
+
+
+def test_batch_is_split_at_max_count():
+    batches = []
+    batcher = MicroBatcher(batches.append, window=5, max_count=2)
+    pending = batcher.submit([1, 2, 3, 4, 5])
+    batcher.start()
+    for p in pending[:4]:
+        assert p.wait(5)
+    batcher.stop()
+    assert pending[4].wait(5)
+
+    # 件数上限に達したバッチは待機期限を待たずに送信する
+    assert batches == [[1, 2], [3, 4], [5]]
+
+
+def test_send_error_is_set_on_batch():
+    def send(items):
+        raise Exception("failed")
+
+    batcher = MicroBatcher(send, window=0, max_count=10)
+    batcher.start()
+    pending = batcher.submit([1, 2])
+    for p in pending:
+        assert p.wait(5)
+    batcher.stop()
+
+    assert [str(p.error) for p in pending] == ["failed", "failed"]
+    assert batcher.stats()["errors"] == 1
+
+
+def test_window_limits_wait():
+    sent = threading.Event()
+    batcher = MicroBatcher(lambda items: sent.set(), window=0.05, max_count=100)
+    batcher.start()
+    batcher.submit([1])
+    assert sent.wait(5)
+    batcher.stop()
+
+
+def test_submit_after_stop():
+    batcher = MicroBatcher(lambda items: None)
+    batcher.stop()
+    with pytest.raises(RuntimeError):
+        batcher.submit([1])
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import time
+
+import pytest
+
+from swagger_server.utilities.delivery_queue import DeliveryQueue, DeliveryWorker
+from swagger_server.utilities.notify_exception import NotifyException
+
+
+@pytest.fixture
+def delivery_queue(tmp_path):
+    return DeliveryQueue(str(tmp_path / "delivery.db"), lease_timeout=60)
+
+
+def claimed(entries):
+    return [(e[1], e[2]) for e in entries]
+
+
+
+def test_claim_in_enqueue_order(delivery_queue):
+    delivery_queue.put([("a", 1, "port1"), ("b", 1, "port1"), ("a", 2, "port1")])
+    assert claimed(delivery_queue.claim(10)) == [("a", 1), ("b", 1), ("a", 2)]
+
+
+def test_leased_subscriber_blocks_later_items(delivery_queue):
+    delivery_queue.put([("a", 1, "port1")])
+    first = delivery_queue.claim(10)
+    delivery_queue.put([("a", 2, "port1"), ("b", 1, "port1")])
+
+    # aの前の要素が送信中のため、aの後続は取り出さない
+    assert claimed(delivery_queue.claim(10)) == [("b", 1)]
+    delivery_queue.ack(first)
+    assert claimed(delivery_queue.claim(10)) == [("a", 2)]
+
+
+def test_leased_port_does_not_block_other_ports(delivery_queue):
+    delivery_queue.put([("a", 1, "port1")])
+    first = delivery_queue.claim(10)
+    delivery_queue.put([("a", 2, "port1"), ("a", 3, "port2")])
+
+    # 同じ購読者でも別のポートの要素は並行して取り出す
+    assert claimed(delivery_queue.claim(10)) == [("a", 3)]
+    delivery_queue.ack(first)
+    assert claimed(delivery_queue.claim(10)) == [("a", 2)]
+
+
+def test_item_without_port_blocks_all_ports_of_subscriber(delivery_queue):
+    delivery_queue.put([("a", 1, None)])
+    delivery_queue.claim(10)
+    delivery_queue.put([("a", 2, "port1"), ("b", 1, "port1")])
+    assert claimed(delivery_queue.claim(10)) == [("b", 1)]
+
+
+def test_queue_file_without_port_column_is_migrated(tmp_path):
+    path = str(tmp_path / "delivery.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subscriber TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            enqueued_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            lease_owner TEXT NULL,
+            lease_until REAL NOT NULL DEFAULT 0,
+            last_error TEXT NULL
+        )
+    """)
+    conn.execute("INSERT INTO queue (subscriber, payload, enqueued_at) VALUES ('a', '1', 0)")
+    conn.commit()
+    conn.close()
+
+    delivery_queue = DeliveryQueue(path)
+    delivery_queue.put([("a", 2, "port1")])
+    entries = delivery_queue.claim(10)
+    assert claimed(entries) == [("a", 1), ("a", 2)]
+    assert [e[5] for e in entries] == [None, "port1"]
+
+
+def test_retry_blocks_later_items_until_due(delivery_queue):
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1"), ("b", 1, "port1")])
+    entries = delivery_queue.claim(1)
+    delivery_queue.retry(entries[0], 0.05, "failed")
+
+    assert claimed(delivery_queue.claim(10)) == [("b", 1)]
+    time.sleep(0.06)
+    assert claimed(delivery_queue.claim(10)) == [("a", 1), ("a", 2)]
+
+
+def test_released_items_are_claimed_again_in_order(delivery_queue):
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1")])
+    delivery_queue.release(delivery_queue.claim(10))
+    entries = delivery_queue.claim(10)
+    assert claimed(entries) == [("a", 1), ("a", 2)]
+    assert [e[4] for e in entries] == [0, 0]
+
+
+def test_dead_letter_and_replay(delivery_queue):
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1")])
+    entries = delivery_queue.claim(1)
+    delivery_queue.dead_letter(entries[0], 400, "Bad request.")
+    # デッドレターに移した要素は後続をブロックしない
+    delivery_queue.ack(delivery_queue.claim(10))
+
+    assert [d["payload"] for d in delivery_queue.dead_letters("a")] == [1]
+    assert delivery_queue.replay(subscriber="a", rate=1000) == 1
+    assert delivery_queue.dead_letters() == []
+    time.sleep(0.01)
+    assert claimed(delivery_queue.claim(10)) == [("a", 1)]
+
+
+def test_replay_is_spread_by_rate(delivery_queue):
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1")])
+    for _ in range(2):
+        delivery_queue.dead_letter(delivery_queue.claim(1)[0])
+
+    assert delivery_queue.replay(rate=1) == 2
+    pending = delivery_queue.pending("a")
+    assert pending[1]["next_attempt_at"] - pending[0]["next_attempt_at"] == pytest.approx(1.0)
+
+
+def test_replay_with_empty_ids(delivery_queue):
+    delivery_queue.put([("a", 1, "port1")])
+    delivery_queue.dead_letter(delivery_queue.claim(1)[0])
+    assert delivery_queue.replay(ids=[]) == 0
+    assert len(delivery_queue.dead_letters()) == 1
+
+
+def test_worker_retries_failed_item_and_keeps_order(delivery_queue):
+    delivered = []
+
+    def deliver(subscriber, items):
+        if 2 in items:
+            raise Exception("unavailable")
+        delivered.extend(items)
+
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1"), ("a", 3, "port1")])
+    worker = DeliveryWorker(delivery_queue, deliver, retry_base=60)
+    worker.flush("a", delivery_queue.claim(10))
+
+    assert delivered == [1]
+    # 失敗した要素の再送待ちの間は後続を送信しない
+    assert delivery_queue.claim(10) == []
+    assert [(p["payload"], p["attempts"]) for p in delivery_queue.pending("a")] == [(2, 1), (3, 0)]
+
+
+def test_worker_keeps_delivering_other_ports_after_failure(delivery_queue):
+    delivered = []
+
+    def deliver(subscriber, items):
+        if 2 in items:
+            raise Exception("unavailable")
+        delivered.extend(items)
+
+    delivery_queue.put([("a", 1, "port1"), ("a", 2, "port1"), ("a", 3, "port1"), ("a", 4, "port2")])
+    DeliveryWorker(delivery_queue, deliver, retry_base=60).flush("a", delivery_queue.claim(10))
+
+    # 失敗したポートの後続のみ再送待ちの後に送信する
+    assert delivered == [1, 4]
+    assert [(p["payload"], p["attempts"]) for p in delivery_queue.pending("a")] == [(2, 1), (3, 0)]
+
+
+def test_dead_letter_replay_keeps_port(delivery_queue):
+    delivery_queue.put([("a", 1, "port1")])
+    delivery_queue.dead_letter(delivery_queue.claim(1)[0])
+    assert [d["port"] for d in delivery_queue.dead_letters()] == ["port1"]
+
+    delivery_queue.replay(rate=1000)
+    assert [p["port"] for p in delivery_queue.pending()] == ["port1"]
+
+
+def test_worker_dead_letters_rejected_item(delivery_queue):
+    def deliver(subscriber, items):
+        raise NotifyException("Not found.", 404)
+
+    delivery_queue.put([("a", 1, "port1")])
+    DeliveryWorker(delivery_queue, deliver).flush("a", delivery_queue.claim(10))
+
+    assert delivery_queue.pending() == []
+    assert [(d["payload"], d["status_code"]) for d in delivery_queue.dead_letters()] == [(1, 404)]
+
+
+def test_worker_dead_letters_after_max_attempts(delivery_queue):
+    def deliver(subscriber, items):
+        raise NotifyException("Unavailable.", 503)
+
+    delivery_queue.put([("a", 1, "port1")])
+    worker = DeliveryWorker(delivery_queue, deliver, retry_base=0, max_attempts=2)
+    worker.flush("a", delivery_queue.claim(10))
+    assert delivery_queue.dead_letters() == []
+    worker.flush("a", delivery_queue.claim(10))
+
+    assert [d["attempts"] for d in delivery_queue.dead_letters()] == [2]
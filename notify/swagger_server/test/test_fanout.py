@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from swagger_server.utilities.fanout import FanOut, Subscriber
+
+
+def notification(port, *object_types):
+    return {"dronePortId": port, "events": [{"objectType": t} for t in object_types]}
+
+
+def test_subscriber_conditions():
+    subscriber = Subscriber("a", "http://a", "key", ports=["port1"], object_types=["person"])
+
+    assert subscriber.matches(notification("port1", "person", "car"))
+    assert not subscriber.matches(notification("port2", "person"))
+    assert not subscriber.matches(notification("port1", "car"))
+    assert not subscriber.matches(notification("port1"))
+    assert Subscriber("b", "http://b", "key").matches(notification("port2"))
+
+
+def test_subscriber_requires_name_and_url():
+    with pytest.raises(ValueError):
+        Subscriber("", "http://a", "key")
+    with pytest.raises(ValueError):
+        Subscriber("a", "", "key")
+
+
+def test_items_are_filtered_per_subscriber():
+    posted = []
+    lock = threading.Lock()
+
+    def post(url, api_key, data):
+        with lock:
+            posted.append((url, data["dronePortId"]))
+
+    fanout = FanOut([
+        Subscriber("a", "http://a", "key", ports=["port1"]),
+        Subscriber("b", "http://b", "key"),
+    ], post)
+    items = [notification("port1"), notification("port2")]
+
+    assert fanout.deliver(items) == {}
+    assert sorted(posted) == [("http://a", "port1"), ("http://b", "port1"), ("http://b", "port2")]
+    assert fanout.match(items[1]) == ["b"]
+
+
+def test_subscribers_are_delivered_concurrently():
+    # 全購読者の送信が同時に実行中でなければ待ち合わせが成立しない
+    barrier = threading.Barrier(3, timeout=2)
+
+    def post(url, api_key, data):
+        barrier.wait()
+
+    fanout = FanOut([Subscriber(name, "http://" + name, "key") for name in "abc"], post, max_workers=3)
+    assert fanout.deliver([notification("port1")]) == {}
+
+
+def test_failed_subscriber_does_not_affect_others():
+    posted = []
+
+    def post(url, api_key, data):
+        if url == "http://a":
+            raise Exception("unavailable")
+        posted.append(url)
+
+    fanout = FanOut([Subscriber("a", "http://a", "key"), Subscriber("b", "http://b", "key")], post)
+    errors = fanout.deliver([notification("port1")])
+
+    assert list(errors) == ["a"]
+    assert posted == ["http://b"]
+    stats = fanout.stats()
+    assert (stats["a"]["errors"], stats["a"]["last_error"]) == (1, "unavailable")
+    assert (stats["b"]["requests"], stats["b"]["notifications"]) == (1, 1)
+
+
+def test_batch_is_sent_to_batch_url_in_order():
+    posted = []
+
+    def post(url, api_key, data):
+        posted.append((url, data))
+
+    items = [notification("port1"), notification("port2")]
+    fanout = FanOut([
+        Subscriber("a", "http://a", "key", batch_url="http://a/batch"),
+        Subscriber("b", "http://b", "key"),
+    ], post, max_workers=1)
+    fanout.deliver(items, batch=True)
+
+    assert ("http://a/batch", items) in posted
+    # batch_urlが無い購読者へは到着順に1件ずつ送信する
+    assert [data for url, data in posted if url == "http://b"] == items
+
+
+def test_deliver_to_unknown_subscriber():
+    fanout = FanOut([Subscriber("a", "http://a", "key")], lambda url, api_key, data: None)
+    with pytest.raises(KeyError):
+        fanout.deliver_to("b", [notification("port1")])
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+
+import pytest
+
+from swagger_server.utilities.lanes import LaneDispatcher
+
+
+class Recorder(object):
+    """
+    送信された要素を記録する送信関数（gateがセットされるまで送信を止める）
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, items):
+        self.gate.wait(5)
+        with self.lock:
+            self.sent.extend(items)
+
+
+def wait_sending(lane):
+    """
+    送信スレッドがキューの要素を全て取り出すまで待つ。
+    """
+    while lane.depth:
+        threading.Event().wait(0.01)
+
+
+def wait_all(pending):
+    for p in pending:
+        assert p.wait(5)
+
+
+def test_items_with_same_key_are_sent_in_order():
+    send = Recorder()
+    dispatcher = LaneDispatcher(send, lane_count=4, lane_size=100, max_count=3)
+    pending = []
+    for i in range(50):
+        pending += dispatcher.submit([("port" + str(i % 5), (i % 5, i))])
+    wait_all(pending)
+
+    for port in range(5):
+        sent = [n for key, n in send.sent if key == port]
+        assert sent == sorted(sent)
+        assert len(sent) == 10
+
+
+def test_send_error_is_set_on_pending_items():
+    def send(items):
+        raise Exception("failed")
+
+    dispatcher = LaneDispatcher(send, lane_count=1)
+    pending = dispatcher.submit([("port1", 1)])
+    wait_all(pending)
+    assert str(pending[0].error) == "failed"
+    assert dispatcher.stats()["lanes"][0]["errors"] == 1
+
+
+def test_rejected_batch_enqueues_nothing():
+    send = Recorder()
+    send.gate.clear()
+    dispatcher = LaneDispatcher(send, lane_count=1, lane_size=3, max_count=1, put_timeout=0.05)
+    first = dispatcher.submit([("port1", 1)])
+    # 1件目の送信開始を待ち、キューに2件を予約する
+    wait_sending(dispatcher.lanes[0])
+    first += dispatcher.submit([("port1", 2), ("port1", 3)])
+
+    with pytest.raises(queue.Full):
+        dispatcher.submit([("port1", 4), ("port1", 5)])
+    assert dispatcher.lanes[0].depth == 2
+    assert dispatcher.stats()["rejected"] == 1
+
+    send.gate.set()
+    wait_all(first)
+    wait_all(dispatcher.submit([("port1", 4), ("port1", 5)]))
+    assert send.sent == [1, 2, 3, 4, 5]
+
+
+def test_batch_larger_than_lane_is_rejected_immediately():
+    dispatcher = LaneDispatcher(Recorder(), lane_count=1, lane_size=2, put_timeout=5)
+    with pytest.raises(queue.Full):
+        dispatcher.submit([("port1", 1), ("port1", 2), ("port1", 3)])
+    assert dispatcher.lanes[0].depth == 0
+
+
+def test_blocked_submit_waits_for_space():
+    send = Recorder()
+    send.gate.clear()
+    dispatcher = LaneDispatcher(send, lane_count=1, lane_size=1, max_count=1, put_timeout=5)
+    pending = dispatcher.submit([("port1", 1)])
+    wait_sending(dispatcher.lanes[0])
+    pending += dispatcher.submit([("port1", 2)])
+
+    threading.Timer(0.05, send.gate.set).start()
+    pending += dispatcher.submit([("port1", 3)])
+    wait_all(pending)
+    assert send.sent == [1, 2, 3]
+    assert dispatcher.stats()["blocked"] == 1
+
+
+def test_lane_of_is_stable():
+    dispatcher = LaneDispatcher(Recorder(), lane_count=8)
+    assert dispatcher.lane_of("port1") is dispatcher.lane_of("port1")
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        LaneDispatcher(Recorder(), lane_count=0)
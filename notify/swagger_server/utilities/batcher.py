@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PendingItem(object):
+    """
+    バッチ送信待ちの要素
+    送信完了（成功・失敗）時にイベントをセットする。
+    """
+
+    def __init__(self, item):
+        self.item = item
+        self.enqueued_at = time.monotonic()
+        self.error = None
+        self._done = threading.Event()
+
+    def set_result(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+
+class MicroBatcher(threading.Thread):
+    """
+    通知をまとめて送信するバックグラウンドスレッド
+    最も古い要素の追加から一定時間経過するか、一定件数に達した時点で、溜まった要素を到着順に1回で送信する。
+    送信は1スレッドで順に行うため、同一ポートの通知の順序は到着順のまま保たれる。
+    """
+
+    def __init__(self, send, window: float = 0.02, max_count: int = 100, name: str = "MicroBatcher"):
+        """
+        Args:
+            send function : 要素のリストを送信する関数（失敗時は例外を送出する）
+            window float : 最も古い要素の追加から送信までの最大待機秒数
+            max_count int : 1回に送信する最大件数
+            name str : スレッド名
+        """
+        if window < 0 or max_count <= 0:
+            raise ValueError("Invalid batch window or count. (window: %s, max_count: %s)" % (window, max_count))
+
+        super(MicroBatcher, self).__init__(name=name, daemon=True)
+        self.send = send
+        self.window = window
+        self.max_count = max_count
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._stopped = False
+
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._wait_time = 0.0
+        self._wait_time_max = 0.0
+
+    def submit(self, items: list) -> list:
+        """
+        要素を送信待ちに追加する。1回の呼び出しで追加した要素は連続して送信する。
+
+        :param items: 要素のリスト
+        :return: PendingItemのリスト
+        :rtype: list
+        """
+        pending = [PendingItem(item) for item in items]
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("MicroBatcher is stopped.")
+            self._buffer.extend(pending)
+            self._cond.notify()
+        return pending
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _take(self) -> list:
+        """
+        送信する要素を取り出す。件数上限に達するか、最も古い要素の待機期限まで待つ。
+        """
+        with self._cond:
+            while not self._buffer and not self._stopped:
+                self._cond.wait()
+            if not self._buffer:
+                return []
+            deadline = self._buffer[0].enqueued_at + self.window
+            while len(self._buffer) < self.max_count and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._buffer[:self.max_count]
+            del self._buffer[:self.max_count]
+            return batch
+
+    def run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+
+            started = time.monotonic()
+            error = None
+            try:
+                self.send([p.item for p in batch])
+            except Exception as e:
+                logger.warning("MicroBatcher: batch send failed. (count: %d)", len(batch))
+                error = e
+
+            waited = started - batch[0].enqueued_at
+            with self._cond:
+                self._batches += 1
+                self._items += len(batch)
+                self._wait_time += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+                if error is not None:
+                    self._errors += 1
+
+            for p in batch:
+                p.set_result(error)
+
+    def stats(self) -> dict:
+        """
+        バッチ送信の統計情報
+
+        :rtype: dict
+        """
+        with self._cond:
+            return {
+                "window": self.window,
+                "max_count": self.max_count,
+                "pending": len(self._buffer),
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "batch_size_avg": self._items / self._batches if self._batches else 0.0,
+                "wait_time_avg": self._wait_time / self._batches if self._batches else 0.0,
+                "wait_time_max": self._wait_time_max
+            }
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 再試行しても成功しない応答ステータス（4xxのうちタイムアウト・流量制限以外）
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+QUEUE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        subscriber TEXT NOT NULL,
+        port TEXT NULL,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        lease_owner TEXT NULL,
+        lease_until REAL NOT NULL DEFAULT 0,
+        last_error TEXT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS queue_subscriber_idx ON queue (subscriber, id)",
+    """
+    CREATE TABLE IF NOT EXISTS dead_letter (
+        id INTEGER PRIMARY KEY,
+        subscriber TEXT NOT NULL,
+        port TEXT NULL,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        failed_at REAL NOT NULL,
+        attempts INTEGER NOT NULL,
+        status_code INTEGER NULL,
+        message TEXT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS dead_letter_subscriber_idx ON dead_letter (subscriber, id)",
+]
+# ポートの列の追加前に作成したキューファイルへ追加する列
+QUEUE_MIGRATIONS = [
+    ("queue", "port", "ALTER TABLE queue ADD COLUMN port TEXT NULL"),
+    ("dead_letter", "port", "ALTER TABLE dead_letter ADD COLUMN port TEXT NULL"),
+]
+QUEUE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS queue_subscriber_port_idx ON queue (subscriber, port, id)",
+]
+
+# 送信時刻になった要素を古い順に取り出す。
+# 同じ購読者・同じポートの前の要素が送信中・再送待ちの場合は、購読者・ポートごとの順序を保つため取り出さない。
+# 別のポートの要素は前の要素の送信を待たずに取り出し、複数の送信スレッドで並行して送信する。
+# ポート未設定（旧形式）の要素の送信中・再送待ちは、同じ購読者の全ポートの後続の要素を取り出さない。
+SQL_QUEUE_CLAIM = """
+    UPDATE queue SET lease_owner = :owner, lease_until = :lease_until
+    WHERE id IN (
+        SELECT q.id FROM queue q
+        WHERE q.next_attempt_at <= :now AND q.lease_until < :now
+          AND NOT EXISTS (
+              SELECT 1 FROM queue p
+              WHERE p.subscriber = q.subscriber AND p.id < q.id
+                AND (p.port IS q.port OR p.port IS NULL)
+                AND (p.lease_until >= :now OR (p.attempts > 0 AND p.next_attempt_at > :now))
+          )
+        ORDER BY q.id
+        LIMIT :limit
+    )
+"""
+
+
+def backoff(attempts: int, base: float, maximum: float) -> float:
+    """
+    再送までの待機秒数（試行回数ごとに倍にし、上限で打ち切る）
+    """
+    return min(base * (2 ** min(attempts, 20)), maximum)
+
+
+class DeliveryQueue(object):
+    """
+    SQLiteによる購読者ごとの送信キュー
+    同じ購読者への通知はドローンポートごとに追加順に送信する。
+    putはSQLiteへのコミット（fsync）完了後に戻るため、戻った要素はプロセスの再起動後も失われない。
+    送信に失敗し続けた要素はデッドレターに移し、管理APIから確認・再送する。
+    """
+
+    def __init__(self, path: str, lease_timeout: float = 60.0):
+        """
+        Args:
+            path str : キューのファイルパス
+            lease_timeout float : 取り出した要素のリース秒数
+        """
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._enqueued = 0
+        self._delivered = 0
+        self._retries = 0
+        self._dead_lettered = 0
+        self._replayed = 0
+        self._latency_last = None
+        self._latency_max = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        for statement in QUEUE_SCHEMA:
+            conn.execute(statement)
+        for table, column, statement in QUEUE_MIGRATIONS:
+            if column not in [row[1] for row in conn.execute("PRAGMA table_info(%s)" % table)]:
+                conn.execute(statement)
+        for statement in QUEUE_INDEXES:
+            conn.execute(statement)
+
+    def _connection(self):
+        """
+        スレッドごとのSQLiteコネクション
+        WALモード・synchronous=FULLとし、コミットごとにディスクへ書き出す。
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, entries: list):
+        """
+        要素を1回のコミットで追加する。
+
+        :param entries: (購読者名, JSONに変換可能な要素, ドローンポートID)のリスト
+        """
+        if not entries:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO queue (subscriber, port, payload, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                [(subscriber, port, json.dumps(item), now, now) for subscriber, item, port in entries])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._enqueued += len(entries)
+
+    def claim(self, limit: int) -> list:
+        """
+        送信時刻になった要素を古い順に最大limit件取り出す。
+
+        :return: (id, 購読者名, 要素, 追加日時, 試行回数, ドローンポートID)のリスト
+        :rtype: list
+        """
+        owner = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(SQL_QUEUE_CLAIM, {
+                "owner": owner, "lease_until": now + self.lease_timeout, "now": now, "limit": limit})
+            rows = conn.execute(
+                "SELECT id, subscriber, payload, enqueued_at, attempts, port FROM queue"
+                " WHERE lease_owner = ? ORDER BY id", (owner,)).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(row[0], row[1], json.loads(row[2]), row[3], row[4], row[5]) for row in rows]
+
+    def ack(self, entries: list):
+        """
+        送信済みの要素を削除する。
+        """
+        if not entries:
+            return
+        conn = self._connection()
+        conn.executemany("DELETE FROM queue WHERE id = ?", [(e[0],) for e in entries])
+
+        now = time.time()
+        with self._lock:
+            self._delivered += len(entries)
+            self._latency_last = now - min(e[3] for e in entries)
+            self._latency_max = max(self._latency_max, self._latency_last)
+
+    def release(self, entries: list):
+        """
+        送信しなかった要素のリースを解除する（試行回数は加算しない）。
+        """
+        if not entries:
+            return
+        conn = self._connection()
+        conn.executemany(
+            "UPDATE queue SET lease_owner = NULL, lease_until = 0 WHERE id = ?", [(e[0],) for e in entries])
+
+    def retry(self, entry, delay: float, message: str = None):
+        """
+        送信に失敗した要素の試行回数を加算し、delay秒後に再送する。
+        """
+        conn = self._connection()
+        conn.execute("""
+            UPDATE queue
+            SET lease_owner = NULL, lease_until = 0, attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+        """, (time.time() + delay, message, entry[0]))
+        with self._lock:
+            self._retries += 1
+
+    def dead_letter(self, entry, status_code=None, message=None):
+        """
+        送信できない要素をデッドレターに移す。
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO dead_letter
+                    (id, subscriber, port, payload, enqueued_at, failed_at, attempts, status_code, message)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (entry[0], entry[1], entry[5], json.dumps(entry[2]), entry[3], time.time(), entry[4] + 1,
+                  status_code, message))
+            conn.execute("DELETE FROM queue WHERE id = ?", (entry[0],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._dead_lettered += 1
+
+    def pending(self, subscriber: str = None, limit: int = 100) -> list:
+        """
+        未送信の要素を古い順に取得する。
+
+        :rtype: list
+        """
+        conn = self._connection()
+        rows = conn.execute("""
+            SELECT id, subscriber, payload, enqueued_at, attempts, next_attempt_at, last_error, port
+            FROM queue WHERE (? IS NULL OR subscriber = ?) ORDER BY id LIMIT ?
+        """, (subscriber, subscriber, limit)).fetchall()
+        return [{
+            "id": row[0],
+            "subscriber": row[1],
+            "payload": json.loads(row[2]),
+            "enqueued_at": row[3],
+            "attempts": row[4],
+            "next_attempt_at": row[5],
+            "last_error": row[6],
+            "port": row[7]
+        } for row in rows]
+
+    def dead_letters(self, subscriber: str = None, limit: int = 100) -> list:
+        """
+        デッドレターの要素を古い順に取得する。
+
+        :rtype: list
+        """
+        conn = self._connection()
+        rows = conn.execute("""
+            SELECT id, subscriber, payload, enqueued_at, failed_at, attempts, status_code, message, port
+            FROM dead_letter WHERE (? IS NULL OR subscriber = ?) ORDER BY id LIMIT ?
+        """, (subscriber, subscriber, limit)).fetchall()
+        return [{
+            "id": row[0],
+            "subscriber": row[1],
+            "payload": json.loads(row[2]),
+            "enqueued_at": row[3],
+            "failed_at": row[4],
+            "attempts": row[5],
+            "status_code": row[6],
+            "message": row[7],
+            "port": row[8]
+        } for row in rows]
+
+    def replay(self, ids: list = None, subscriber: str = None, limit: int = 100, rate: float = 10.0) -> int:
+        """
+        デッドレターの要素を古い順に送信キューへ戻す。
+        送信先へ一度に集中しないよう、rate件/秒の間隔で送信時刻をずらして登録する。
+        再送する要素はキューの末尾に追加するため、同じ購読者・ポートへの後続の通知より後に送信される。
+
+        :param ids: 再送する要素のID（省略時は全て）
+        :param subscriber: 再送する購読者名（省略時は全て）
+        :param limit: 再送する最大件数
+        :param rate: 1秒あたりの再送件数
+        :return: 再送した件数
+        :rtype: int
+        """
+        if rate <= 0:
+            raise ValueError("Invalid replay rate. (rate: %s)" % rate)
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT id, subscriber, payload, port FROM dead_letter WHERE (? IS NULL OR subscriber = ?)"
+            params = [subscriber, subscriber]
+            if ids is not None:
+                if not ids:
+                    conn.execute("COMMIT")
+                    return 0
+                query += " AND id IN (%s)" % ",".join("?" * len(ids))
+                params.extend(ids)
+            query += " ORDER BY id LIMIT ?"
+            params.append(limit)
+            rows = conn.execute(query, params).fetchall()
+
+            now = time.time()
+            conn.executemany(
+                "INSERT INTO queue (subscriber, port, payload, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                [(row[1], row[3], row[2], now, now + i / rate) for i, row in enumerate(rows)])
+            conn.executemany("DELETE FROM dead_letter WHERE id = ?", [(row[0],) for row in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._replayed += len(rows)
+        return len(rows)
+
+    def stats(self) -> dict:
+        """
+        キューの統計情報
+
+        :rtype: dict
+        """
+        conn = self._connection()
+        subscribers = {}
+        for name, depth, oldest, retrying in conn.execute("""
+            SELECT subscriber, count(*), min(enqueued_at), sum(CASE WHEN attempts > 0 THEN 1 ELSE 0 END)
+            FROM queue GROUP BY subscriber
+        """):
+            subscribers[name] = {"depth": depth, "oldest_age": time.time() - oldest, "retrying": retrying,
+                                 "dead_letter_depth": 0}
+        for name, depth in conn.execute("SELECT subscriber, count(*) FROM dead_letter GROUP BY subscriber"):
+            subscribers.setdefault(name, {"depth": 0, "oldest_age": 0.0, "retrying": 0})["dead_letter_depth"] = depth
+
+        with self._lock:
+            return {
+                "depth": sum(s["depth"] for s in subscribers.values()),
+                "dead_letter_depth": sum(s["dead_letter_depth"] for s in subscribers.values()),
+                "enqueued": self._enqueued,
+                "delivered": self._delivered,
+                "retries": self._retries,
+                "dead_lettered": self._dead_lettered,
+                "replayed": self._replayed,
+                "latency_last": self._latency_last,
+                "latency_max": self._latency_max,
+                "subscribers": subscribers
+            }
+
+
+class DeliveryWorker(threading.Thread):
+    """
+    キューの要素を取り出し、購読者ごとに送信関数に渡すバックグラウンドスレッド
+    送信関数は(購読者名, 要素のリスト)を受け取り、失敗時は例外を送出する。
+    取り出しはポートごとの順序を保つため、複数のスレッドが同じ購読者の別のポートの要素を並行して送信する。
+    送信後、キューから削除する前にプロセスが停止した場合は再起動後に再度送信される（at-least-once）。
+    """
+
+    def __init__(self, queue: DeliveryQueue, deliver, batch_size: int = 100, poll_interval: float = 0.5,
+                 retry_base: float = 1.0, max_backoff: float = 300.0, max_attempts: int = 10,
+                 wakeup: threading.Event = None, name: str = "DeliveryWorker"):
+        """
+        Args:
+            queue DeliveryQueue : キュー
+            deliver function : 送信関数
+            batch_size int : 1回に取り出す最大件数
+            poll_interval float : 送信する要素が無い場合の待機秒数
+            retry_base float : 再送の初回待機秒数
+            max_backoff float : 再送の最大待機秒数
+            max_attempts int : デッドレターに移すまでの試行回数
+            wakeup threading.Event : 要素の追加時にセットされるイベント（待機を打ち切る）
+            name str : スレッド名
+        """
+        super(DeliveryWorker, self).__init__(name=name, daemon=True)
+        self.queue = queue
+        self.deliver = deliver
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.wakeup = wakeup or threading.Event()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.wakeup.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                entries = self.queue.claim(self.batch_size)
+            except Exception:
+                logger.exception("DeliveryWorker: failed to claim entries.")
+                entries = []
+
+            for subscriber, group in self._group(entries):
+                self.flush(subscriber, group)
+
+            if len(entries) < self.batch_size:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+
+    @staticmethod
+    def _group(entries: list) -> list:
+        """
+        要素を購読者ごとに到着順のまま分ける。
+        """
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry[1], []).append(entry)
+        return list(groups.items())
+
+    def flush(self, subscriber: str, entries: list):
+        """
+        購読者へ要素をまとめて送信する。まとめての送信に失敗した場合は1件ずつ順に送信し、
+        失敗した要素と同じポートの後続の要素は順序を保つため再送待ちの要素の後に送信する。
+        別のポートの要素は失敗した要素を待たずに送信する。
+        """
+        try:
+            self.deliver(subscriber, [e[2] for e in entries])
+        except Exception as e:
+            if len(entries) == 1:
+                self._fail(entries[0], e)
+                return
+            logger.warning("DeliveryWorker: batch delivery failed, retrying one by one. (subscriber: %s, count: %d)",
+                           subscriber, len(entries))
+        else:
+            self.queue.ack(entries)
+            return
+
+        failed_ports = set()
+        for entry in entries:
+            # ポート未設定の要素の失敗後は、全ポートの後続の要素を送信しない
+            if entry[5] in failed_ports or None in failed_ports:
+                self.queue.release([entry])
+                continue
+            try:
+                self.deliver(subscriber, [entry[2]])
+            except Exception as e:
+                self._fail(entry, e)
+                failed_ports.add(entry[5])
+                continue
+            self.queue.ack([entry])
+
+    def _fail(self, entry, error):
+        status_code = getattr(error, "http_status_code", None)
+        message = str(getattr(error, "error_message", None) or error)[:1000]
+        if status_code is not None and 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_ERRORS:
+            logger.error("DeliveryWorker: rejected entry. (id: %s, subscriber: %s, status: %s, message: %s)",
+                         entry[0], entry[1], status_code, message)
+            self.queue.dead_letter(entry, status_code, message)
+            return
+        if entry[4] + 1 >= self.max_attempts:
+            logger.error("DeliveryWorker: entry exceeded max attempts. (id: %s, subscriber: %s)", entry[0], entry[1])
+            self.queue.dead_letter(entry, status_code, message)
+            return
+        wait = backoff(entry[4], self.retry_base, self.max_backoff)
+        logger.warning("DeliveryWorker: delivery failed. (id: %s, subscriber: %s, attempts: %d, retry in %.1fs)",
+                       entry[0], entry[1], entry[4] + 1, wait)
+        self.queue.retry(entry, wait, message)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber(object):
+    """
+    通知の送信先（購読者）
+    ポート・障害物の種別の条件を指定した場合は、条件に一致する通知のみを送信する。
+    """
+
+    def __init__(self, name: str, url: str, api_key: str, batch_url: str = None,
+                 ports: list = None, object_types: list = None):
+        """
+        Args:
+            name str : 表示名
+            url str : 通知の送信先URL
+            api_key str : APIキー
+            batch_url str : 通知のリストを1回で受け付けるURL（省略時はurlへ1件ずつ送信する）
+            ports list : 送信対象のドローンポートID（省略時は全ポート）
+            object_types list : 送信対象の障害物の種別（省略時は全種別）
+        """
+        if not name or not url:
+            raise ValueError("Subscriber name and url are required.")
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.batch_url = batch_url
+        self.ports = set(ports) if ports else None
+        self.object_types = set(object_types) if object_types else None
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._notifications = 0
+        self._errors = 0
+        self._time = 0.0
+        self._time_max = 0.0
+        self._last_error = None
+
+    def matches(self, notification_data: dict) -> bool:
+        """
+        通知が送信対象かを判定する。
+        種別の条件は、通知のイベントにいずれかの種別が含まれる場合に一致とする。
+        """
+        if self.ports is not None and notification_data.get("dronePortId") not in self.ports:
+            return False
+        if self.object_types is not None:
+            types = set(ev.get("objectType") for ev in notification_data.get("events") or [])
+            if not types & self.object_types:
+                return False
+        return True
+
+    def record(self, count: int, elapsed: float, error=None):
+        with self._lock:
+            self._requests += 1
+            self._notifications += count
+            self._time += elapsed
+            self._time_max = max(self._time_max, elapsed)
+            if error is not None:
+                self._errors += 1
+                self._last_error = getattr(error, "error_message", None) or str(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "url": self.url,
+                "requests": self._requests,
+                "notifications": self._notifications,
+                "errors": self._errors,
+                "latency_avg": self._time / self._requests if self._requests else 0.0,
+                "latency_max": self._time_max,
+                "last_error": self._last_error
+            }
+
+
+class FanOut(object):
+    """
+    通知を複数の購読者へ並行して送信する。
+    送信はワーカー数を上限としたスレッドプールで行い、全体の所要時間は最も遅い購読者の所要時間となる。
+    """
+
+    def __init__(self, subscribers: list, post, max_workers: int = 8):
+        """
+        Args:
+            subscribers list : Subscriberのリスト
+            post function : (URL, APIキー, 送信データ)を受け取り送信する関数（失敗時は例外を送出する）
+            max_workers int : 送信に使用する最大スレッド数
+        """
+        if not subscribers:
+            raise ValueError("No subscribers.")
+        self.subscribers = subscribers
+        self.post = post
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FanOut")
+
+    def _deliver(self, subscriber: Subscriber, items: list, batch: bool):
+        started = time.monotonic()
+        error = None
+        try:
+            if batch and subscriber.batch_url:
+                self.post(subscriber.batch_url, subscriber.api_key, items)
+            else:
+                # 1件ずつの送信では順序を保つため順に送信する
+                for item in items:
+                    self.post(subscriber.url, subscriber.api_key, item)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            subscriber.record(len(items), time.monotonic() - started, error)
+
+    def deliver(self, items: list, batch: bool = False) -> dict:
+        """
+        通知を各購読者の条件で絞り込み、購読者ごとに並行して送信する。
+
+        :param items: 通知データのリスト（到着順）
+        :param batch: 購読者のbatch_urlへまとめて送信するか
+        :return: 購読者名 -> 送信時の例外（失敗した購読者のみ）
+        :rtype: dict
+        """
+        futures = {}
+        for subscriber in self.subscribers:
+            targets = [item for item in items if subscriber.matches(item)]
+            if targets:
+                futures[subscriber.name] = self._executor.submit(self._deliver, subscriber, targets, batch)
+
+        errors = {}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                logger.warning("FanOut: delivery to %s failed.", name)
+                errors[name] = error
+        return errors
+
+    def match(self, notification_data: dict) -> list:
+        """
+        通知の送信対象の購読者名のリスト
+        """
+        return [subscriber.name for subscriber in self.subscribers if subscriber.matches(notification_data)]
+
+    def deliver_to(self, name: str, items: list):
+        """
+        指定した購読者へ呼び出し元のスレッドで送信する（失敗時は例外を送出する）。
+        2件以上の場合はbatch_urlへまとめて送信する。
+        """
+        for subscriber in self.subscribers:
+            if subscriber.name == name:
+                self._deliver(subscriber, items, len(items) > 1)
+                return
+        raise KeyError(name)
+
+    def stats(self) -> dict:
+        return {subscriber.name: subscriber.stats() for subscriber in self.subscribers}
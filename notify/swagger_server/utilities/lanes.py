@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import threading
+import time
+import zlib
+
+from swagger_server.utilities.batcher import PendingItem
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(threading.Thread):
+    """
+    1つのレーンの送信スレッド
+    キューの要素を到着順に取り出して送信する。送信中に溜まった要素は次の送信でまとめて送信する。
+    キューの空き容量はLaneDispatcherが予約してから要素を追加するため、キュー自体には上限を設けない。
+    """
+
+    def __init__(self, send, maxsize: int, max_count: int, name: str, space: threading.Condition):
+        """
+        Args:
+            send function : 要素のリストを送信する関数（失敗時は例外を送出する）
+            maxsize int : キューの最大件数
+            max_count int : 1回に送信する最大件数
+            name str : スレッド名
+            space threading.Condition : キューの空き容量の変化を通知する条件変数（全レーンで共有）
+        """
+        super(Lane, self).__init__(name=name, daemon=True)
+        self.send = send
+        self.maxsize = maxsize
+        self.max_count = max_count
+        self.queue = queue.Queue()
+        self.space = space
+        # 予約済み・キュー内の要素数（spaceのロックを取得して更新する）
+        self.depth = 0
+        self._lock = threading.Lock()
+        self._sends = 0
+        self._items = 0
+        self._errors = 0
+        self._depth_max = 0
+
+    def free(self) -> int:
+        """
+        キューの空き容量（spaceのロックを取得して呼び出すこと）
+        """
+        return self.maxsize - self.depth
+
+    def reserve(self, count: int):
+        """
+        キューの空き容量を予約する（spaceのロックを取得して呼び出すこと）。
+        """
+        self.depth += count
+        with self._lock:
+            self._depth_max = max(self._depth_max, self.depth)
+
+    def put(self, pending: PendingItem):
+        """
+        予約済みの容量に要素を追加する。
+        """
+        self.queue.put(pending)
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_count:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.space:
+                self.depth -= len(batch)
+                self.space.notify_all()
+
+            error = None
+            try:
+                self.send([p.item for p in batch])
+            except Exception as e:
+                logger.warning("%s: send failed. (count: %d)", self.name, len(batch))
+                error = e
+
+            with self._lock:
+                self._sends += 1
+                self._items += len(batch)
+                if error is not None:
+                    self._errors += 1
+
+            for p in batch:
+                p.set_result(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self.depth,
+                "depth_max": self._depth_max,
+                "sends": self._sends,
+                "items": self._items,
+                "errors": self._errors
+            }
+
+
+class LaneDispatcher(object):
+    """
+    キー（ドローンポートID）のハッシュ値で要素をレーンに振り分け、レーンごとに並行して送信する。
+    同じキーの要素は常に同じレーンで到着順に送信するため、キーごとの順序を保ったまま複数のキーを並行して送信できる。
+    レーンのキューが満杯の場合は追加を待機させ、待機時間を超えた場合は例外とする（背圧）。
+    要素のリストは全件分の空き容量を予約してから追加するため、一部の要素のみが追加されることはない。
+    """
+
+    def __init__(self, send, lane_count: int = 8, lane_size: int = 1000, max_count: int = 100,
+                 put_timeout: float = 5.0):
+        """
+        Args:
+            send function : 要素のリストを送信する関数（失敗時は例外を送出する）
+            lane_count int : レーン数
+            lane_size int : レーンごとのキューの最大件数
+            max_count int : 1回に送信する最大件数
+            put_timeout float : キューが満杯の場合の最大待機秒数
+        """
+        if lane_count <= 0 or lane_size <= 0 or max_count <= 0 or put_timeout < 0:
+            raise ValueError("Invalid lane configuration. (lane_count: %s, lane_size: %s, max_count: %s, put_timeout: %s)"
+                             % (lane_count, lane_size, max_count, put_timeout))
+        self.put_timeout = put_timeout
+        self._space = threading.Condition()
+        self.lanes = [Lane(send, lane_size, max_count, "Lane-" + str(i), self._space) for i in range(lane_count)]
+        self._lock = threading.Lock()
+        self._blocked = 0
+        self._rejected = 0
+        for lane in self.lanes:
+            lane.start()
+
+    def lane_of(self, key) -> Lane:
+        """
+        キーを振り分けるレーン（プロセスの再起動後も同じ振り分けとなるようCRC32を使用する）
+        """
+        return self.lanes[zlib.crc32(str(key).encode("utf-8")) % len(self.lanes)]
+
+    def submit(self, items: list) -> list:
+        """
+        要素をキーのレーンに到着順に追加する。
+        全要素分の空き容量を予約できた場合のみ追加し、予約できなかった場合はいずれの要素も追加しない。
+
+        :param items: (キー, 要素)のリスト
+        :return: PendingItemのリスト
+        :rtype: list
+        :raises queue.Full: 待機時間内にレーンのキューが空かなかった場合
+        """
+        assigned = [(self.lane_of(key), PendingItem(item)) for key, item in items]
+        counts = {}
+        for lane, _p in assigned:
+            counts[lane] = counts.get(lane, 0) + 1
+
+        deadline = time.monotonic() + self.put_timeout
+        blocked = False
+        with self._space:
+            while not all(lane.free() >= count for lane, count in counts.items()):
+                remaining = deadline - time.monotonic()
+                # 1レーン分の上限を超える場合は待機しても追加できない
+                if remaining <= 0 or any(count > lane.maxsize for lane, count in counts.items()):
+                    with self._lock:
+                        self._blocked += int(blocked)
+                        self._rejected += 1
+                    raise queue.Full
+                blocked = True
+                self._space.wait(remaining)
+
+            for lane, count in counts.items():
+                lane.reserve(count)
+            # 予約と追加を同じロック内で行い、同時に追加した要素間でもキー（レーン）ごとの到着順を保つ
+            for lane, p in assigned:
+                lane.put(p)
+
+        if blocked:
+            with self._lock:
+                self._blocked += 1
+        return [p for _lane, p in assigned]
+
+    def stats(self) -> dict:
+        """
+        レーンの統計情報
+
+        :rtype: dict
+        """
+        with self._lock:
+            blocked, rejected = self._blocked, self._rejected
+        return {
+            "lanes": [lane.stats() for lane in self.lanes],
+            "blocked": blocked,
+            "rejected": rejected
+        }
@@ -36,3 +36,5 @@ ALTER TABLE "event_information"
 	ADD FOREIGN KEY (ent_stat_id)
 	REFERENCES "entry_status_information" (id);
 
+--インデックス等のスキーマ変更は manage 起動時のマイグレーション
+--（manage/swagger_server/migrations）で適用する。